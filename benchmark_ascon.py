@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Compares the speed of Ascon-AEAD128 and Ascon-Hash256 with the sponge-based
+AEAD and SHA-3 over Keccak-f[1600] for small messages.
+
+Copyright (c), Felix Fontein, 2020
+
+This file is BSD licensed under the Simplified BSD License
+(see https://opensource.org/licenses/BSD-2-Clause).
+"""
+
+import os
+import timeit
+
+from crypto import ascon
+from crypto import keccak
+from crypto import padding
+from crypto import sha3
+from crypto import sponge_crypto
+
+
+def benchmark(function, number):
+    """Return time per call in microseconds."""
+    return min(timeit.repeat(function, number=number, repeat=5)) / number * 1e6
+
+
+def benchmark_permutations():
+    for name, f in [
+        ('Keccak-f[1600]', keccak.KeccakF(6)),
+        ('Ascon-p[12]', ascon.ASCON_P_12),
+        ('Ascon-p[8]', ascon.ASCON_P_8),
+    ]:
+        state = f.new_state()
+        state.from_bytes(os.urandom(16))
+        print('{0:32}: {1:8.1f} us'.format(
+            name, benchmark(lambda: f(state), 200)))
+
+
+AEADS = [
+    ('SpongeAEAD over Keccak-f[1600]',
+     sponge_crypto.SpongeAEAD(keccak.KeccakF(6), 1088 // 8, 256 // 8,
+                              256 // 8, padding.add_10star1_padding),
+     lambda c, key, header, data: c.encrypt_and_tag(key, header, data)),
+    ('SpongeAEAD over Ascon-p[12]',
+     sponge_crypto.SpongeAEAD(ascon.ASCON_P_12, 192 // 8, 128 // 8,
+                              128 // 8, padding.add_10star1_padding),
+     lambda c, key, header, data: c.encrypt_and_tag(key, header, data)),
+    ('Ascon-AEAD128',
+     ascon.AsconAEAD128(),
+     lambda c, key, header, data: c.encrypt_and_tag(
+         key, b'\x00' * 16, header, data)),
+]
+
+
+def benchmark_aead(length):
+    key = os.urandom(16)
+    header = os.urandom(16)
+    data = os.urandom(length)
+    for name, c, encrypt in AEADS:
+        print('{0:32}: {1:8.1f} us'.format(
+            name, benchmark(lambda: encrypt(c, key, header, data), 10)))
+
+
+def benchmark_hash(length):
+    data = os.urandom(length)
+    for name, h in [
+        ('SHA-3-256', sha3.sha_3_256),
+        ('Ascon-Hash256', ascon.ascon_hash256),
+    ]:
+        print('{0:32}: {1:8.1f} us'.format(
+            name, benchmark(lambda: h(data), 10)))
+
+
+print('Permutation:')
+benchmark_permutations()
+for length in [0, 16, 64, 256, 1024]:
+    print()
+    print('AEAD, {0} bytes of data and 16 bytes of header:'.format(length))
+    benchmark_aead(length)
+for length in [0, 64, 1024]:
+    print()
+    print('Hash, {0} bytes:'.format(length))
+    benchmark_hash(length)
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Compares the speed of the Keccak-f engines for every lane size.
+
+Copyright (c), Felix Fontein, 2020
+
+This file is BSD licensed under the Simplified BSD License
+(see https://opensource.org/licenses/BSD-2-Clause).
+"""
+
+import os
+import timeit
+
+from crypto import keccak
+
+
+def benchmark(ell, engine, number):
+    """Return time per absorb + permutation call in microseconds."""
+    f = keccak.KeccakF(ell, engine)
+    state = f.new_state()
+    # Absorb a block of (roughly) the SHA-3-256 rate
+    block = os.urandom(f.b_bytes * 17 // 25)
+
+    def run():
+        state.from_bytes(block)
+        f(state)
+
+    return min(timeit.repeat(run, number=number, repeat=7)) / number * 1e6
+
+
+for ell in range(3, 7):
+    for engine in keccak.KeccakF.ENGINES:
+        number = 20 if engine == 'reference' else 500
+        print('Keccak-f[{0:4}] {1:9}: {2:8.1f} us'.format(
+            25 * 2 ** ell, engine, benchmark(ell, engine, number)))
@@ -232,6 +232,63 @@ def _combine(v: typing.List[int]) -> bytes:
     return b''.join([int.to_bytes(val, 4, byteorder='big') for val in v])
 
 
+def _compute_t_tables() -> typing.List[typing.List[int]]:
+    """Compute the tables combining SubBytes and MixColumns.
+
+    Entry ``v`` of table ``i`` is the MixColumns image of a column whose
+    row ``i`` is ``S(v)`` and whose other rows are zero."""
+    t0 = [
+        (_multiply(2, s) << 24) | (s << 16) | (s << 8) | _multiply(3, s)
+        for s in AES_S_BOX
+    ]
+    return [[ROL(v, 32 - 8 * i, 32) for v in t0] for i in range(4)]
+
+
+_T_TABLES = _compute_t_tables()
+
+
+def aes_key_schedule(key: bytes) -> typing.List[int]:
+    """Compute the AES-256 key schedule of ``key`` as 60 32bit words."""
+    assert len(key) == 32
+    return _key_schedule(_split(key))
+
+
+def aes_encrypt_words(m: typing.Sequence[int],
+                      key_schedule: typing.List[int]
+                      ) -> typing.Tuple[int, int, int, int]:
+    """Encrypt a block given as four 32bit words with AES-256.
+
+    ``key_schedule`` is the result of ``aes_key_schedule()``. SubBytes,
+    ShiftRows and MixColumns are done with table lookups."""
+    t0, t1, t2, t3 = _T_TABLES
+    s0, s1, s2, s3 = [a ^ b for a, b in zip(m, key_schedule[0:4])]
+    for i in range(4, len(key_schedule) - 4, 4):
+        k0, k1, k2, k3 = key_schedule[i:i + 4]
+        s0, s1, s2, s3 = (
+            t0[s0 >> 24] ^ t1[(s1 >> 16) & 0xFF] ^
+            t2[(s2 >> 8) & 0xFF] ^ t3[s3 & 0xFF] ^ k0,
+            t0[s1 >> 24] ^ t1[(s2 >> 16) & 0xFF] ^
+            t2[(s3 >> 8) & 0xFF] ^ t3[s0 & 0xFF] ^ k1,
+            t0[s2 >> 24] ^ t1[(s3 >> 16) & 0xFF] ^
+            t2[(s0 >> 8) & 0xFF] ^ t3[s1 & 0xFF] ^ k2,
+            t0[s3 >> 24] ^ t1[(s0 >> 16) & 0xFF] ^
+            t2[(s1 >> 8) & 0xFF] ^ t3[s2 & 0xFF] ^ k3,
+        )
+    # Last round without MixColumns
+    sbox = AES_S_BOX
+    k0, k1, k2, k3 = key_schedule[-4:]
+    return (
+        ((sbox[s0 >> 24] << 24) | (sbox[(s1 >> 16) & 0xFF] << 16) |
+         (sbox[(s2 >> 8) & 0xFF] << 8) | sbox[s3 & 0xFF]) ^ k0,
+        ((sbox[s1 >> 24] << 24) | (sbox[(s2 >> 16) & 0xFF] << 16) |
+         (sbox[(s3 >> 8) & 0xFF] << 8) | sbox[s0 & 0xFF]) ^ k1,
+        ((sbox[s2 >> 24] << 24) | (sbox[(s3 >> 16) & 0xFF] << 16) |
+         (sbox[(s0 >> 8) & 0xFF] << 8) | sbox[s1 & 0xFF]) ^ k2,
+        ((sbox[s3 >> 24] << 24) | (sbox[(s0 >> 16) & 0xFF] << 16) |
+         (sbox[(s1 >> 8) & 0xFF] << 8) | sbox[s2 & 0xFF]) ^ k3,
+    )
+
+
 def aes_encrypt(message: bytes, key: bytes) -> bytes:
     """Encrypt ``message`` with AES-256 with key ``key``."""
     assert len(message) == 16
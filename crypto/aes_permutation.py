@@ -0,0 +1,81 @@
+"""
+Implements a 128-bit permutation for sponges by encrypting the state with
+AES-256 under a fixed, public key.
+
+The key schedule is computed once when the permutation is created, and
+the state is kept as a single integer, so that a permutation call only
+consists of the table-driven AES rounds (see ``aes.aes_encrypt_words()``).
+
+WARNING: These implementations are for educational purposes.
+         DO NOT use them for real-world applications!
+
+Copyright (c), Felix Fontein, 2020
+
+This file is BSD licensed under the Simplified BSD License
+(see https://opensource.org/licenses/BSD-2-Clause).
+"""
+
+from . import aes
+from .sponge import F, State
+
+
+_MASK_32 = 0xFFFFFFFF
+
+
+class AESPermutationState(State):
+    """Represents the 16 byte state as a big endian integer."""
+
+    _value: int
+
+    def __init__(self):
+        self.b_bytes = 16
+        self._value = 0
+
+    def from_bytes(self, value: bytes):
+        """Incorporate bytes into state.
+
+        Can be between 0 and 16 bytes long."""
+        if len(value) > 16:
+            raise ValueError(
+                'Cannot initialize AES permutation state with more than '
+                '16 bytes')
+        self._value ^= int.from_bytes(value, byteorder='big') << (
+            8 * (16 - len(value)))
+
+    def to_bytes(self) -> bytes:
+        """Converts state into byte string of length 16."""
+        return self._value.to_bytes(16, byteorder='big')
+
+    def extract(self, number_of_bytes: int) -> bytes:
+        """Return the first ``number_of_bytes`` bytes of ``to_bytes()``."""
+        return (self._value >> (8 * (16 - number_of_bytes))).to_bytes(
+            number_of_bytes, byteorder='big')
+
+    def clone(self) -> 'AESPermutationState':
+        result = AESPermutationState()
+        result._value = self._value
+        return result
+
+
+class AESPermutation(F):
+    """Allow to evaluate AES-256 with the fixed key ``key`` as sponge f
+    function."""
+
+    def __init__(self, key: bytes):
+        if len(key) != 32:
+            raise ValueError('AES-256 key must be 32 bytes long')
+        self.b_bytes = 16
+        self._key_schedule = aes.aes_key_schedule(key)
+
+    def new_state(self) -> AESPermutationState:
+        """Create a new zeroed state object."""
+        return AESPermutationState()
+
+    def __call__(self, state: AESPermutationState):
+        """Apply function to the given state."""
+        v = state._value
+        s0, s1, s2, s3 = aes.aes_encrypt_words(
+            (v >> 96, (v >> 64) & _MASK_32, (v >> 32) & _MASK_32,
+             v & _MASK_32),
+            self._key_schedule)
+        state._value = (s0 << 96) | (s1 << 64) | (s2 << 32) | s3
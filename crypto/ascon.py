@@ -0,0 +1,293 @@
+"""
+Implements the Ascon permutation and the Ascon-AEAD128 and Ascon-Hash256
+algorithms as standardized in NIST SP 800-232, "Ascon-Based Lightweight
+Cryptography Standards for Constrained Devices", 2025. Available at
+https://doi.org/10.6028/NIST.SP.800-232
+
+The Ascon permutation acts on a 320-bit state of five 64-bit words, with
+12 rounds (Ascon-p[12]) or 8 rounds (Ascon-p[8]). Bytes are mapped to the
+words in little endian order. Ascon-Hash256 is a plain sponge over
+Ascon-p[12] with rate 64 bits and 10* padding, and is evaluated with
+``sponge_crypto.SpongeHash``. Ascon-AEAD128 additionally adds the key to
+the state during initialization and finalization, and is implemented on
+top of the same state and permutation.
+
+WARNING: These implementations are for educational purposes.
+         DO NOT use them for real-world applications!
+
+Copyright (c), Felix Fontein, 2020
+
+This file is BSD licensed under the Simplified BSD License
+(see https://opensource.org/licenses/BSD-2-Clause).
+"""
+
+import typing
+
+from . import padding
+from .sponge import F, State
+from .sponge_crypto import SpongeHash
+
+
+_MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+# Round constants c_0, ..., c_15; Ascon-p[rounds] uses the last ``rounds``
+ROUND_CONSTANTS = [
+    0x3c, 0x2d, 0x1e, 0x0f, 0xf0, 0xe1, 0xd2, 0xc3,
+    0xb4, 0xa5, 0x96, 0x87, 0x78, 0x69, 0x5a, 0x4b,
+]
+
+
+class AsconState(State):
+    """Represents the Ascon state as a list of five 64-bit words."""
+
+    _words: typing.List[int]
+
+    def __init__(self):
+        self.b = 320
+        self.b_bytes = 40
+        self._words = [0] * 5
+
+    def from_bytes(self, value: bytes):
+        """Incorporate bytes into state.
+
+        Can be between 0 and 40 bytes long."""
+        if len(value) > 40:
+            raise ValueError(
+                'Cannot initialize Ascon state with more than 40 bytes')
+        v = int.from_bytes(value, byteorder='little')
+        words = self._words
+        for i in range((len(value) + 7) // 8):
+            words[i] ^= (v >> (64 * i)) & _MASK_64
+
+    def to_bytes(self) -> bytes:
+        """Converts state into byte string of length 40."""
+        return b''.join([w.to_bytes(8, byteorder='little')
+                         for w in self._words])
+
+    def extract(self, number_of_bytes: int) -> bytes:
+        """Return the first ``number_of_bytes`` bytes of ``to_bytes()``."""
+        return b''.join([
+            w.to_bytes(8, byteorder='little')
+            for w in self._words[:(number_of_bytes + 7) // 8]
+        ])[:number_of_bytes]
+
+    def clone(self) -> 'AsconState':
+        result = AsconState()
+        result._words = list(self._words)
+        return result
+
+
+class AsconP(F):
+    """Allow to evaluate the Ascon permutation Ascon-p[rounds]."""
+
+    def __init__(self, rounds: int = 12):
+        if not 0 < rounds <= 16:
+            raise ValueError('Number of rounds must be between 1 and 16')
+        self.b = 320
+        self.b_bytes = 40
+        self.rounds = rounds
+        self._round_constants = ROUND_CONSTANTS[16 - rounds:]
+
+    def new_state(self) -> AsconState:
+        """Create a new zeroed state object."""
+        return AsconState()
+
+    def _permute(self, words: typing.List[int]):
+        """Apply the permutation in place to the list of words."""
+        x0, x1, x2, x3, x4 = words
+        for c in self._round_constants:
+            # Constant addition
+            x2 ^= c
+            # Substitution layer (bitsliced 5-bit S-box)
+            x0 ^= x4
+            x4 ^= x3
+            x2 ^= x1
+            t0 = x1 & ~x0
+            t1 = x2 & ~x1
+            t2 = x3 & ~x2
+            t3 = x4 & ~x3
+            t4 = x0 & ~x4
+            x0 ^= t1
+            x1 ^= t2
+            x2 ^= t3
+            x3 ^= t4
+            x4 ^= t0
+            x1 ^= x0
+            x0 ^= x4
+            x3 ^= x2
+            x2 ^= _MASK_64
+            # Linear diffusion layer; the rotations are combined from
+            # shifts, which are masked once
+            x0 = (x0 ^ (x0 >> 19) ^ (x0 << 45) ^
+                  (x0 >> 28) ^ (x0 << 36)) & _MASK_64
+            x1 = (x1 ^ (x1 >> 61) ^ (x1 << 3) ^
+                  (x1 >> 39) ^ (x1 << 25)) & _MASK_64
+            x2 = (x2 ^ (x2 >> 1) ^ (x2 << 63) ^
+                  (x2 >> 6) ^ (x2 << 58)) & _MASK_64
+            x3 = (x3 ^ (x3 >> 10) ^ (x3 << 54) ^
+                  (x3 >> 17) ^ (x3 << 47)) & _MASK_64
+            x4 = (x4 ^ (x4 >> 7) ^ (x4 << 57) ^
+                  (x4 >> 41) ^ (x4 << 23)) & _MASK_64
+        words[:] = x0, x1, x2, x3, x4
+
+    def __call__(self, state: AsconState):
+        """Apply function to the given state."""
+        self._permute(state._words)
+
+
+ASCON_P_12 = AsconP(12)
+ASCON_P_8 = AsconP(8)
+
+
+# ###################################################################
+# ## Ascon-Hash256
+
+ASCON_HASH256_IV = 0x0000080100cc0002
+
+# Rate of Ascon-Hash256 in bytes
+ASCON_HASH256_BLOCKSIZE = 8
+
+
+def ascon_hash256_sponge() -> SpongeHash:
+    """Create a sponge-based hash object for Ascon-Hash256.
+
+    The state is initialized by absorbing the IV into the zero state, which
+    yields ``Ascon-p[12](IV || 0^256)``."""
+    h = SpongeHash(ASCON_P_12,
+                   ASCON_HASH256_BLOCKSIZE,
+                   padding.add_10star_padding)
+    h.absorb(ASCON_HASH256_IV.to_bytes(8, byteorder='little'))
+    return h
+
+
+def ascon_hash256(msg: bytes) -> bytes:
+    """Evaluate Ascon-Hash256 on ``msg``."""
+    h = ascon_hash256_sponge()
+    h.final_absorb(msg)
+    return h.squeeze(32)
+
+
+# ###################################################################
+# ## Ascon-AEAD128
+
+ASCON_AEAD128_IV = 0x00001000808c0001
+
+# Rate of Ascon-AEAD128 in bytes
+ASCON_AEAD128_BLOCKSIZE = 16
+
+# Domain separation bit between associated data and plaintext
+_DOMAIN_SEPARATION = 1 << 63
+
+
+class AsconAEAD128:
+    """
+    Provides the Ascon-AEAD128 authenticated encryption with associated
+    data, with a 128-bit key, 128-bit nonce and 128-bit tag.
+    """
+
+    def _start(self,
+               key: bytes,
+               nonce: bytes,
+               header: bytes) -> typing.Tuple[AsconState, int, int]:
+        """Initialize the state and absorb the associated data."""
+        if len(key) != 16:
+            raise ValueError('Ascon-AEAD128 key must be 16 bytes long')
+        if len(nonce) != 16:
+            raise ValueError('Ascon-AEAD128 nonce must be 16 bytes long')
+        k0 = int.from_bytes(key[:8], byteorder='little')
+        k1 = int.from_bytes(key[8:], byteorder='little')
+        state = AsconState()
+        words = state._words
+        words[:] = [
+            ASCON_AEAD128_IV,
+            k0,
+            k1,
+            int.from_bytes(nonce[:8], byteorder='little'),
+            int.from_bytes(nonce[8:], byteorder='little'),
+        ]
+        ASCON_P_12(state)
+        words[3] ^= k0
+        words[4] ^= k1
+        if header:
+            header = padding.add_10star_padding(
+                header, ASCON_AEAD128_BLOCKSIZE)
+            for i in range(0, len(header), ASCON_AEAD128_BLOCKSIZE):
+                state.from_bytes(header[i:i + ASCON_AEAD128_BLOCKSIZE])
+                ASCON_P_8(state)
+        words[4] ^= _DOMAIN_SEPARATION
+        return state, k0, k1
+
+    def _finish(self, state: AsconState, k0: int, k1: int) -> bytes:
+        """Compute the tag."""
+        words = state._words
+        words[2] ^= k0
+        words[3] ^= k1
+        ASCON_P_12(state)
+        return ((words[3] ^ k0).to_bytes(8, byteorder='little') +
+                (words[4] ^ k1).to_bytes(8, byteorder='little'))
+
+    def encrypt_and_tag(self,
+                        key: bytes,
+                        nonce: bytes,
+                        header: bytes,
+                        data: bytes) -> typing.Tuple[bytes, bytes]:
+        """
+        Encrypt and tag a ``header`` and ``data`` with a private ``key``
+        and a ``nonce``, which must not be used twice with the same key.
+
+        Returns a tuple ``(ciphertext, tag)``, where ``ciphertext`` is the
+        encryption of ``data`` and where ``tag`` authenticates both ``header``
+        and ``data``.
+        """
+        state, k0, k1 = self._start(key, nonce, header)
+        blocksize = ASCON_AEAD128_BLOCKSIZE
+        end = len(data) - len(data) % blocksize
+        result = []
+        for i in range(0, end, blocksize):
+            state.from_bytes(data[i:i + blocksize])
+            result.append(state.extract(blocksize))
+            ASCON_P_8(state)
+        # The last block is padded, and can be empty
+        last = data[end:]
+        state.from_bytes(last + b'\x01')
+        result.append(state.extract(len(last)))
+        return b''.join(result), self._finish(state, k0, k1)
+
+    def decrypt_and_authenticate(self,
+                                 key: bytes,
+                                 nonce: bytes,
+                                 header: bytes,
+                                 encrypted_data: bytes,
+                                 tag: bytes) -> bytes:
+        """
+        Decrypted encrypted data ``encrypted_data`` and authenticate both
+        data and ``header`` with private key ``key``, nonce ``nonce`` and tag
+        ``tag``.
+
+        Returns the cleartext data on success, and raises an exception in case
+        the tag does not match.
+        """
+        state, k0, k1 = self._start(key, nonce, header)
+        blocksize = ASCON_AEAD128_BLOCKSIZE
+        data = encrypted_data
+        end = len(data) - len(data) % blocksize
+        words = state._words
+        result = []
+        for i in range(0, end, blocksize):
+            c0 = int.from_bytes(data[i:i + 8], byteorder='little')
+            c1 = int.from_bytes(data[i + 8:i + 16], byteorder='little')
+            result.append((words[0] ^ c0).to_bytes(8, byteorder='little'))
+            result.append((words[1] ^ c1).to_bytes(8, byteorder='little'))
+            words[0] = c0
+            words[1] = c1
+            ASCON_P_8(state)
+        # Decrypt the last block, then replace the state bytes by the
+        # ciphertext and add the padding
+        last = data[end:]
+        last_plain = bytes(a ^ b for a, b in zip(
+            last, state.extract(len(last))))
+        result.append(last_plain)
+        state.from_bytes(last_plain + b'\x01')
+        if tag != self._finish(state, k0, k1):
+            raise ValueError('Tag does not match!')
+        return b''.join(result)
@@ -0,0 +1,104 @@
+"""
+Implements a reseedable pseudo-random number generator based on the duplex
+sponge construction with Keccak-f[1600], as described in G. Bertoni,
+J. Daemen, M. Peeters, G. v. Assche: "Sponge-Based Pseudo-Random Number
+Generators", CHES 2010. Available at
+https://keccak.team/files/SpongePRNG.pdf
+
+Seeds are absorbed with duplex calls without output, and random bytes are
+squeezed with duplex calls without input. The output is served from a
+buffer (see ``utils.BufferedRandomSource``), and the generator is reseeded
+from ``os.urandom`` after a configurable amount of output and after forks.
+The generator can be used as random source of ``utils`` with
+``utils.set_random_source()``.
+
+WARNING: These implementations are for educational purposes.
+         DO NOT use them for real-world applications!
+
+Copyright (c), Felix Fontein, 2020
+
+This file is BSD licensed under the Simplified BSD License
+(see https://opensource.org/licenses/BSD-2-Clause).
+"""
+
+import os
+
+from . import keccak
+from . import padding
+from . import utils
+from .sponge import DuplexSponge
+
+
+KECCAK_F = keccak.KeccakF(6)
+
+# Rate of 1088 bits, i.e. capacity of 512 bits
+BLOCKSIZE = 1088 // 8
+
+SEED_SIZE = 64
+
+
+class SpongeDRBG(utils.BufferedRandomSource):
+    """
+    A duplex sponge based random generator.
+
+    If ``seed`` is not given, the generator is seeded from ``os.urandom``.
+    After every ``reseed_interval`` bytes of output, and in the child
+    process after a fork, fresh entropy from ``os.urandom`` is absorbed. If
+    ``reseed_interval`` is ``None``, the generator never reseeds itself and
+    its output only depends on the seed, on ``reseed()`` calls and on the
+    process IDs of the children after forks: a child absorbs its process
+    ID, so that it does not repeat the output of its parent. Note that a
+    child can repeat the output of an earlier child with the same process
+    ID.
+    """
+
+    def __init__(self,
+                 seed: bytes = None,
+                 reseed_interval: int = 1 << 20,
+                 buffer_size: int = 4096):
+        super().__init__(self._squeeze, buffer_size)
+        self._sponge = DuplexSponge(KECCAK_F,
+                                    BLOCKSIZE,
+                                    padding.add_10star1_padding)
+        self._reseed_interval = reseed_interval
+        self._output_since_reseed = 0
+        # Squeezed bytes not returned yet, so that the output stream does
+        # not depend on how it is read
+        self._leftover = b''
+        self._absorb(os.urandom(SEED_SIZE) if seed is None else seed)
+
+    def _absorb(self, data: bytes):
+        """Absorb data; one byte per block is needed for the padding."""
+        for i in range(0, max(len(data), 1), BLOCKSIZE - 1):
+            self._sponge.duplex(data[i:i + BLOCKSIZE - 1], 0)
+        self._output_since_reseed = 0
+        self._leftover = b''
+
+    def _squeeze(self, number_of_bytes: int) -> bytes:
+        """Generate fresh output; used to refill the buffer."""
+        if (self._reseed_interval is not None and
+                self._output_since_reseed >= self._reseed_interval):
+            self._absorb(os.urandom(SEED_SIZE))
+        result = [self._leftover]
+        for dummy in range(len(self._leftover), number_of_bytes, BLOCKSIZE):
+            result.append(self._sponge.duplex(b'', BLOCKSIZE))
+        self._output_since_reseed += number_of_bytes
+        output = b''.join(result)
+        self._leftover = output[number_of_bytes:]
+        return output[:number_of_bytes]
+
+    def _after_fork(self):
+        super()._after_fork()
+        if self._reseed_interval is not None:
+            self._absorb(os.urandom(SEED_SIZE))
+        else:
+            # Stay deterministic, but diverge from the parent
+            self._absorb(b'fork' + os.getpid().to_bytes(8, byteorder='big'))
+
+    def reseed(self, entropy: bytes = None):
+        """Absorb ``entropy``, or fresh entropy from ``os.urandom``.
+
+        Buffered output is discarded."""
+        with self._lock:
+            self._absorb(os.urandom(SEED_SIZE) if entropy is None else entropy)
+            self._discard()
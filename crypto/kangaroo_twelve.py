@@ -0,0 +1,210 @@
+"""
+Implements TurboSHAKE128, TurboSHAKE256 and KangarooTwelve (KT128) as
+described in RFC 9861. Both use Keccak-p[1600, 12], i.e. Keccak-f[1600]
+reduced to its last 12 rounds.
+
+KangarooTwelve splits its input into chunks of 8 KiB. All chunks but the
+first are hashed independently to 32-byte chaining values, which are
+absorbed in order into the final node together with the first chunk. The
+chunk hashes can be computed on a process pool.
+
+WARNING: These implementations are for educational purposes.
+         DO NOT use them for real-world applications!
+
+Copyright (c), Felix Fontein, 2020
+
+This file is BSD licensed under the Simplified BSD License
+(see https://opensource.org/licenses/BSD-2-Clause).
+"""
+
+import collections
+import concurrent.futures
+import typing
+import weakref
+
+from . import keccak
+from . import padding
+from . import sponge_crypto
+
+
+KECCAK_P_12 = keccak.KeccakF(6, rounds=12)
+
+CHUNK_SIZE = 8192
+
+# Number of chunks hashed per worker task
+_BATCH_CHUNKS = 32
+
+
+def _turboshake(blocksize: int,
+                msg: bytes,
+                domain: int,
+                result_bytes: int) -> bytes:
+    """Evaluate TurboSHAKE with rate ``blocksize`` bytes."""
+    if not 0x01 <= domain <= 0x7F:
+        raise ValueError('Domain separation byte must be in 0x01...0x7F')
+    h = sponge_crypto.SpongeHash(KECCAK_P_12,
+                                 blocksize,
+                                 padding.add_10star1_padding)
+    h.absorb(msg)
+    # The highest set bit of the domain byte is the first padding bit
+    bits = domain.bit_length() - 1
+    h.final_absorb(bytes([domain ^ (1 << bits)]), bits)
+    return h.squeeze(result_bytes)
+
+
+def turboshake128(msg: bytes, domain: int, result_bytes: int) -> bytes:
+    """Evaluate TurboSHAKE128 with domain separation byte ``domain``."""
+    return _turboshake(1344 // 8, msg, domain, result_bytes)
+
+
+def turboshake256(msg: bytes, domain: int, result_bytes: int) -> bytes:
+    """Evaluate TurboSHAKE256 with domain separation byte ``domain``."""
+    return _turboshake(1088 // 8, msg, domain, result_bytes)
+
+
+def length_encode(value: int) -> bytes:
+    """Encode a non-negative integer as in RFC 9861.
+
+    The minimal big endian encoding is followed by its length in bytes."""
+    encoded = value.to_bytes((value.bit_length() + 7) // 8, byteorder='big')
+    return encoded + bytes([len(encoded)])
+
+
+def _chaining_values(chunks: typing.List[bytes]) -> bytes:
+    """Hash leaf chunks; return the concatenated chaining values."""
+    return b''.join([turboshake128(chunk, 0x0B, 32) for chunk in chunks])
+
+
+class KangarooTwelve:
+    """
+    Incremental KangarooTwelve (KT128) with customization string.
+
+    Data is added with ``update()``; ``digest()`` returns the output for
+    the data added so far. If ``processes`` is larger than 1, the leaf
+    chunks are hashed on a process pool with that many workers, in batches
+    of several chunks. At most ``2 * processes`` batches are in flight at
+    once. The pool is released by ``close()``, when leaving a ``with``
+    block, or when the object is garbage collected.
+    """
+
+    def __init__(self,
+                 customization: bytes = b'',
+                 processes: int = 1):
+        self._customization = customization
+        self._processes = processes
+        self._executor = None
+        self._finalizer = None  # type: typing.Optional[weakref.finalize]
+        self._first = bytearray()
+        self._chunk = bytearray()
+        self._pending = []  # type: typing.List[bytes]
+        # Chaining values computed so far, and futures computing the next
+        # ones in order
+        self._cvs = []  # type: typing.List[bytes]
+        self._futures = collections.deque()  # type: typing.Deque[typing.Any]
+        self._chunk_count = 0
+
+    def __enter__(self) -> 'KangarooTwelve':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Wait for running chunk hashes and release the process pool.
+
+        A new pool is created if more data is added afterwards."""
+        self._drain(0)
+        if self._finalizer is not None:
+            self._finalizer()
+            self._finalizer = None
+            self._executor = None
+
+    def _drain(self, limit: int):
+        """Collect the oldest futures until at most ``limit`` are left."""
+        while len(self._futures) > limit:
+            self._cvs.append(self._futures.popleft().result())
+
+    def _flush(self):
+        """Hash the pending leaf chunks."""
+        if not self._pending:
+            return
+        if self._processes > 1:
+            if self._executor is None:
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self._processes)
+                self._finalizer = weakref.finalize(
+                    self, self._executor.shutdown, wait=False)
+            # Bound the number of batches (and their data) in flight
+            self._drain(2 * self._processes - 1)
+            self._futures.append(
+                self._executor.submit(_chaining_values, self._pending))
+        else:
+            self._cvs.append(_chaining_values(self._pending))
+        self._pending = []
+
+    def _add_chunk(self, chunk: bytes):
+        self._pending.append(chunk)
+        self._chunk_count += 1
+        if len(self._pending) >= _BATCH_CHUNKS:
+            self._flush()
+
+    def update(self, data: bytes):
+        """Add data to the hash."""
+        view = memoryview(data)
+        if len(self._first) < CHUNK_SIZE:
+            missing = CHUNK_SIZE - len(self._first)
+            self._first += view[:missing]
+            view = view[missing:]
+        if not view:
+            return
+        if self._chunk:
+            missing = CHUNK_SIZE - len(self._chunk)
+            self._chunk += view[:missing]
+            view = view[missing:]
+            if len(self._chunk) < CHUNK_SIZE:
+                return
+            self._add_chunk(bytes(self._chunk))
+            self._chunk = bytearray()
+        end = len(view) - len(view) % CHUNK_SIZE
+        for i in range(0, end, CHUNK_SIZE):
+            self._add_chunk(bytes(view[i:i + CHUNK_SIZE]))
+        self._chunk += view[end:]
+
+    def digest(self, result_bytes: int = 32) -> bytes:
+        """Return ``result_bytes`` bytes of output for the data added so far.
+
+        Does not change the state; more data can be added afterwards.
+        """
+        # Append the customization to copies of the unhashed data
+        suffix = (self._customization +
+                  length_encode(len(self._customization)))
+        first = bytes(self._first)
+        missing = CHUNK_SIZE - len(first)
+        first += suffix[:missing]
+        rest = bytes(self._chunk) + suffix[missing:]
+        last_chunks = [rest[i:i + CHUNK_SIZE]
+                       for i in range(0, len(rest), CHUNK_SIZE)]
+        chunk_count = self._chunk_count + len(last_chunks)
+        if chunk_count == 0:
+            # Single node
+            return turboshake128(first, 0x07, result_bytes)
+        self._drain(0)
+        final_node = b''.join([
+            first,
+            b'\x03\x00\x00\x00\x00\x00\x00\x00',
+        ] + self._cvs + [
+            _chaining_values(self._pending + last_chunks),
+            length_encode(chunk_count),
+            b'\xFF\xFF',
+        ])
+        return turboshake128(final_node, 0x06, result_bytes)
+
+
+def kangaroo_twelve(msg: bytes,
+                    customization: bytes = b'',
+                    result_bytes: int = 32,
+                    processes: int = 1) -> bytes:
+    """Evaluate KangarooTwelve (KT128) on ``msg``."""
+    with KangarooTwelve(customization, processes) as h:
+        h.update(msg)
+        return h.digest(result_bytes)
@@ -12,6 +12,8 @@ This file is BSD licensed under the Simplified BSD License
 (see https://opensource.org/licenses/BSD-2-Clause).
 """
 
+import struct
+
 from typing import List
 
 from .utils import ROL
@@ -19,56 +21,144 @@ from .utils import ROL
 from .sponge import State, F
 
 
+# struct format characters for little endian lanes of 8, 16, 32 and 64 bits
+_LANE_FORMATS = {3: 'B', 4: 'H', 5: 'I', 6: 'Q'}
+
+
+def _lane_struct(ell: int, count: int) -> struct.Struct:
+    """Return struct converting ``count`` little endian lanes at once."""
+    return struct.Struct('<{0}{1}'.format(count, _LANE_FORMATS[ell]))
+
+
+# For every ell with lane format, the structs converting 0 to 25 lanes;
+# shared by all states
+_LANE_STRUCTS = {
+    ell: [_lane_struct(ell, count) for count in range(26)]
+    for ell in _LANE_FORMATS
+}
+
+
 class KeccakFState(State):
-    """Represents the Keccak-f state split up into lanes."""
+    """Represents the Keccak-f state split up into lanes.
+
+    The lanes are stored in a flat list; lane ``(x, y)`` has index
+    ``x + 5 * y``, which is also the order of the lanes in the byte
+    representation of the state.
+    """
 
-    _lanes: List[List[int]]
+    _lanes: List[int]
 
     def __init__(self, ell: int = 6):
         assert ell >= 3  # we want 2 ** ell to be divisible by 8
         self.ell = ell
         self.b = 25 * 2 ** ell
         self.b_bytes = (self.b + 7) // 8
-        self._lanes = [[0] * 5 for _ in range(5)]
+        self._lane_length = 2 ** (self.ell - 3)
+        self._lanes = [0] * 25
+        # Convert all lanes with one (un)pack call if possible
+        self._structs = _LANE_STRUCTS.get(ell)
 
     def _add_to_state(self, state: bytes):
-        """Add bytes to state. Expects exactly self.b_bytes bytes."""
-        lane_length = 2 ** (self.ell - 3)
+        """Add bytes to state.
+
+        Expects a multiple of the lane length, at most self.b_bytes bytes.
+        """
+        lane_length = self._lane_length
+        lanes = self._lanes
+        if self._structs is not None:
+            values = self._structs[len(state) // lane_length].unpack(state)
+            for idx, v in enumerate(values):
+                lanes[idx] ^= v
+            return
         i = 0
-        for y in range(5):
-            for x in range(5):
-                # We now have i == (5 * y + x) * lane_length
-                v = int.from_bytes(state[i:i + lane_length],
-                                   byteorder='little')
-                self._lanes[x][y] ^= v
-                i += lane_length
+        for idx in range(len(state) // lane_length):
+            # We now have i == idx * lane_length
+            lanes[idx] ^= int.from_bytes(state[i:i + lane_length],
+                                         byteorder='little')
+            i += lane_length
 
     def from_bytes(self, value: bytes):
         """Incorporate bytes into state.
 
-        Can be between 0 and ``self.b_bytes`` bytes long."""
+        Can be between 0 and ``self.b_bytes`` bytes long. Only the lanes
+        covered by ``value`` are touched."""
         if len(value) > self.b_bytes:
             raise ValueError(
                 'Cannot initialize Keccak-f state with more '
                 'than {0} bytes'.format(self.b_bytes)
             )
-        if len(value) < self.b_bytes:
-            value = value + b'\x00' * (self.b_bytes - len(value))
+        missing = -len(value) % self._lane_length
+        if missing:
+            value = bytes(value) + b'\x00' * missing
         self._add_to_state(value)
 
     def to_bytes(self) -> bytes:
         """Converts state into byte string of length self.b_bytes."""
-        result = []
-        lane_length = 2 ** (self.ell - 3)
-        for y in range(5):
-            for x in range(5):
-                result.append(self._lanes[x][y].to_bytes(
-                    lane_length, byteorder='little'))
-        return b''.join(result)
+        return self.extract(self.b_bytes)
+
+    def extract(self, number_of_bytes: int) -> bytes:
+        """Return the first ``number_of_bytes`` bytes of ``to_bytes()``.
+
+        Only the lanes covering these bytes are converted."""
+        lane_length = self._lane_length
+        count = (number_of_bytes + lane_length - 1) // lane_length
+        if self._structs is not None:
+            result = self._structs[count].pack(*self._lanes[:count])
+        else:
+            result = b''.join([
+                lane.to_bytes(lane_length, byteorder='little')
+                for lane in self._lanes[:count]
+            ])
+        if len(result) > number_of_bytes:
+            result = result[:number_of_bytes]
+        return result
 
     def clone(self) -> 'KeccakFState':
         result = KeccakFState(self.ell)
-        result._lanes = [list(lanes) for lanes in self._lanes]
+        result._lanes = list(self._lanes)
+        return result
+
+
+class KeccakFIntState(State):
+    """Represents the Keccak-f state as a single integer.
+
+    The state is the little endian integer of its byte representation, so
+    lane ``(x, y)`` occupies the bits ``i * w`` to ``(i + 1) * w - 1``,
+    where ``i = x + 5 * y`` and ``w`` is the lane size.
+    """
+
+    _value: int
+
+    def __init__(self, ell: int = 6):
+        assert ell >= 3  # we want 2 ** ell to be divisible by 8
+        self.ell = ell
+        self.b = 25 * 2 ** ell
+        self.b_bytes = (self.b + 7) // 8
+        self._value = 0
+
+    def from_bytes(self, value: bytes):
+        """Incorporate bytes into state.
+
+        Can be between 0 and ``self.b_bytes`` bytes long."""
+        if len(value) > self.b_bytes:
+            raise ValueError(
+                'Cannot initialize Keccak-f state with more '
+                'than {0} bytes'.format(self.b_bytes)
+            )
+        self._value ^= int.from_bytes(value, byteorder='little')
+
+    def to_bytes(self) -> bytes:
+        """Converts state into byte string of length self.b_bytes."""
+        return self._value.to_bytes(self.b_bytes, byteorder='little')
+
+    def extract(self, number_of_bytes: int) -> bytes:
+        """Return the first ``number_of_bytes`` bytes of ``to_bytes()``."""
+        return (self._value & ((1 << (8 * number_of_bytes)) - 1)).to_bytes(
+            number_of_bytes, byteorder='little')
+
+    def clone(self) -> 'KeccakFIntState':
+        result = KeccakFIntState(self.ell)
+        result._value = self._value
         return result
 
 
@@ -107,22 +197,111 @@ def compute_rc(count):
     return result
 
 
+def compute_rho_offsets(ell: int) -> List[int]:
+    """Precompute the rotation offsets of Keccak-f's rho step.
+
+    Returns a flat list; the offset of lane ``(x, y)`` has index
+    ``x + 5 * y``.
+    """
+    t_matrix = compute_t_matrix()
+    result = [0] * 25
+    for x in range(5):
+        for y in range(5):
+            t = t_matrix[x][y]
+            result[x + 5 * y] = ((t + 1) * (t + 2) // 2) % (2 ** ell)
+    return result
+
+
+def compute_pi_map() -> List[int]:
+    """Precompute the lane permutation of Keccak-f's pi step.
+
+    Lane ``i`` is moved to lane ``result[i]`` (flat indices).
+    """
+    result = [0] * 25
+    for x in range(5):
+        for y in range(5):
+            result[(x + 3 * y) % 5 + 5 * x] = x + 5 * y
+    return result
+
+
+def compute_round_constants(ell: int, rounds: int) -> List[int]:
+    """Precompute the lane values XORed in by Keccak-f's iota step."""
+    rc = compute_rc(ell + 7 * rounds + 1)
+    result = []
+    for i in range(rounds):
+        value = 0
+        for j in range(ell + 1):
+            if rc[j + 7 * i]:
+                value |= 1 << ((1 << j) - 1)
+        result.append(value)
+    return result
+
+
 class KeccakF(F):
-    """Allow to evaluate Keccak-f."""
-    def __init__(self, ell: int = 6):
+    """Allow to evaluate Keccak-f.
+
+    Three engines are available: ``'reference'`` evaluates the step
+    functions theta, rho, pi, chi and iota one after another on a 5x5
+    list of lanes, as in the specification. ``'lanes'`` works in place on
+    the flat lane list, computes the column parities only once per round,
+    and uses precomputed rotation offsets, lane permutation and round
+    constants. ``'bigint'`` stores the whole state in one integer
+    (``KeccakFIntState``) and evaluates every step with a few whole-state
+    shifts and masks. If no engine is specified, the fastest one for the
+    lane size is used (see ``DEFAULT_ENGINES``).
+
+    If ``rounds`` is given, only the last ``rounds`` of the ``12 + 2 * ell``
+    rounds are applied; this is the permutation Keccak-p[b, rounds].
+    """
+    ENGINES = ('lanes', 'bigint', 'reference')
+
+    # Fastest engine per ell, as measured with benchmark_keccak.py
+    DEFAULT_ENGINES = {
+        3: 'bigint',
+        4: 'bigint',
+        5: 'bigint',
+        6: 'bigint',
+    }
+
+    def __init__(self, ell: int = 6, engine: str = None, rounds: int = None):
         assert ell >= 3  # we want 2 ** ell to be divisible by 8
+        if engine is None:
+            engine = self.DEFAULT_ENGINES.get(ell, 'lanes')
+        if engine not in self.ENGINES:
+            raise ValueError('Unknown Keccak-f engine {0}'.format(engine))
         self.ell = ell
+        self.engine = engine
         self._2ell = 2 ** ell
         self._2ell_mask = self._2ell - 1
+        self._lane_mask = (1 << self._2ell) - 1
         self.b = 25 * self._2ell
         self.b_bytes = (self.b + 7) // 8
         self.n = 12 + 2 * ell
+        if rounds is None:
+            rounds = self.n
+        if not 0 < rounds <= self.n:
+            raise ValueError('Number of rounds must be between 1 and '
+                             '{0}'.format(self.n))
+        self.rounds = rounds
         self._rc = compute_rc(self.ell + 7 * self.n + 1)
         self._t = compute_t_matrix()
+        self._rho_offsets = compute_rho_offsets(ell)
+        self._pi_map = compute_pi_map()
+        self._round_constants = compute_round_constants(
+            ell, self.n)[self.n - rounds:]
+        if engine == 'bigint':
+            self._state_class = KeccakFIntState
+            self._init_bigint()
+        else:
+            self._state_class = KeccakFState
+
+    def new_state(self) -> State:
+        """Create a new zeroed state object.
 
-    def new_state(self) -> KeccakFState:
-        """Create a new zeroed state object."""
-        return KeccakFState(self.ell)
+        For the ``'bigint'`` engine, this is a ``KeccakFIntState``,
+        otherwise a ``KeccakFState``.
+        """
+        return self._state_class(self.ell)
 
     def _theta(self, lanes: List[List[int]]):
         result = [[None] * 5 for _ in range(5)]
@@ -172,14 +351,147 @@ class KeccakF(F):
                 lanes[0][0] ^= 1 << bit_idx
         return lanes
 
-    def __call__(self, state: KeccakFState):
-        """Apply function to the given state."""
-        assert self.b == state.b
-        lanes = state._lanes
-        for i in range(self.n):
+    def _permute_reference(self, flat_lanes: List[int]):
+        """Apply Keccak-f step by step to the flat lane list."""
+        lanes = [[flat_lanes[x + 5 * y] for y in range(5)] for x in range(5)]
+        for i in range(self.n - self.rounds, self.n):
             lanes = self._theta(lanes)
             lanes = self._rho(lanes)
             lanes = self._pi(lanes)
             lanes = self._chi(lanes)
             lanes = self._iota(lanes, i)
-        state._lanes = lanes
+        for x in range(5):
+            for y in range(5):
+                flat_lanes[x + 5 * y] = lanes[x][y]
+
+    def _permute_lanes(self, A: List[int]):
+        """Apply Keccak-f in place to the flat lane list ``A``."""
+        w = self._2ell
+        mask = self._lane_mask
+        rho = self._rho_offsets
+        pi = self._pi_map
+        B = [0] * 25
+        for rc in self._round_constants:
+            # theta: compute column parities once
+            c0 = A[0] ^ A[5] ^ A[10] ^ A[15] ^ A[20]
+            c1 = A[1] ^ A[6] ^ A[11] ^ A[16] ^ A[21]
+            c2 = A[2] ^ A[7] ^ A[12] ^ A[17] ^ A[22]
+            c3 = A[3] ^ A[8] ^ A[13] ^ A[18] ^ A[23]
+            c4 = A[4] ^ A[9] ^ A[14] ^ A[19] ^ A[24]
+            D = (
+                c4 ^ (((c1 << 1) | (c1 >> (w - 1))) & mask),
+                c0 ^ (((c2 << 1) | (c2 >> (w - 1))) & mask),
+                c1 ^ (((c3 << 1) | (c3 >> (w - 1))) & mask),
+                c2 ^ (((c4 << 1) | (c4 >> (w - 1))) & mask),
+                c3 ^ (((c0 << 1) | (c0 >> (w - 1))) & mask),
+            )
+            # theta, rho and pi
+            for i in range(25):
+                v = A[i] ^ D[i % 5]
+                r = rho[i]
+                B[pi[i]] = ((v << r) | (v >> (w - r))) & mask
+            # chi
+            for y in range(0, 25, 5):
+                b0, b1, b2, b3, b4 = B[y:y + 5]
+                A[y] = b0 ^ (~b1 & b2)
+                A[y + 1] = b1 ^ (~b2 & b3)
+                A[y + 2] = b2 ^ (~b3 & b4)
+                A[y + 3] = b3 ^ (~b4 & b0)
+                A[y + 4] = b4 ^ (~b0 & b1)
+            # iota
+            A[0] ^= rc
+
+    def _init_bigint(self):
+        """Precompute masks for the ``'bigint'`` engine."""
+        w = self._2ell
+        lane = self._lane_mask
+        row = (1 << (5 * w)) - 1
+        # Bit 0 of every lane of a row, and everything else
+        row_low = sum(1 << (x * w) for x in range(5))
+        self._int_row_mask = row
+        self._int_row_low = row_low
+        self._int_row_high = row ^ row_low
+        # Multiplying a row by this replicates it to all five rows
+        self._int_row_replicate = sum(1 << (5 * w * y) for y in range(5))
+        # Lanes with x == 4 and lanes with x < 4
+        last = sum(lane << ((4 + 5 * y) * w) for y in range(5))
+        self._int_x4 = last
+        self._int_x_not4 = ((1 << (25 * w)) - 1) ^ last
+        self._int_x34 = last | (last >> w)
+        self._int_x_not34 = ((1 << (25 * w)) - 1) ^ self._int_x34
+        # rho and pi: every bit of the state is moved by a fixed distance.
+        # Collect the destination masks of all bits moved by the same
+        # distance, so that each distance costs one shift and one mask.
+        lane_moves = {}
+
+        def add_move(distance: int, mask: int):
+            lane_moves[distance] = lane_moves.get(distance, 0) | mask
+
+        for i in range(25):
+            r = self._rho_offsets[i]
+            dst = self._pi_map[i] * w
+            # bits which stay in their lane when rotating by r...
+            high = ((lane << r) & lane) << dst
+            add_move((self._pi_map[i] - i) * w + r, high)
+            # ...and bits which wrap around
+            if r:
+                add_move((self._pi_map[i] - i) * w + r - w,
+                         (lane << dst) ^ high)
+        self._int_rho_pi_left = [
+            (distance, mask)
+            for distance, mask in sorted(lane_moves.items()) if distance >= 0
+        ]
+        self._int_rho_pi_right = [
+            (-distance, mask)
+            for distance, mask in sorted(lane_moves.items()) if distance < 0
+        ]
+
+    def _permute_bigint(self, A: int) -> int:
+        """Apply Keccak-f to the state given as one integer."""
+        w = self._2ell
+        w4 = 4 * w
+        row = self._int_row_mask
+        row_low = self._int_row_low
+        row_high = self._int_row_high
+        replicate = self._int_row_replicate
+        x4 = self._int_x4
+        x_not4 = self._int_x_not4
+        x34 = self._int_x34
+        x_not34 = self._int_x_not34
+        rho_pi_left = self._int_rho_pi_left
+        rho_pi_right = self._int_rho_pi_right
+        for rc in self._round_constants:
+            # theta: fold rows to get the column parities C[x]
+            C = A ^ (A >> (10 * w))
+            C ^= C >> (5 * w)
+            C = (C ^ (A >> (20 * w))) & row
+            # C[x - 1] and C[x + 1] rotated by one bit
+            C_left = ((C << w) | (C >> w4)) & row
+            C_right = ((C >> w) | (C << w4)) & row
+            C_right = (((C_right << 1) & row_high) |
+                       ((C_right >> (w - 1)) & row_low))
+            A ^= (C_left ^ C_right) * replicate
+            # rho and pi
+            B = 0
+            for distance, mask in rho_pi_left:
+                B |= (A << distance) & mask
+            for distance, mask in rho_pi_right:
+                B |= (A >> distance) & mask
+            # chi: B[x + 1] and B[x + 2] by rotating every row by lanes
+            B1 = ((B >> w) & x_not4) | ((B << w4) & x4)
+            B2 = ((B >> (2 * w)) & x_not34) | ((B << (3 * w)) & x34)
+            A = B ^ (~B1 & B2)
+            # iota
+            A ^= rc
+        return A
+
+    def __call__(self, state: State):
+        """Apply function to the given state."""
+        assert self.b == state.b
+        assert isinstance(state, self._state_class)
+        if self.engine == 'lanes':
+            self._permute_lanes(state._lanes)
+        elif self.engine == 'bigint':
+            state._value = self._permute_bigint(state._value)
+        else:
+            self._permute_reference(state._lanes)
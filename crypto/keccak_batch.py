@@ -0,0 +1,151 @@
+"""
+Implements Keccak-f[1600] for many independent states at once with NumPy,
+and SHA-3 / SHAKE functions hashing many messages at once.
+
+The states are stored as a ``(25, N)`` array of 64-bit lanes; lane
+``(x, y)`` has index ``x + 5 * y``. Every step of the permutation is one
+vectorized operation over all N states. Messages are grouped by their
+number of padded blocks, so that all messages of a group can be absorbed
+together.
+
+NumPy is an optional dependency; ``HAS_NUMPY`` tells whether it is
+available.
+
+WARNING: These implementations are for educational purposes.
+         DO NOT use them for real-world applications!
+
+Copyright (c), Felix Fontein, 2020
+
+This file is BSD licensed under the Simplified BSD License
+(see https://opensource.org/licenses/BSD-2-Clause).
+"""
+
+import typing
+
+from . import keccak
+from . import padding
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+_RHO_OFFSETS = keccak.compute_rho_offsets(6)
+_PI_MAP = keccak.compute_pi_map()
+_ROUND_CONSTANTS = keccak.compute_round_constants(6, 24)
+
+
+def _require_numpy():
+    if not HAS_NUMPY:
+        raise ImportError('NumPy is required for batched Keccak-f')
+
+
+def keccak_f_1600_many(lanes: 'np.ndarray'):
+    """Apply Keccak-f[1600] in place to a ``(25, N)`` uint64 lane array.
+
+    The array must be C-contiguous, since the permutation works on views
+    of it; raises ``ValueError`` otherwise."""
+    _require_numpy()
+    if lanes.ndim != 2 or lanes.shape[0] != 25 or lanes.dtype != np.uint64:
+        raise ValueError('Lanes must be a (25, N) uint64 array')
+    if not lanes.flags.c_contiguous:
+        raise ValueError('Lanes must be a C-contiguous array')
+    left = np.array(_RHO_OFFSETS, dtype=np.uint64).reshape(25, 1)
+    right = np.array([(64 - r) % 64 for r in _RHO_OFFSETS],
+                     dtype=np.uint64).reshape(25, 1)
+    one = np.uint64(1)
+    sixty_three = np.uint64(63)
+    A = lanes.reshape(5, 5, -1)  # indexed by y, x
+    B = np.empty_like(lanes)
+    B5 = B.reshape(5, 5, -1)
+    for rc in _ROUND_CONSTANTS:
+        # theta
+        C = np.bitwise_xor.reduce(A, axis=0)
+        C_right = np.roll(C, -1, axis=0)
+        A ^= np.roll(C, 1, axis=0) ^ ((C_right << one) |
+                                      (C_right >> sixty_three))
+        # rho and pi
+        B[_PI_MAP] = (lanes << left) | (lanes >> right)
+        # chi
+        A[...] = B5 ^ (~np.roll(B5, -1, axis=1) & np.roll(B5, -2, axis=1))
+        # iota
+        lanes[0] ^= np.uint64(rc)
+
+
+def _sponge_many(messages: typing.Sequence[bytes],
+                 blocksize: int,
+                 suffix: bytes,
+                 suffix_bits: int,
+                 result_bytes: int) -> typing.List[bytes]:
+    """Hash many messages with the Keccak-f[1600] sponge."""
+    _require_numpy()
+    rate_lanes = blocksize // 8
+    # Group messages by number of blocks after padding
+    groups = {}  # type: typing.Dict[int, typing.List[int]]
+    padded = []
+    for index, msg in enumerate(messages):
+        data = padding.add_10star1_padding(
+            msg + suffix, blocksize, len(msg) * 8 + suffix_bits)
+        padded.append(data)
+        groups.setdefault(len(data) // blocksize, []).append(index)
+
+    result = [None] * len(messages)  # type: typing.List[bytes]
+    for blocks, indices in groups.items():
+        words = np.frombuffer(
+            b''.join([padded[index] for index in indices]),
+            dtype='<u8').astype(np.uint64).reshape(
+                len(indices), blocks, rate_lanes)
+        state = np.zeros((25, len(indices)), dtype=np.uint64)
+        for j in range(blocks):
+            state[:rate_lanes] ^= words[:, j, :].T
+            keccak_f_1600_many(state)
+        output = []
+        output_len = 0
+        while True:
+            output.append(state[:rate_lanes].T.astype('<u8'))
+            output_len += blocksize
+            if output_len >= result_bytes:
+                break
+            keccak_f_1600_many(state)
+        digests = np.concatenate(output, axis=1).tobytes()
+        row = output_len
+        for i, index in enumerate(indices):
+            result[index] = digests[i * row:i * row + result_bytes]
+    return result
+
+
+def _create_hash_many(blocksize: int, result_bits: int
+                      ) -> typing.Callable[[typing.Sequence[bytes]],
+                                           typing.List[bytes]]:
+    """Create batched hash function based on Keccak-f[1600]."""
+    blocksize = blocksize // 8
+    result_bytes = result_bits // 8
+
+    def f(messages: typing.Sequence[bytes]) -> typing.List[bytes]:
+        return _sponge_many(messages, blocksize, b'\x02', 2, result_bytes)
+
+    return f
+
+
+def _create_shake_many(blocksize: int
+                       ) -> typing.Callable[[typing.Sequence[bytes], int],
+                                            typing.List[bytes]]:
+    """Create batched extendable output function based on Keccak-f[1600]."""
+    blocksize = blocksize // 8
+
+    def f(messages: typing.Sequence[bytes],
+          result_bytes: int) -> typing.List[bytes]:
+        return _sponge_many(messages, blocksize, b'\x0F', 4, result_bytes)
+
+    return f
+
+
+sha_3_224_many = _create_hash_many(1152, 224)
+sha_3_256_many = _create_hash_many(1088, 256)
+sha_3_384_many = _create_hash_many(832, 384)
+sha_3_512_many = _create_hash_many(576, 512)
+
+shake128_many = _create_shake_many(1344)
+shake256_many = _create_shake_many(1088)
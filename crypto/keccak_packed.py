@@ -0,0 +1,180 @@
+"""
+Implements Keccak-f for several independent states at once by packing
+them into the lanes (SIMD within a register).
+
+Every packed lane consists of one slot per instance; slot ``j`` of lane
+``i`` holds lane ``i`` of instance ``j`` in bits ``j * w`` to
+``(j + 1) * w - 1``, where ``w`` is the lane size. XOR, AND and NOT act on
+all slots at once; lane rotations are done with per-slot masks. One
+permutation call thus advances all instances. By default, as many
+instances as fit into 64 bits are packed (8 for Keccak-f[200], 4 for
+Keccak-f[400] and 2 for Keccak-f[800]), but since Python integers are
+unbounded, more instances can be packed as well.
+
+The packed permutation does not implement the ``sponge.F`` interface,
+since one call advances all instances together, and thus cannot be passed
+to ``SpongeHash``, ``DuplexSponge`` or ``SpongeAEAD``. Sponge constructions
+have to drive all instances in lockstep, with ``from_bytes_many()`` and
+``extract_many()`` per step; see ``sponge_parallel`` for an example.
+
+WARNING: These implementations are for educational purposes.
+         DO NOT use them for real-world applications!
+
+Copyright (c), Felix Fontein, 2020
+
+This file is BSD licensed under the Simplified BSD License
+(see https://opensource.org/licenses/BSD-2-Clause).
+"""
+
+import typing
+
+from . import keccak
+
+
+class KeccakFPackedState:
+    """Represents several Keccak-f states packed into 25 lanes."""
+
+    _lanes: typing.List[int]
+
+    def __init__(self, ell: int, instances: int):
+        assert ell >= 3  # we want 2 ** ell to be divisible by 8
+        self.ell = ell
+        self.instances = instances
+        self.b = 25 * 2 ** ell
+        self.b_bytes = (self.b + 7) // 8
+        self._lane_length = 2 ** (ell - 3)
+        self._lanes = [0] * 25
+
+    def from_bytes_many(self, values: typing.Sequence[bytes]):
+        """Incorporate bytes into the states via XOR.
+
+        ``values[j]`` is XORed into instance ``j``; it can be between 0
+        and ``self.b_bytes`` bytes long. There can be fewer values than
+        instances."""
+        assert len(values) <= self.instances
+        lane_length = self._lane_length
+        blocks = []
+        for value in values:
+            if len(value) > self.b_bytes:
+                raise ValueError(
+                    'Cannot initialize Keccak-f state with more '
+                    'than {0} bytes'.format(self.b_bytes)
+                )
+            blocks.append(bytes(value) +
+                          b'\x00' * (self.b_bytes - len(value)))
+        lanes = self._lanes
+        for i in range(25):
+            start = i * lane_length
+            # The slots of a packed lane are the instance lanes in order
+            lanes[i] ^= int.from_bytes(
+                b''.join([block[start:start + lane_length]
+                          for block in blocks]),
+                byteorder='little')
+
+    def extract_many(self, number_of_bytes: int) -> typing.List[bytes]:
+        """Return the first ``number_of_bytes`` bytes of every state."""
+        lane_length = self._lane_length
+        count = (number_of_bytes + lane_length - 1) // lane_length
+        packed = [lane.to_bytes(lane_length * self.instances,
+                                byteorder='little')
+                  for lane in self._lanes[:count]]
+        result = []
+        for j in range(self.instances):
+            start = j * lane_length
+            result.append(b''.join([
+                lane[start:start + lane_length] for lane in packed
+            ])[:number_of_bytes])
+        return result
+
+    def to_bytes_many(self) -> typing.List[bytes]:
+        """Convert every state into a byte string of length self.b_bytes."""
+        return self.extract_many(self.b_bytes)
+
+    def clone(self) -> 'KeccakFPackedState':
+        """Create copy of this state."""
+        result = KeccakFPackedState(self.ell, self.instances)
+        result._lanes = list(self._lanes)
+        return result
+
+
+class KeccakFPacked:
+    """Allow to evaluate Keccak-f on several packed instances at once.
+
+    Produces the same results as ``keccak.KeccakF(ell)`` applied to every
+    instance separately. This is not a ``sponge.F``; see the module
+    documentation.
+    """
+
+    def __init__(self, ell: int, instances: int = None):
+        assert ell >= 3  # we want 2 ** ell to be divisible by 8
+        w = 2 ** ell
+        if instances is None:
+            instances = max(1, 64 // w)
+        self.ell = ell
+        self.instances = instances
+        self.b = 25 * w
+        self.b_bytes = (self.b + 7) // 8
+        self.n = 12 + 2 * ell
+        self._w = w
+        lane = (1 << w) - 1
+        # Multiplying a single lane value by this copies it into all slots
+        replicate = sum(1 << (j * w) for j in range(instances))
+        self._replicate = replicate
+
+        def rotation_masks(r: int) -> typing.Tuple[int, int]:
+            # Bits which stay in their slot when shifting left by r,
+            # and bits which wrap around
+            high = ((lane << r) & lane) * replicate
+            return high, (lane * replicate) ^ high
+
+        self._theta_masks = rotation_masks(1)
+        self._rho = []  # type: typing.List[typing.Tuple[int, int, int, int]]
+        for r in keccak.compute_rho_offsets(ell):
+            high, low = rotation_masks(r)
+            self._rho.append((r, (w - r) % w, high, low))
+        self._pi_map = keccak.compute_pi_map()
+        self._round_constants = [
+            rc * replicate
+            for rc in keccak.compute_round_constants(ell, self.n)
+        ]
+
+    def new_state(self) -> KeccakFPackedState:
+        """Create a new zeroed packed state object."""
+        return KeccakFPackedState(self.ell, self.instances)
+
+    def _permute(self, A: typing.List[int]):
+        """Apply Keccak-f in place to all instances of the lane list."""
+        w1 = self._w - 1
+        theta_high, theta_low = self._theta_masks
+        rho = self._rho
+        pi = self._pi_map
+        B = [0] * 25
+        for rc in self._round_constants:
+            # theta
+            C = [A[x] ^ A[x + 5] ^ A[x + 10] ^ A[x + 15] ^ A[x + 20]
+                 for x in range(5)]
+            D = [C[(x + 4) % 5] ^ (((C[(x + 1) % 5] << 1) & theta_high) |
+                                   ((C[(x + 1) % 5] >> w1) & theta_low))
+                 for x in range(5)]
+            # theta, rho and pi
+            for i in range(25):
+                v = A[i] ^ D[i % 5]
+                left, right, high, low = rho[i]
+                if left:
+                    v = ((v << left) & high) | ((v >> right) & low)
+                B[pi[i]] = v
+            # chi
+            for y in range(0, 25, 5):
+                b0, b1, b2, b3, b4 = B[y:y + 5]
+                A[y] = b0 ^ (~b1 & b2)
+                A[y + 1] = b1 ^ (~b2 & b3)
+                A[y + 2] = b2 ^ (~b3 & b4)
+                A[y + 3] = b3 ^ (~b4 & b0)
+                A[y + 4] = b4 ^ (~b0 & b1)
+            # iota
+            A[0] ^= rc
+
+    def __call__(self, state: KeccakFPackedState):
+        """Apply function to all instances of the given packed state."""
+        assert self.b == state.b and self.instances == state.instances
+        self._permute(state._lanes)
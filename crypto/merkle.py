@@ -0,0 +1,305 @@
+"""
+Implements binary hash trees (Merkle trees) over SHA-2-256 or SHA-3-256.
+
+Leaves are hashed as ``H(0x00 || data)``, inner nodes as
+``H(0x01 || left || right)`` (for SHA-2-256 with the fast path
+``sha2.sha_2_256_tree_node``), as in RFC 6962, so that no leaf input can
+be mistaken for an inner node input. If a level has an odd number of
+nodes, the last node is promoted to the next level unchanged. Every level
+is stored as one ``bytearray`` of concatenated 32-byte digests.
+
+Building the tree can be distributed over a process pool, which is shared
+by all levels. Changing a leaf only recomputes the O(log n) nodes on the
+path to the root.
+
+WARNING: These implementations are for educational purposes.
+         DO NOT use them for real-world applications!
+
+Copyright (c), Felix Fontein, 2020
+
+This file is BSD licensed under the Simplified BSD License
+(see https://opensource.org/licenses/BSD-2-Clause).
+"""
+
+import concurrent.futures
+import typing
+
+from . import sha2
+from . import sha3
+
+
+DIGEST_SIZE = 32
+
+_LEAF_PREFIX = b'\x00'
+_NODE_PREFIX = b'\x01'
+
+
+def _sha_3_256_node(left: bytes, right: bytes) -> bytes:
+    return sha3.sha_3_256(_NODE_PREFIX + left + right)
+
+
+_HASH_FUNCTIONS = {
+    'sha_2_256': (sha2.sha_2_256, sha2.sha_2_256_tree_node),
+    'sha_3_256': (sha3.sha_3_256, _sha_3_256_node),
+}
+
+# Minimal number of items per worker task; smaller inputs are hashed
+# in-process since the pool overhead would dominate
+_MIN_CHUNK_SIZE = 256
+
+
+def _get_hash_functions(hash_name: str):
+    if hash_name not in _HASH_FUNCTIONS:
+        raise ValueError('Unknown hash function {0}'.format(hash_name))
+    return _HASH_FUNCTIONS[hash_name]
+
+
+def _hash_leaves(hash_name: str, leaves: typing.List[bytes]) -> bytes:
+    """Hash a list of leaves; return the concatenated digests."""
+    h = _HASH_FUNCTIONS[hash_name][0]
+    return b''.join([h(_LEAF_PREFIX + leaf) for leaf in leaves])
+
+
+def _hash_level(hash_name: str, level: bytes) -> bytes:
+    """Compute the next level from concatenated digests of a level."""
+    node = _HASH_FUNCTIONS[hash_name][1]
+    result = []
+    end = len(level) - len(level) % (2 * DIGEST_SIZE)
+    for i in range(0, end, 2 * DIGEST_SIZE):
+        result.append(node(level[i:i + DIGEST_SIZE],
+                           level[i + DIGEST_SIZE:i + 2 * DIGEST_SIZE]))
+    if end < len(level):
+        # Promote unpaired node
+        result.append(level[end:])
+    return b''.join(result)
+
+
+def _level_sizes(leaf_count: int) -> typing.List[int]:
+    """Return the number of nodes of every level, starting with the leaves."""
+    assert leaf_count > 0
+    result = [leaf_count]
+    while result[-1] > 1:
+        result.append((result[-1] + 1) // 2)
+    return result
+
+
+class MerkleTree:
+    """
+    A binary hash tree over a list of byte strings.
+
+    ``hash_name`` is ``'sha_2_256'`` or ``'sha_3_256'``. If ``processes``
+    is larger than 1, large levels are hashed on a process pool with that
+    many workers.
+    """
+
+    def __init__(self,
+                 leaves: typing.Sequence[bytes],
+                 hash_name: str = 'sha_2_256',
+                 processes: int = 1):
+        if not leaves:
+            raise ValueError('Merkle tree needs at least one leaf')
+        self._leaf_hash, self._node_hash = _get_hash_functions(hash_name)
+        self.hash_name = hash_name
+        self.leaf_count = len(leaves)
+        self._processes = processes
+        self._levels = []  # type: typing.List[bytearray]
+        self._build(leaves)
+
+    def _map(self,
+             executor: typing.Optional[concurrent.futures.Executor],
+             function,
+             items: typing.Sequence,
+             chunk_size: int) -> bytes:
+        """Apply ``function`` to chunks of ``items``, in parallel if an
+        executor is given and ``items`` is large enough.
+
+        ``chunk_size`` must be even, so that no pair is split.
+        """
+        if executor is None or len(items) < 2 * chunk_size:
+            return function(self.hash_name, items)
+        chunks = [items[i:i + chunk_size]
+                  for i in range(0, len(items), chunk_size)]
+        return b''.join(executor.map(
+            function, [self.hash_name] * len(chunks), chunks))
+
+    def _chunk_size(self, count: int) -> int:
+        chunk_size = max(_MIN_CHUNK_SIZE,
+                         count // (4 * max(self._processes, 1)))
+        return chunk_size + (chunk_size & 1)
+
+    def _build(self, leaves: typing.Sequence[bytes]):
+        chunk_size = self._chunk_size(len(leaves))
+        executor = None
+        if self._processes > 1 and len(leaves) >= 2 * chunk_size:
+            # One pool for all levels which are large enough
+            executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self._processes)
+        try:
+            level = self._map(executor, _hash_leaves, list(leaves),
+                              chunk_size)
+            self._levels = [bytearray(level)]
+            while len(level) > DIGEST_SIZE:
+                count = len(level) // DIGEST_SIZE
+                # Chunk concatenated digests at even node boundaries
+                level = self._map(executor, _hash_level, level,
+                                  self._chunk_size(count) * DIGEST_SIZE)
+                self._levels.append(bytearray(level))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def _get(self, level: int, index: int) -> bytes:
+        start = index * DIGEST_SIZE
+        return bytes(self._levels[level][start:start + DIGEST_SIZE])
+
+    def _set(self, level: int, index: int, value: bytes):
+        start = index * DIGEST_SIZE
+        self._levels[level][start:start + DIGEST_SIZE] = value
+
+    def _recompute(self, level: int, index: int):
+        """Recompute node ``index`` of level ``level`` from its children."""
+        children = len(self._levels[level - 1]) // DIGEST_SIZE
+        if 2 * index + 1 < children:
+            value = self._node_hash(self._get(level - 1, 2 * index),
+                                    self._get(level - 1, 2 * index + 1))
+        else:
+            value = self._get(level - 1, 2 * index)
+        self._set(level, index, value)
+
+    @property
+    def root(self) -> bytes:
+        """The root hash of the tree."""
+        return self._get(len(self._levels) - 1, 0)
+
+    def leaf_hash(self, index: int) -> bytes:
+        """Return the hash of leaf ``index``."""
+        return self._get(0, index)
+
+    def update(self, index: int, data: bytes):
+        """Replace leaf ``index`` and recompute the path to the root."""
+        self.update_many({index: data})
+
+    def update_many(self, changes: typing.Mapping[int, bytes]):
+        """Replace several leaves given as mapping from index to data.
+
+        Nodes shared by the paths of several changed leaves are only
+        recomputed once. If an index is out of range, the tree is not
+        changed.
+        """
+        changes = dict(changes)
+        for index in changes:
+            if not 0 <= index < self.leaf_count:
+                raise IndexError('Leaf index out of range')
+        for index, data in changes.items():
+            self._set(0, index, self._leaf_hash(_LEAF_PREFIX + data))
+        indices = set(changes)
+        for level in range(1, len(self._levels)):
+            indices = {index // 2 for index in indices}
+            for index in sorted(indices):
+                self._recompute(level, index)
+
+    def proof(self, index: int) -> typing.List[bytes]:
+        """Return the inclusion proof for leaf ``index``.
+
+        The proof is the list of sibling hashes from the leaf level
+        upwards; levels where the node has no sibling are skipped.
+        """
+        if not 0 <= index < self.leaf_count:
+            raise IndexError('Leaf index out of range')
+        result = []
+        for level in range(len(self._levels) - 1):
+            sibling = index ^ 1
+            if sibling < len(self._levels[level]) // DIGEST_SIZE:
+                result.append(self._get(level, sibling))
+            index //= 2
+        return result
+
+    def proofs(self, indices: typing.Iterable[int]
+               ) -> typing.List[typing.List[bytes]]:
+        """Return the inclusion proofs for several leaves."""
+        return [self.proof(index) for index in indices]
+
+
+def compute_root(index: int,
+                 leaf_count: int,
+                 data: bytes,
+                 proof: typing.Sequence[bytes],
+                 hash_name: str = 'sha_2_256') -> bytes:
+    """Compute the root hash implied by an inclusion proof.
+
+    Raises ``ValueError`` if the proof has the wrong length.
+    """
+    leaf_hash, node_hash = _get_hash_functions(hash_name)
+    if not 0 <= index < leaf_count:
+        raise ValueError('Leaf index out of range')
+    value = leaf_hash(_LEAF_PREFIX + data)
+    proof_index = 0
+    for size in _level_sizes(leaf_count)[:-1]:
+        if index ^ 1 < size:
+            if proof_index >= len(proof):
+                raise ValueError('Inclusion proof is too short')
+            sibling = proof[proof_index]
+            proof_index += 1
+            if index & 1:
+                value = node_hash(sibling, value)
+            else:
+                value = node_hash(value, sibling)
+        index //= 2
+    if proof_index != len(proof):
+        raise ValueError('Inclusion proof is too long')
+    return value
+
+
+def verify_proof(root: bytes,
+                 index: int,
+                 leaf_count: int,
+                 data: bytes,
+                 proof: typing.Sequence[bytes],
+                 hash_name: str = 'sha_2_256') -> bool:
+    """Check whether ``data`` is leaf ``index`` of the tree with root
+    ``root`` and ``leaf_count`` leaves."""
+    try:
+        return compute_root(index, leaf_count, data, proof, hash_name) == root
+    except ValueError:
+        return False
+
+
+def _verify_proofs(hash_name: str,
+                   root: bytes,
+                   leaf_count: int,
+                   items: typing.Sequence[typing.Tuple[
+                       int, bytes, typing.Sequence[bytes]]]
+                   ) -> typing.List[bool]:
+    return [verify_proof(root, index, leaf_count, data, proof, hash_name)
+            for index, data, proof in items]
+
+
+def verify_proofs(root: bytes,
+                  leaf_count: int,
+                  items: typing.Sequence[typing.Tuple[
+                      int, bytes, typing.Sequence[bytes]]],
+                  hash_name: str = 'sha_2_256',
+                  processes: int = 1) -> typing.List[bool]:
+    """Verify many inclusion proofs against the same root.
+
+    ``items`` is a sequence of tuples ``(index, data, proof)``. Returns a
+    list of booleans. If ``processes`` is larger than 1, large inputs are
+    verified on a process pool.
+    """
+    _get_hash_functions(hash_name)
+    items = list(items)
+    chunk_size = max(_MIN_CHUNK_SIZE, len(items) // (4 * max(processes, 1)))
+    if processes <= 1 or len(items) < 2 * chunk_size:
+        return _verify_proofs(hash_name, root, leaf_count, items)
+    chunks = [items[i:i + chunk_size]
+              for i in range(0, len(items), chunk_size)]
+    result = []
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=processes) as executor:
+        for part in executor.map(_verify_proofs,
+                                 [hash_name] * len(chunks),
+                                 [root] * len(chunks),
+                                 [leaf_count] * len(chunks),
+                                 chunks):
+            result.extend(part)
+    return result
@@ -1,6 +1,11 @@
 """
 Provides various padding functions.
 
+Every ``add_*_padding`` function has a companion ``add_*_padding_tail``
+which only pads the unprocessed tail of a message, given the number of
+bytes before the tail. Hash functions use these to pad their last block
+without copying the whole message.
+
 WARNING: These implementations are for educational purposes.
          DO NOT use them for real-world applications!
 
@@ -126,22 +131,33 @@ def find_first_1(v):
     return i
 
 
-def add_10star_padding(data, blocksize, bitlength=None):
-    """Add 10* padding to the given bytestring ``data``.
+def add_10star_padding_tail(tail, blocksize, bitlength=None, offset=0):
+    """Add 10* padding to the tail ``tail`` of a message whose first
+    ``offset`` bytes are not passed.
 
-    Uses the blocksize ``blocksize`` for the padding.
     If ``bitlength`` is given, only the first ``bitlength`` bits
-    of ``data`` will be considered.
+    of ``tail`` will be considered. The result is the end of the
+    padded message, starting at byte ``offset``.
     """
-    data, appendum, rem_bits = _cutoff_little(data, bitlength)
+    data, appendum, rem_bits = _cutoff_little(tail, bitlength)
     data, appendum, rem_bits = _add_bit_little(data, appendum, rem_bits, True)
-    extra_bytes = (len(data) + len(appendum)) % blocksize
+    extra_bytes = (offset + len(data) + len(appendum)) % blocksize
     if extra_bytes > 0:
         appendum += b'\x00' * (blocksize - extra_bytes)
         rem_bits = 8
     return data + appendum
 
 
+def add_10star_padding(data, blocksize, bitlength=None):
+    """Add 10* padding to the given bytestring ``data``.
+
+    Uses the blocksize ``blocksize`` for the padding.
+    If ``bitlength`` is given, only the first ``bitlength`` bits
+    of ``data`` will be considered.
+    """
+    return add_10star_padding_tail(data, blocksize, bitlength)
+
+
 def remove_10star_padding(data, blocksize=None):
     """Remove 10* padding from the given bytestring ``data``.
 
@@ -177,16 +193,17 @@ def remove_10star_padding(data, blocksize=None):
     return data, bits
 
 
-def add_10star1_padding(data, blocksize, bitlength=None):
-    """Add 10*1 padding to the given bytestring ``data``.
+def add_10star1_padding_tail(tail, blocksize, bitlength=None, offset=0):
+    """Add 10*1 padding to the tail ``tail`` of a message whose first
+    ``offset`` bytes are not passed.
 
-    Uses the blocksize ``blocksize`` for the padding.
     If ``bitlength`` is given, only the first ``bitlength`` bits
-    of ``data`` will be considered.
+    of ``tail`` will be considered. The result is the end of the
+    padded message, starting at byte ``offset``.
     """
-    data, appendum, rem_bits = _cutoff_little(data, bitlength)
+    data, appendum, rem_bits = _cutoff_little(tail, bitlength)
     data, appendum, rem_bits = _add_bit_little(data, appendum, rem_bits, True)
-    extra_bytes = (len(data) + len(appendum)) % blocksize
+    extra_bytes = (offset + len(data) + len(appendum)) % blocksize
     if extra_bytes > 0:
         appendum += b'\x00' * (blocksize - extra_bytes)
         appendum[-1] |= 0x80
@@ -197,6 +214,16 @@ def add_10star1_padding(data, blocksize, bitlength=None):
     return data + appendum
 
 
+def add_10star1_padding(data, blocksize, bitlength=None):
+    """Add 10*1 padding to the given bytestring ``data``.
+
+    Uses the blocksize ``blocksize`` for the padding.
+    If ``bitlength`` is given, only the first ``bitlength`` bits
+    of ``data`` will be considered.
+    """
+    return add_10star1_padding_tail(data, blocksize, bitlength)
+
+
 def remove_10star1_padding(data, blocksize=None):
     """Remove 10*1 padding from the given bytestring ``data``.
 
@@ -239,6 +266,22 @@ def remove_10star1_padding(data, blocksize=None):
     return data, bits
 
 
+def add_0110star1_padding_tail(tail, blocksize, bitlength=None, offset=0):
+    """Add 0110*1 padding to the tail ``tail`` of a message whose first
+    ``offset`` bytes are not passed.
+
+    If ``bitlength`` is given, only the first ``bitlength`` bits
+    of ``tail`` will be considered. The result is the end of the
+    padded message, starting at byte ``offset``.
+    """
+    data, appendum, rem_bits = _cutoff_little(tail, bitlength)
+    data, appendum, rem_bits = _add_bit_little(data, appendum, rem_bits, False)
+    data, appendum, rem_bits = _add_bit_little(data, appendum, rem_bits, True)
+    data += appendum
+    return add_10star1_padding_tail(
+        data, blocksize, len(data) * 8 - rem_bits, offset)
+
+
 def add_0110star1_padding(data, blocksize, bitlength=None):
     """Add 0110*1 padding to the given bytestring ``data``.
 
@@ -246,11 +289,7 @@ def add_0110star1_padding(data, blocksize, bitlength=None):
     If ``bitlength`` is given, only the first ``bitlength`` bits
     of ``data`` will be considered.
     """
-    data, appendum, rem_bits = _cutoff_little(data, bitlength)
-    data, appendum, rem_bits = _add_bit_little(data, appendum, rem_bits, False)
-    data, appendum, rem_bits = _add_bit_little(data, appendum, rem_bits, True)
-    data += appendum
-    return add_10star1_padding(data, blocksize, len(data) * 8 - rem_bits)
+    return add_0110star1_padding_tail(data, blocksize, bitlength)
 
 
 def remove_0110star1_padding(data, blocksize=None):
@@ -294,25 +333,46 @@ def remove_0110star1_padding(data, blocksize=None):
     return data, bits
 
 
-def add_sha2_padding(data, blocksize, bitlength=None):
-    """Add SHA-2 padding to the given bytestring ``data``.
+def add_sha2_padding_tail(tail, blocksize, bitlength=None, offset=0,
+                          length_bytes=8):
+    """Add SHA-2 padding to the tail ``tail`` of a message whose first
+    ``offset`` bytes are not passed.
 
-    Uses the blocksize ``blocksize`` for the padding.
     If ``bitlength`` is given, only the first ``bitlength`` bits
-    of ``data`` will be considered.
+    of ``tail`` will be considered. The result is the end of the
+    padded message, starting at byte ``offset``.
+
+    The bit length of the whole message is encoded with ``length_bytes``
+    bytes.
     """
-    data, appendum, rem_bits = _cutoff_big(data, bitlength)
+    data, appendum, rem_bits = _cutoff_big(tail, bitlength)
     if bitlength is None:
         bitlength = len(data) * 8
+    bitlength += offset * 8
     data, appendum, rem_bits = _add_bit_big(data, appendum, rem_bits, True)
-    extra_bytes = (len(data) + len(appendum) + 8) % blocksize
+    extra_bytes = (offset + len(data) + len(appendum) +
+                   length_bytes) % blocksize
     if extra_bytes > 0:
         appendum += b'\x00' * (blocksize - extra_bytes)
-    appendum += bitlength.to_bytes(8, byteorder='big')
+    appendum += bitlength.to_bytes(length_bytes, byteorder='big')
     return data + appendum
 
 
-def remove_sha2_padding(data, blocksize=None):
+def add_sha2_padding(data, blocksize, bitlength=None, length_bytes=8):
+    """Add SHA-2 padding to the given bytestring ``data``.
+
+    Uses the blocksize ``blocksize`` for the padding.
+    If ``bitlength`` is given, only the first ``bitlength`` bits
+    of ``data`` will be considered.
+
+    The bit length is encoded with ``length_bytes`` bytes; SHA-2-256
+    uses 8 bytes, SHA-2-384 and SHA-2-512 use 16 bytes.
+    """
+    return add_sha2_padding_tail(data, blocksize, bitlength,
+                                 length_bytes=length_bytes)
+
+
+def remove_sha2_padding(data, blocksize=None, length_bytes=8):
     """Remove SHA2 padding from the given bytestring ``data``.
 
     Returns a pair ``(original_data, bitlength)``, where
@@ -322,11 +382,13 @@ def remove_sha2_padding(data, blocksize=None):
 
     If the blocksize is provided, some sanity checks will be done
     to make sure that the original string was correctly padded.
+
+    The bit length is expected to be encoded with ``length_bytes`` bytes.
     """
     i = len(data)
-    if i < 9 or (blocksize is not None and i % blocksize > 0):
+    if i <= length_bytes or (blocksize is not None and i % blocksize > 0):
         raise ValueError('Data does not satisfy SHA-2 padding')
-    i -= 8
+    i -= length_bytes
     length = int.from_bytes(data[i:], byteorder='big')
     while i > 0 and data[i - 1] == 0:
         i -= 1
@@ -346,7 +408,43 @@ def remove_sha2_padding(data, blocksize=None):
         raise ValueError('Data does not satisfy SHA-2 padding')
     if blocksize is not None:
         # Validate that the minimal number of zeros was added
-        min_bytes = (length + 8) // 8 + 8
+        min_bytes = (length + 8) // 8 + length_bytes
         if min_bytes + blocksize - 1 < len(data):
             raise ValueError('Data does not satisfy SHA-2 padding')
     return result, length
+
+
+# Maps padding functions to their tail padding functions
+_TAIL_PADDINGS = {
+    add_10star_padding: add_10star_padding_tail,
+    add_10star1_padding: add_10star1_padding_tail,
+    add_0110star1_padding: add_0110star1_padding_tail,
+    add_sha2_padding: add_sha2_padding_tail,
+}
+
+
+def register_tail_padding(padding, tail_padding):
+    """Register ``tail_padding`` as tail padding function of ``padding``."""
+    _TAIL_PADDINGS[padding] = tail_padding
+
+
+def get_tail_padding(padding):
+    """Return the tail padding function for the padding function
+    ``padding``.
+
+    For padding functions without registered tail padding function, the
+    tail is padded by padding zeros followed by the tail. This is correct
+    if the padding only depends on the length of the data, but needs time
+    linear in ``offset``.
+    """
+    tail_padding = _TAIL_PADDINGS.get(padding)
+    if tail_padding is not None:
+        return tail_padding
+
+    def generic_tail_padding(tail, blocksize, bitlength=None, offset=0):
+        if bitlength is None:
+            bitlength = len(tail) * 8
+        data = padding(bytes(offset) + tail, blocksize, offset * 8 + bitlength)
+        return data[offset:]
+
+    return generic_tail_padding
@@ -0,0 +1,225 @@
+"""
+Implements a hashcash-style proof of work: find a nonce such that the
+hash of ``prefix || nonce`` starts with a given number of zero bits.
+
+The constant prefix is absorbed only once; every candidate nonce starts
+from a copy of that midstate, so only the final block(s) containing the
+nonce have to be processed. The nonce range can be searched on a process
+pool; all workers stop as soon as one of them finds a solution.
+
+WARNING: These implementations are for educational purposes.
+         DO NOT use them for real-world applications!
+
+Copyright (c), Felix Fontein, 2020
+
+This file is BSD licensed under the Simplified BSD License
+(see https://opensource.org/licenses/BSD-2-Clause).
+"""
+
+import concurrent.futures
+import multiprocessing
+import time
+import typing
+
+from . import padding
+from . import sha2
+from . import sha3
+from . import sponge_crypto
+
+
+NONCE_SIZE = 8
+
+# Number of nonces a worker tests before checking for cancellation
+_CANCEL_CHECK_INTERVAL = 1024
+
+# Number of nonces per worker task
+_BATCH_SIZE = 1 << 16
+
+# State of a pool worker process, set up by _init_worker(); the cancel
+# event is shared by all workers of a search
+_worker_state = {}  # type: typing.Dict[str, typing.Any]
+
+_DIGEST_SIZES = {
+    'sha_2_256': 32,
+    'sha_2_512': 64,
+    'sha_2_384': 48,
+    'sha_2_512_256': 32,
+    'sha_3_256': 32,
+}
+
+
+def _check_parameters(hash_name: str, difficulty: int):
+    """Validate hash function name and difficulty."""
+    if hash_name not in _DIGEST_SIZES:
+        raise ValueError('Unknown hash function {0}'.format(hash_name))
+    if not 0 <= difficulty <= 8 * _DIGEST_SIZES[hash_name]:
+        raise ValueError(
+            'Difficulty must be between 0 and {0} for {1}'.format(
+                8 * _DIGEST_SIZES[hash_name], hash_name))
+
+
+def _create_midstate_hasher(hash_name: str,
+                            prefix: bytes
+                            ) -> typing.Callable[[bytes], bytes]:
+    """Create function computing the hash of ``prefix + suffix``.
+
+    The prefix is absorbed once; the function only processes the suffix.
+    """
+    if hash_name in ('sha_2_256', 'sha_2_512', 'sha_2_384', 'sha_2_512_256'):
+        midstate = sha2.SHA2Hash(hash_name, prefix)
+
+        def f(suffix: bytes) -> bytes:
+            h = midstate.copy()
+            h.update(suffix)
+            return h.digest()
+
+        return f
+
+    if hash_name == 'sha_3_256':
+        midstate = sponge_crypto.SpongeHash(sha3.KECCAK_F,
+                                            1088 // 8,
+                                            padding.add_10star1_padding)
+        midstate.absorb(prefix)
+
+        def f(suffix: bytes) -> bytes:
+            h = midstate.clone()
+            h.absorb(suffix)
+            h.final_absorb(b'\x02', 2)
+            return h.squeeze(32)
+
+        return f
+
+    raise ValueError('Unknown hash function {0}'.format(hash_name))
+
+
+def _encode_nonce(nonce: int) -> bytes:
+    return nonce.to_bytes(NONCE_SIZE, byteorder='big')
+
+
+def _meets_difficulty(digest: bytes, difficulty: int) -> bool:
+    """Check whether ``digest`` starts with ``difficulty`` zero bits."""
+    return (int.from_bytes(digest, byteorder='big') >>
+            (8 * len(digest) - difficulty)) == 0
+
+
+class SearchResult(typing.NamedTuple):
+    """Result of a nonce search."""
+
+    nonce: typing.Optional[int]     # None if no nonce was found
+    digest: typing.Optional[bytes]
+    hashes: int                     # number of hashes computed
+    seconds: float
+
+    @property
+    def hashes_per_second(self) -> float:
+        """Number of hashes computed per second."""
+        if self.seconds <= 0:
+            return 0.0
+        return self.hashes / self.seconds
+
+
+def _init_worker(cancel_event):
+    _worker_state['cancel_event'] = cancel_event
+
+
+def _search(hash_name: str,
+            prefix: bytes,
+            difficulty: int,
+            start: int,
+            stop: int
+            ) -> typing.Tuple[typing.Optional[int],
+                              typing.Optional[bytes],
+                              int]:
+    """Search nonces in ``range(start, stop)``.
+
+    Returns ``(nonce, digest, hashes)``; ``nonce`` and ``digest`` are
+    ``None`` if no nonce was found.
+    """
+    h = _create_midstate_hasher(hash_name, prefix)
+    cancel_event = _worker_state.get('cancel_event')
+    hashes = 0
+    for nonce in range(start, stop):
+        if cancel_event is not None and \
+                hashes % _CANCEL_CHECK_INTERVAL == 0 and \
+                cancel_event.is_set():
+            break
+        digest = h(_encode_nonce(nonce))
+        hashes += 1
+        if _meets_difficulty(digest, difficulty):
+            if cancel_event is not None:
+                cancel_event.set()
+            return nonce, digest, hashes
+    return None, None, hashes
+
+
+def mint(prefix: bytes,
+         difficulty: int,
+         hash_name: str = 'sha_2_256',
+         processes: int = 1,
+         start: int = 0,
+         stop: int = 1 << (8 * NONCE_SIZE)) -> SearchResult:
+    """Search a nonce such that ``hash(prefix || nonce)`` starts with
+    ``difficulty`` zero bits.
+
+    The nonce is encoded as 8-byte big endian integer. Nonces from
+    ``range(start, stop)`` are tried. If ``processes`` is larger than 1,
+    the range is split into batches which are searched on a process pool.
+    With more than one process, the returned nonce is not necessarily the
+    smallest one.
+    """
+    _check_parameters(hash_name, difficulty)
+    begin = time.perf_counter()
+    if processes <= 1:
+        nonce, digest, hashes = _search(
+            hash_name, prefix, difficulty, start, stop)
+        return SearchResult(nonce, digest, hashes,
+                            time.perf_counter() - begin)
+
+    cancel_event = multiprocessing.Event()
+    result = SearchResult(None, None, 0, 0.0)
+    hashes = 0
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_worker,
+            initargs=(cancel_event,)) as executor:
+        batches = iter(range(start, stop, _BATCH_SIZE))
+        pending = set()
+
+        def submit_batches():
+            # Keep two batches per worker queued
+            for batch_start in batches:
+                pending.add(executor.submit(
+                    _search, hash_name, prefix, difficulty, batch_start,
+                    min(batch_start + _BATCH_SIZE, stop)))
+                if len(pending) >= 2 * processes:
+                    break
+
+        submit_batches()
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                nonce, digest, batch_hashes = future.result()
+                hashes += batch_hashes
+                if nonce is not None and result.nonce is None:
+                    result = SearchResult(nonce, digest, 0, 0.0)
+                    # Stop running workers and drop queued batches
+                    cancel_event.set()
+                    for other in pending:
+                        other.cancel()
+            if result.nonce is None:
+                submit_batches()
+    return result._replace(hashes=hashes,
+                           seconds=time.perf_counter() - begin)
+
+
+def verify(prefix: bytes,
+           nonce: int,
+           difficulty: int,
+           hash_name: str = 'sha_2_256') -> bool:
+    """Check whether ``nonce`` is a valid proof of work for ``prefix``."""
+    _check_parameters(hash_name, difficulty)
+    if not 0 <= nonce < 1 << (8 * NONCE_SIZE):
+        return False
+    h = _create_midstate_hasher(hash_name, prefix)
+    return _meets_difficulty(h(_encode_nonce(nonce)), difficulty)
@@ -1,5 +1,10 @@
 """
-Implements the SHA-2-256 hash function.
+Implements the SHA-2-256, SHA-2-384, SHA-2-512 and SHA-2-512/256 hash
+functions on top of one parameterized compression function.
+
+SHA-2-512 needs about as many Python operations per compression as
+SHA-2-256, but processes twice as many bytes, so it is the faster choice
+for hashing large amounts of data.
 
 WARNING: These implementations are for educational purposes.
          DO NOT use them for real-world applications!
@@ -10,11 +15,17 @@ This file is BSD licensed under the Simplified BSD License
 (see https://opensource.org/licenses/BSD-2-Clause).
 """
 
+import struct
 import typing
 
 from .utils import ROR
 
-from .padding import add_sha2_padding
+from .padding import (
+    add_sha2_padding,
+    add_sha2_padding_tail,
+    get_tail_padding,
+    register_tail_padding,
+)
 
 
 def merkle_damgard(compression_function: typing.Callable[[bytes], bytes],
@@ -24,32 +35,40 @@ def merkle_damgard(compression_function: typing.Callable[[bytes], bytes],
                    IV: bytes) -> typing.Callable[[bytes], bytes]:
     """Create hash function from compression function.
 
-    Uses the Merkle-Damgård construction.
+    Uses the Merkle-Damgård construction. Complete blocks are compressed
+    directly from the input; only the last incomplete block is padded.
     """
     blocksize = compression_input_len - compression_output_len
     assert len(IV) == compression_output_len
+    tail_padding = get_tail_padding(padding)
 
     def f(data: bytes) -> bytes:
-        padded_data = padding(data, blocksize)
+        view = memoryview(data)
+        end = len(view) - len(view) % blocksize
         value = IV
-        for i in range(0, len(padded_data), blocksize):
-            value = compression_function(value + padded_data[i:i + blocksize])
+        for i in range(0, end, blocksize):
+            value = compression_function(value + view[i:i + blocksize])
+        tail = tail_padding(bytes(view[end:]), blocksize, offset=end)
+        for i in range(0, len(tail), blocksize):
+            value = compression_function(value + tail[i:i + blocksize])
         return value
 
     return f
 
 
-def _split(data: bytes) -> typing.List[int]:
-    result = [None] * (len(data) // 4)
+def _split(data: bytes, word_size: int = 4) -> typing.List[int]:
+    """Split a bytestring into a list of big endian words."""
+    result = [None] * (len(data) // word_size)
     idx = 0
-    for i in range(0, len(data), 4):
-        result[idx] = int.from_bytes(data[i:i + 4], byteorder='big')
+    for i in range(0, len(data), word_size):
+        result[idx] = int.from_bytes(data[i:i + word_size], byteorder='big')
         idx += 1
     return result
 
 
-def _combine(data: typing.List[int]) -> bytes:
-    return b''.join([v.to_bytes(4, byteorder='big') for v in data])
+def _combine(data: typing.List[int], word_size: int = 4) -> bytes:
+    """Combine a list of big endian words into a bytestring."""
+    return b''.join([v.to_bytes(word_size, byteorder='big') for v in data])
 
 
 SHA_2_256_IV_DATA = [
@@ -63,7 +82,7 @@ SHA_2_256_IV_DATA = [
     0x5BE0CD19,
 ]
 
-SHA_2_256_IV = _combine(SHA_2_256_IV_DATA)
+SHA_2_256_IV = _combine(SHA_2_256_IV_DATA, 4)
 
 SHA_2_256_ROUND_CONSTANTS = [
     0x428A2F98,
@@ -133,44 +152,265 @@ SHA_2_256_ROUND_CONSTANTS = [
 ]
 
 
-def _sha2_256_encrypt(input_bytes: bytes) -> bytes:
-    """The SHA-2-256 internal block cipher (Davies-Meyer construction)."""
-    # Split input into 32bit ints
-    value = _split(input_bytes[:32])
-    key = _split(input_bytes[32:])
+SHA_2_512_IV_DATA = [
+    0x6A09E667F3BCC908,
+    0xBB67AE8584CAA73B,
+    0x3C6EF372FE94F82B,
+    0xA54FF53A5F1D36F1,
+    0x510E527FADE682D1,
+    0x9B05688C2B3E6C1F,
+    0x1F83D9ABFB41BD6B,
+    0x5BE0CD19137E2179,
+]
 
-    # Key extension
-    for i in range(16, 64):
-        v1 = ROR(key[i - 15], 7, 32)
-        v1 ^= ROR(key[i - 15], 18, 32)
-        v1 ^= (key[i - 15] >> 3)
-        v2 = ROR(key[i - 2], 17, 32)
-        v2 ^= ROR(key[i - 2], 19, 32)
-        v2 ^= (key[i - 2] >> 10)
-        key.append((key[i - 16] + key[i - 7] + v1 + v2) & 0xFFFFFFFF)
-
-    # Message schedule
-    r = value
-    for i in range(64):
-        S1 = ROR(r[4], 6, 32) ^ ROR(r[4], 11, 32) ^ ROR(r[4], 25, 32)
-        ch = (r[4] & r[5]) ^ ((~r[4]) & r[6])
-        temp1 = r[7] + S1 + ch + SHA_2_256_ROUND_CONSTANTS[i] + key[i]
-        S0 = ROR(r[0], 2, 32) ^ ROR(r[0], 13, 32) ^ ROR(r[0], 22, 32)
-        maj = (r[0] & r[1]) ^ (r[0] & r[2]) ^ (r[1] & r[2])
-        temp2 = S0 + maj
-        r = [
-            (temp1 + temp2) & 0xFFFFFFFF,
-            r[0],
-            r[1],
-            r[2],
-            (r[3] + temp1) & 0xFFFFFFFF,
-            r[4],
-            r[5],
-            r[6],
-        ]
-
-    # Combine result
-    return _combine([(a + b) & 0xFFFFFFFF for a, b in zip(value, r)])
+SHA_2_512_IV = _combine(SHA_2_512_IV_DATA, 8)
+
+SHA_2_384_IV_DATA = [
+    0xCBBB9D5DC1059ED8,
+    0x629A292A367CD507,
+    0x9159015A3070DD17,
+    0x152FECD8F70E5939,
+    0x67332667FFC00B31,
+    0x8EB44A8768581511,
+    0xDB0C2E0D64F98FA7,
+    0x47B5481DBEFA4FA4,
+]
+
+SHA_2_384_IV = _combine(SHA_2_384_IV_DATA, 8)
+
+SHA_2_512_ROUND_CONSTANTS = [
+    0x428A2F98D728AE22,
+    0x7137449123EF65CD,
+    0xB5C0FBCFEC4D3B2F,
+    0xE9B5DBA58189DBBC,
+    0x3956C25BF348B538,
+    0x59F111F1B605D019,
+    0x923F82A4AF194F9B,
+    0xAB1C5ED5DA6D8118,
+    0xD807AA98A3030242,
+    0x12835B0145706FBE,
+    0x243185BE4EE4B28C,
+    0x550C7DC3D5FFB4E2,
+    0x72BE5D74F27B896F,
+    0x80DEB1FE3B1696B1,
+    0x9BDC06A725C71235,
+    0xC19BF174CF692694,
+    0xE49B69C19EF14AD2,
+    0xEFBE4786384F25E3,
+    0x0FC19DC68B8CD5B5,
+    0x240CA1CC77AC9C65,
+    0x2DE92C6F592B0275,
+    0x4A7484AA6EA6E483,
+    0x5CB0A9DCBD41FBD4,
+    0x76F988DA831153B5,
+    0x983E5152EE66DFAB,
+    0xA831C66D2DB43210,
+    0xB00327C898FB213F,
+    0xBF597FC7BEEF0EE4,
+    0xC6E00BF33DA88FC2,
+    0xD5A79147930AA725,
+    0x06CA6351E003826F,
+    0x142929670A0E6E70,
+    0x27B70A8546D22FFC,
+    0x2E1B21385C26C926,
+    0x4D2C6DFC5AC42AED,
+    0x53380D139D95B3DF,
+    0x650A73548BAF63DE,
+    0x766A0ABB3C77B2A8,
+    0x81C2C92E47EDAEE6,
+    0x92722C851482353B,
+    0xA2BFE8A14CF10364,
+    0xA81A664BBC423001,
+    0xC24B8B70D0F89791,
+    0xC76C51A30654BE30,
+    0xD192E819D6EF5218,
+    0xD69906245565A910,
+    0xF40E35855771202A,
+    0x106AA07032BBD1B8,
+    0x19A4C116B8D2D0C8,
+    0x1E376C085141AB53,
+    0x2748774CDF8EEB99,
+    0x34B0BCB5E19B48A8,
+    0x391C0CB3C5C95A63,
+    0x4ED8AA4AE3418ACB,
+    0x5B9CCA4F7763E373,
+    0x682E6FF3D6B2B8A3,
+    0x748F82EE5DEFB2FC,
+    0x78A5636F43172F60,
+    0x84C87814A1F0AB72,
+    0x8CC702081A6439EC,
+    0x90BEFFFA23631E28,
+    0xA4506CEBDE82BDE9,
+    0xBEF9A3F7B2C67915,
+    0xC67178F2E372532B,
+    0xCA273ECEEA26619C,
+    0xD186B8C721C0C207,
+    0xEADA7DD6CDE0EB1E,
+    0xF57D4F7FEE6ED178,
+    0x06F067AA72176FBA,
+    0x0A637DC5A2C898A6,
+    0x113F9804BEF90DAE,
+    0x1B710B35131C471B,
+    0x28DB77F523047D84,
+    0x32CAAB7B40C72493,
+    0x3C9EBE0A15C9BEBC,
+    0x431D67C49C100D4C,
+    0x4CC5D4BECB3E42B6,
+    0x597F299CFC657E2A,
+    0x5FCB6FAB3AD6FAEC,
+    0x6C44198C4A475817,
+]
+
+
+def _create_sha2_compression(word_bits: int,
+                             round_constants: typing.List[int],
+                             sigma: typing.Tuple[typing.Tuple[int, ...], ...]
+                             ) -> typing.Callable[[typing.List[int],
+                                                   typing.List[int]],
+                                                  typing.List[int]]:
+    """Create the SHA-2 compression function for one word size.
+
+    ``sigma`` contains the rotation and shift amounts for the four
+    functions Σ0, Σ1, σ0 and σ1, in this order. The number of rounds
+    equals the number of round constants.
+
+    The resulting function accepts the chaining value and the message
+    block as lists of words and returns the new chaining value as a list
+    of words. The message block list is extended to the full key schedule.
+    """
+    mask = (1 << word_bits) - 1
+    rounds = len(round_constants)
+    (S0_1, S0_2, S0_3), (S1_1, S1_2, S1_3), \
+        (s0_1, s0_2, s0_3), (s1_1, s1_2, s1_3) = sigma
+
+    def compress(value: typing.List[int],
+                 key: typing.List[int]) -> typing.List[int]:
+        # Key extension
+        for i in range(16, rounds):
+            v1 = ROR(key[i - 15], s0_1, word_bits)
+            v1 ^= ROR(key[i - 15], s0_2, word_bits)
+            v1 ^= (key[i - 15] >> s0_3)
+            v2 = ROR(key[i - 2], s1_1, word_bits)
+            v2 ^= ROR(key[i - 2], s1_2, word_bits)
+            v2 ^= (key[i - 2] >> s1_3)
+            key.append((key[i - 16] + key[i - 7] + v1 + v2) & mask)
+
+        # Message schedule
+        a, b, c, d, e, f, g, h = value
+        for i in range(rounds):
+            S1 = (ROR(e, S1_1, word_bits) ^ ROR(e, S1_2, word_bits) ^
+                  ROR(e, S1_3, word_bits))
+            ch = (e & f) ^ ((~e) & g)
+            temp1 = h + S1 + ch + round_constants[i] + key[i]
+            S0 = (ROR(a, S0_1, word_bits) ^ ROR(a, S0_2, word_bits) ^
+                  ROR(a, S0_3, word_bits))
+            maj = (a & b) ^ (a & c) ^ (b & c)
+            temp2 = S0 + maj
+            h = g
+            g = f
+            f = e
+            e = (d + temp1) & mask
+            d = c
+            c = b
+            b = a
+            a = (temp1 + temp2) & mask
+
+        # Combine result (Davies-Meyer feed-forward)
+        return [(x + y) & mask
+                for x, y in zip(value, (a, b, c, d, e, f, g, h))]
+
+    return compress
+
+
+_sha2_256_compress = _create_sha2_compression(
+    32,
+    SHA_2_256_ROUND_CONSTANTS,
+    ((2, 13, 22), (6, 11, 25), (7, 18, 3), (17, 19, 10)),
+)
+
+_sha2_512_compress = _create_sha2_compression(
+    64,
+    SHA_2_512_ROUND_CONSTANTS,
+    ((28, 34, 39), (14, 18, 41), (1, 8, 7), (19, 61, 6)),
+)
+
+
+def _create_sha2_encrypt(compress: typing.Callable[[typing.List[int],
+                                                    typing.List[int]],
+                                                   typing.List[int]],
+                         word_size: int) -> typing.Callable[[bytes], bytes]:
+    """Create the byte-oriented SHA-2 internal block cipher.
+
+    The result maps chaining value plus message block to the new
+    chaining value (Davies-Meyer construction).
+    """
+    value_len = 8 * word_size
+
+    def encrypt(input_bytes: bytes) -> bytes:
+        value = _split(input_bytes[:value_len], word_size)
+        key = _split(input_bytes[value_len:], word_size)
+        return _combine(compress(value, key), word_size)
+
+    return encrypt
+
+
+_sha2_256_encrypt = _create_sha2_encrypt(_sha2_256_compress, 4)
+_sha2_512_encrypt = _create_sha2_encrypt(_sha2_512_compress, 8)
+
+
+def _add_sha2_512_padding(data: bytes,
+                          blocksize: int,
+                          bitlength: int = None) -> bytes:
+    """Add SHA-2 padding with a 128-bit length field."""
+    return add_sha2_padding(data, blocksize, bitlength, length_bytes=16)
+
+
+def _add_sha2_512_padding_tail(tail: bytes,
+                               blocksize: int,
+                               bitlength: int = None,
+                               offset: int = 0) -> bytes:
+    """Add SHA-2 padding with a 128-bit length field to a message tail."""
+    return add_sha2_padding_tail(tail, blocksize, bitlength, offset,
+                                 length_bytes=16)
+
+
+register_tail_padding(_add_sha2_512_padding, _add_sha2_512_padding_tail)
+
+
+def _create_sha2_512(IV: bytes,
+                     result_bytes: int) -> typing.Callable[[bytes], bytes]:
+    """Create a (possibly truncated) hash function based on SHA-2-512."""
+    h = merkle_damgard(
+        _sha2_512_encrypt,
+        64 + 128,
+        64,
+        _add_sha2_512_padding,
+        IV,
+    )
+    if result_bytes == 64:
+        return h
+
+    def f(data: bytes) -> bytes:
+        return h(data)[:result_bytes]
+
+    return f
+
+
+def _sha2_512_t_iv(t: int) -> bytes:
+    """Compute the IV for SHA-2-512/t (FIPS 180-4, section 5.3.6)."""
+    assert 0 < t < 512 and t != 384
+    iv = _combine([v ^ 0xA5A5A5A5A5A5A5A5 for v in SHA_2_512_IV_DATA], 8)
+    h = merkle_damgard(
+        _sha2_512_encrypt,
+        64 + 128,
+        64,
+        _add_sha2_512_padding,
+        iv,
+    )
+    return h('SHA-512/{0}'.format(t).encode('ascii'))
+
+
+SHA_2_512_256_IV = _sha2_512_t_iv(256)
 
 
 sha_2_256 = merkle_damgard(
@@ -180,3 +420,308 @@ sha_2_256 = merkle_damgard(
     add_sha2_padding,
     SHA_2_256_IV,
 )
+
+sha_2_512 = _create_sha2_512(SHA_2_512_IV, 64)
+sha_2_384 = _create_sha2_512(SHA_2_384_IV, 48)
+sha_2_512_256 = _create_sha2_512(SHA_2_512_256_IV, 32)
+
+
+# ###################################################################
+# ## Fast paths for fixed-length SHA-2-256 inputs
+#
+# Hashing exactly 32 or 64 bytes is common (hash trees, commitments,
+# key derivation). For these lengths the padding is constant, so the
+# padding block and the contributions of the padding words to the
+# message schedule can be computed once in advance.
+
+_MASK_32 = 0xFFFFFFFF
+
+
+def _sha2_256_sigma0(x: int) -> int:
+    return (((x >> 7) | (x << 25)) ^ ((x >> 18) | (x << 14)) ^
+            (x >> 3)) & _MASK_32
+
+
+def _sha2_256_sigma1(x: int) -> int:
+    return (((x >> 17) | (x << 15)) ^ ((x >> 19) | (x << 13)) ^
+            (x >> 10)) & _MASK_32
+
+
+def _sha2_256_rounds(value: typing.List[int],
+                     kw: typing.Iterable[int]) -> typing.List[int]:
+    """Apply the SHA-2-256 rounds to the chaining value ``value``.
+
+    ``kw`` must contain the 64 values ``K[i] + W[i]`` of round constant
+    and message schedule word. Returns the new chaining value.
+    """
+    a, b, c, d, e, f, g, h = value
+    for k in kw:
+        S1 = (((e >> 6) | (e << 26)) ^ ((e >> 11) | (e << 21)) ^
+              ((e >> 25) | (e << 7))) & _MASK_32
+        temp1 = h + S1 + ((e & f) ^ ((~e) & g)) + k
+        S0 = (((a >> 2) | (a << 30)) ^ ((a >> 13) | (a << 19)) ^
+              ((a >> 22) | (a << 10))) & _MASK_32
+        temp2 = S0 + ((a & b) ^ (a & c) ^ (b & c))
+        h = g
+        g = f
+        f = e
+        e = (d + temp1) & _MASK_32
+        d = c
+        c = b
+        b = a
+        a = (temp1 + temp2) & _MASK_32
+    return [(x + y) & _MASK_32
+            for x, y in zip(value, (a, b, c, d, e, f, g, h))]
+
+
+def _sha2_256_schedule(w: typing.List[int], start: int = 16):
+    """Extend message schedule ``w`` in-place to 64 words."""
+    for i in range(start, 64):
+        w.append((_sha2_256_sigma1(w[i - 2]) + w[i - 7] +
+                  _sha2_256_sigma0(w[i - 15]) + w[i - 16]) & _MASK_32)
+
+
+def _padding_words(message_bytes: int) -> typing.List[int]:
+    """Return the SHA-2-256 padding words for a message of given length."""
+    return _split(add_sha2_padding(b'\x00' * message_bytes, 64)[
+        message_bytes:], 4)
+
+
+def _padding_schedule_contribution(message_words: int) -> typing.List[int]:
+    """Compute the constant part of the message schedule.
+
+    For a single block whose first ``message_words`` words are message
+    and whose remaining words are constant padding, returns for every
+    index ``i >= 16`` the sum of the schedule terms of ``W[i]`` which
+    only depend on padding words.
+    """
+    w = [None] * message_words + _padding_words(4 * message_words)
+    result = [0] * 64
+    for i in range(16, 64):
+        if w[i - 2] is not None and i - 2 < 16:
+            result[i] += _sha2_256_sigma1(w[i - 2])
+        if w[i - 7] is not None and i - 7 < 16:
+            result[i] += w[i - 7]
+        if w[i - 15] is not None and i - 15 < 16:
+            result[i] += _sha2_256_sigma0(w[i - 15])
+        if w[i - 16] is not None:
+            result[i] += w[i - 16]
+        result[i] &= _MASK_32
+        w.append(None)
+    return result
+
+
+# Padding words and schedule constants for 32-byte (8 word) messages
+_PAD_32_WORDS = _padding_words(32)
+_PAD_32_KW = [(k + w) & _MASK_32 for k, w in
+              zip(SHA_2_256_ROUND_CONSTANTS[8:16], _PAD_32_WORDS)]
+_PAD_32_SCHEDULE = _padding_schedule_contribution(8)
+
+# Round inputs for the constant second block of 64-byte messages
+_PAD_64_WORDS = _padding_words(64)
+_sha2_256_schedule(_PAD_64_WORDS)
+_PAD_64_KW = [(k + w) & _MASK_32 for k, w in
+              zip(SHA_2_256_ROUND_CONSTANTS, _PAD_64_WORDS)]
+
+
+def _sha2_256_32_words(w: typing.List[int]) -> typing.List[int]:
+    """Compute SHA-2-256 of a 32-byte message given as 8 words."""
+    s0 = _sha2_256_sigma0
+    s1 = _sha2_256_sigma1
+    c = _PAD_32_SCHEDULE
+    w = w + _PAD_32_WORDS
+    # Words 16 to 31 depend on both message and padding words; the
+    # padding contributions are contained in c
+    for i in (16, 17):
+        w.append((s0(w[i - 15]) + w[i - 16] + c[i]) & _MASK_32)
+    for i in range(18, 23):
+        w.append((s1(w[i - 2]) + s0(w[i - 15]) + w[i - 16] + c[i]) &
+                 _MASK_32)
+    w.append((s1(w[21]) + w[16] + w[7] + c[23]) & _MASK_32)
+    for i in range(24, 31):
+        w.append((s1(w[i - 2]) + w[i - 7] + c[i]) & _MASK_32)
+    w.append((s1(w[29]) + w[24] + s0(w[16]) + c[31]) & _MASK_32)
+    _sha2_256_schedule(w, 32)
+    K = SHA_2_256_ROUND_CONSTANTS
+    kw = [K[i] + w[i] for i in range(8)]
+    kw.extend(_PAD_32_KW)
+    kw.extend([K[i] + w[i] for i in range(16, 64)])
+    return _sha2_256_rounds(SHA_2_256_IV_DATA, kw)
+
+
+def _sha2_256_64_words(w: typing.List[int]) -> typing.List[int]:
+    """Compute SHA-2-256 of a 64-byte message given as 16 words."""
+    _sha2_256_schedule(w)
+    value = _sha2_256_rounds(
+        SHA_2_256_IV_DATA,
+        [k + v for k, v in zip(SHA_2_256_ROUND_CONSTANTS, w)])
+    return _sha2_256_rounds(value, _PAD_64_KW)
+
+
+def sha_2_256_32(data: bytes) -> bytes:
+    """Compute SHA-2-256 of a message of exactly 32 bytes."""
+    assert len(data) == 32
+    return struct.pack('>8I', *_sha2_256_32_words(
+        list(struct.unpack('>8I', data))))
+
+
+def sha_2_256_64(data: bytes) -> bytes:
+    """Compute SHA-2-256 of a message of exactly 64 bytes."""
+    assert len(data) == 64
+    return struct.pack('>8I', *_sha2_256_64_words(
+        list(struct.unpack('>16I', data))))
+
+
+def sha_2_256_node(left: bytes, right: bytes) -> bytes:
+    """Compress two 32-byte digests into one.
+
+    Computes SHA-2-256 of ``left + right``, as used for the inner nodes
+    of binary hash trees.
+    """
+    assert len(left) == 32 and len(right) == 32
+    return struct.pack('>8I', *_sha2_256_64_words(
+        list(struct.unpack('>8I', left) + struct.unpack('>8I', right))))
+
+
+# Padding of the second block of 65-byte messages
+_TREE_NODE_PADDING = add_sha2_padding(b'\x00' * 65, 64)[65:]
+
+
+def sha_2_256_tree_node(left: bytes, right: bytes) -> bytes:
+    """Compress two 32-byte digests into one with domain separation.
+
+    Computes SHA-2-256 of ``0x01 || left || right``, as used for the inner
+    nodes of binary hash trees whose leaves are hashed with a 0x00 prefix
+    (see RFC 6962). The padding of the second block is constant.
+    """
+    assert len(left) == 32 and len(right) == 32
+    data = b'\x01' + left + right
+    value = SHA_2_256_IV_DATA
+    for block in (data[:64], data[64:] + _TREE_NODE_PADDING):
+        w = list(struct.unpack('>16I', block))
+        _sha2_256_schedule(w)
+        value = _sha2_256_rounds(
+            value, [k + v for k, v in zip(SHA_2_256_ROUND_CONSTANTS, w)])
+    return struct.pack('>8I', *value)
+
+
+# ###################################################################
+# ## Incremental hashing with exportable state
+
+_SHA2_VARIANTS = {
+    # name: (id, compress, word size, IV, result bytes)
+    'sha_2_256': (1, _sha2_256_compress, 4, SHA_2_256_IV_DATA, 32),
+    'sha_2_512': (2, _sha2_512_compress, 8, SHA_2_512_IV_DATA, 64),
+    'sha_2_384': (3, _sha2_512_compress, 8, SHA_2_384_IV_DATA, 48),
+    'sha_2_512_256': (4, _sha2_512_compress, 8,
+                      _split(SHA_2_512_256_IV, 8), 32),
+}
+
+_SHA2_STATE_MAGIC = b'S2'
+_SHA2_STATE_VERSION = 1
+
+
+class SHA2Hash:
+    """
+    Incremental SHA-2 hash.
+
+    Data can be added in arbitrary chunks with ``update()``. The state can
+    be serialized with ``export_state()`` at any time and restored later
+    with ``import_state()``, so hashing can continue without processing
+    the data again.
+    """
+
+    def __init__(self, name: str = 'sha_2_256', data: bytes = b''):
+        if name not in _SHA2_VARIANTS:
+            raise ValueError('Unknown SHA-2 variant {0}'.format(name))
+        self.name = name
+        (self._id, self._compress, self._word_size, IV,
+         self.digest_size) = _SHA2_VARIANTS[name]
+        self.block_size = 16 * self._word_size
+        self._value = list(IV)
+        self._count = 0
+        self._buffer = b''
+        if data:
+            self.update(data)
+
+    def _process(self, data: bytes):
+        """Compress all complete blocks of data; return the remainder."""
+        blocksize = self.block_size
+        word_size = self._word_size
+        end = len(data) - len(data) % blocksize
+        view = memoryview(data)
+        for i in range(0, end, blocksize):
+            self._value = self._compress(
+                self._value, _split(view[i:i + blocksize], word_size))
+        return bytes(view[end:])
+
+    def update(self, data: bytes):
+        """Add data to the hash."""
+        self._count += len(data)
+        if self._buffer:
+            data = self._buffer + data
+        self._buffer = self._process(data)
+
+    def digest(self) -> bytes:
+        """Return the hash of the data added so far.
+
+        Does not change the state; more data can be added afterwards.
+        """
+        tail = add_sha2_padding_tail(self._buffer,
+                                     self.block_size,
+                                     offset=self._count - len(self._buffer),
+                                     length_bytes=2 * self._word_size)
+        value = self._value
+        for i in range(0, len(tail), self.block_size):
+            value = self._compress(
+                value,
+                _split(tail[i:i + self.block_size], self._word_size))
+        return _combine(value, self._word_size)[:self.digest_size]
+
+    def hexdigest(self) -> str:
+        """Return the hash of the data added so far as a hex string."""
+        return self.digest().hex()
+
+    def copy(self) -> 'SHA2Hash':
+        """Create copy of this hash."""
+        result = SHA2Hash(self.name)
+        result._value = list(self._value)
+        result._count = self._count
+        result._buffer = self._buffer
+        return result
+
+    def export_state(self) -> bytes:
+        """Serialize the state of the hash.
+
+        The format consists of a magic value, a version byte, the variant
+        ID, the number of bytes added so far (64-bit big endian), the
+        chaining value and the unprocessed buffer.
+        """
+        return b''.join([
+            _SHA2_STATE_MAGIC,
+            bytes([_SHA2_STATE_VERSION, self._id]),
+            self._count.to_bytes(8, byteorder='big'),
+            _combine(self._value, self._word_size),
+            self._buffer,
+        ])
+
+    def import_state(self, state: bytes):
+        """Restore a state serialized by ``export_state()``.
+
+        The state must have been exported by a hash of the same variant.
+        """
+        value_len = 8 * self._word_size
+        if (len(state) < 12 + value_len or
+                state[:2] != _SHA2_STATE_MAGIC or
+                state[2] != _SHA2_STATE_VERSION):
+            raise ValueError('Invalid SHA-2 state')
+        if state[3] != self._id:
+            raise ValueError('SHA-2 state was not exported by {0}'.format(
+                self.name))
+        count = int.from_bytes(state[4:12], byteorder='big')
+        buffer = state[12 + value_len:]
+        if len(buffer) != count % self.block_size:
+            raise ValueError('Invalid SHA-2 state')
+        self._count = count
+        self._value = _split(state[12:12 + value_len], self._word_size)
+        self._buffer = bytes(buffer)
@@ -1,5 +1,13 @@
 """
-Implements the SHA-3 hash and extendenable output functions.
+Implements the SHA-3 hash and extendenable output functions, both as
+one-shot functions and as incremental hash objects with an interface
+similar to ``hashlib``, as well as cSHAKE, TupleHash, ParallelHash and KMAC
+from NIST SP 800-185.
+
+The block hashes of ParallelHash are independent of each other and can be
+computed on a process pool. KMAC keeps the sponge states after absorbing
+the key for the most recently used keys, so that MACs under the same key do
+not need to absorb the key again.
 
 WARNING: These implementations are for educational purposes.
          DO NOT use them for real-world applications!
@@ -10,6 +18,9 @@ This file is BSD licensed under the Simplified BSD License
 (see https://opensource.org/licenses/BSD-2-Clause).
 """
 
+import collections
+import concurrent.futures
+import threading
 import typing
 
 from . import keccak
@@ -59,3 +70,327 @@ sha_3_512 = _create_hash(576, 512)
 
 shake128 = _create_shake(1344)
 shake256 = _create_shake(1088)
+
+
+_SHA3_VARIANTS = {
+    'sha_3_224': (1152, 224),
+    'sha_3_256': (1088, 256),
+    'sha_3_384': (832, 384),
+    'sha_3_512': (576, 512),
+}
+
+_SHAKE_VARIANTS = {
+    'shake128': 1344,
+    'shake256': 1088,
+}
+
+
+class SHA3Hash:
+    """
+    Incremental SHA-3 hash.
+
+    Data can be added in arbitrary chunks with ``update()``; complete
+    blocks are absorbed without copying the input. ``copy()`` only copies
+    the sponge state and the incomplete block.
+    """
+
+    def __init__(self, name: str = 'sha_3_256', data: bytes = b''):
+        if name not in _SHA3_VARIANTS:
+            raise ValueError('Unknown SHA-3 variant {0}'.format(name))
+        blocksize, result_bits = _SHA3_VARIANTS[name]
+        self.name = name
+        self.digest_size = result_bits // 8
+        self.block_size = blocksize // 8
+        self._sponge = sponge_crypto.SpongeHash(KECCAK_F,
+                                                self.block_size,
+                                                padding.add_10star1_padding)
+        if data:
+            self.update(data)
+
+    def update(self, data: bytes):
+        """Add data to the hash."""
+        self._sponge.absorb(data)
+
+    def _squeeze(self, suffix: bytes, suffix_bits: int, result_bytes: int
+                 ) -> bytes:
+        """Finalize a copy of the sponge and squeeze it."""
+        h = self._sponge.clone()
+        h.final_absorb(suffix, suffix_bits)
+        return h.squeeze(result_bytes)
+
+    def digest(self) -> bytes:
+        """Return the hash of the data added so far.
+
+        Does not change the state; more data can be added afterwards.
+        """
+        return self._squeeze(b'\x02', 2, self.digest_size)
+
+    def hexdigest(self) -> str:
+        """Return the hash of the data added so far as a hex string."""
+        return self.digest().hex()
+
+    def copy(self) -> 'SHA3Hash':
+        """Create copy of this hash."""
+        result = self.__class__.__new__(self.__class__)
+        result.__dict__.update(self.__dict__)
+        result._sponge = self._sponge.clone()
+        return result
+
+
+class SHAKEHash(SHA3Hash):
+    """
+    Incremental SHAKE extendable output function (XOF).
+
+    Behaves like ``SHA3Hash``, except that ``digest()`` and ``hexdigest()``
+    need the number of output bytes.
+    """
+
+    def __init__(self, name: str = 'shake128', data: bytes = b''):
+        if name not in _SHAKE_VARIANTS:
+            raise ValueError('Unknown SHAKE variant {0}'.format(name))
+        self.name = name
+        self.digest_size = 0
+        self.block_size = _SHAKE_VARIANTS[name] // 8
+        self._sponge = sponge_crypto.SpongeHash(KECCAK_F,
+                                                self.block_size,
+                                                padding.add_10star1_padding)
+        if data:
+            self.update(data)
+
+    def digest(self, length: int) -> bytes:
+        """Return ``length`` bytes of output for the data added so far.
+
+        Does not change the state; more data can be added afterwards.
+        """
+        return self._squeeze(b'\x0F', 4, length)
+
+    def hexdigest(self, length: int) -> str:
+        """Return ``length`` bytes of output as a hex string."""
+        return self.digest(length).hex()
+
+    def reader(self) -> sponge_crypto.SpongeReader:
+        """Return a reader for the output of the data added so far.
+
+        The output is squeezed lazily while reading. Does not change the
+        state; more data can be added afterwards.
+        """
+        h = self._sponge.clone()
+        h.final_absorb(b'\x0F', 4)
+        return sponge_crypto.SpongeReader(h)
+
+
+def left_encode(value: int) -> bytes:
+    """Encode a non-negative integer as in SP 800-185, prefixed by length."""
+    encoded = value.to_bytes(max(1, (value.bit_length() + 7) // 8),
+                             byteorder='big')
+    return bytes([len(encoded)]) + encoded
+
+
+def right_encode(value: int) -> bytes:
+    """Encode a non-negative integer as in SP 800-185, followed by length."""
+    encoded = value.to_bytes(max(1, (value.bit_length() + 7) // 8),
+                             byteorder='big')
+    return encoded + bytes([len(encoded)])
+
+
+def encode_string(value: bytes) -> bytes:
+    """Encode a byte string as in SP 800-185, prefixed by its bit length."""
+    return left_encode(len(value) * 8) + value
+
+
+def bytepad(value: bytes, w: int) -> bytes:
+    """Prefix with ``left_encode(w)`` and pad with zeros to a multiple of w."""
+    result = left_encode(w) + value
+    return result + b'\x00' * (-len(result) % w)
+
+
+def _create_cshake_sponge(blocksize: int,
+                          function_name: bytes,
+                          customization: bytes
+                          ) -> sponge_crypto.SpongeHash:
+    """Create sponge for cSHAKE with given rate in bytes.
+
+    If both ``function_name`` and ``customization`` are empty, cSHAKE is
+    SHAKE; this has to be taken into account by the final padding.
+    """
+    h = sponge_crypto.SpongeHash(KECCAK_F,
+                                 blocksize,
+                                 padding.add_10star1_padding)
+    if function_name or customization:
+        h.absorb(bytepad(encode_string(function_name) +
+                         encode_string(customization), blocksize))
+    return h
+
+
+def _cshake_squeeze(h: sponge_crypto.SpongeHash,
+                    is_shake: bool,
+                    result_bytes: int) -> bytes:
+    """Finalize a sponge created by ``_create_cshake_sponge()``."""
+    if is_shake:
+        h.final_absorb(b'\x0F', 4)
+    else:
+        h.final_absorb(b'\x00', 2)
+    return h.squeeze(result_bytes)
+
+
+def _cshake(blocksize: int,
+            msg: bytes,
+            result_bytes: int,
+            function_name: bytes = b'',
+            customization: bytes = b'') -> bytes:
+    """Evaluate cSHAKE with given rate in bytes."""
+    h = _create_cshake_sponge(blocksize, function_name, customization)
+    h.absorb(msg)
+    return _cshake_squeeze(h,
+                           not function_name and not customization,
+                           result_bytes)
+
+
+def _create_cshake(blocksize: int
+                   ) -> typing.Callable[[bytes, int, bytes, bytes], bytes]:
+    """Create customizable SHAKE (cSHAKE) function based on Keccak-f."""
+    blocksize = blocksize // 8
+
+    def f(msg: bytes,
+          result_bytes: int,
+          function_name: bytes = b'',
+          customization: bytes = b'') -> bytes:
+        return _cshake(blocksize,
+                       msg,
+                       result_bytes,
+                       function_name,
+                       customization)
+
+    return f
+
+
+def _create_tuple_hash(blocksize: int
+                       ) -> typing.Callable[[typing.Sequence[bytes],
+                                             int,
+                                             bytes], bytes]:
+    """Create TupleHash function based on cSHAKE."""
+    blocksize = blocksize // 8
+
+    def f(items: typing.Sequence[bytes],
+          result_bytes: int,
+          customization: bytes = b'') -> bytes:
+        h = _create_cshake_sponge(blocksize, b'TupleHash', customization)
+        for item in items:
+            h.absorb(encode_string(item))
+        h.absorb(right_encode(result_bytes * 8))
+        return _cshake_squeeze(h, False, result_bytes)
+
+    return f
+
+
+# Minimal number of bytes hashed per worker task of ParallelHash
+_PARALLEL_HASH_BATCH_SIZE = 1 << 18
+
+
+def _parallel_hash_blocks(blocksize: int,
+                          chaining_bytes: int,
+                          blocks: typing.List[bytes]) -> bytes:
+    """Hash blocks of ParallelHash; return the concatenated chaining
+    values."""
+    return b''.join([_cshake(blocksize, block, chaining_bytes)
+                     for block in blocks])
+
+
+def _create_parallel_hash(blocksize: int, security_bits: int
+                          ) -> typing.Callable[[bytes, int, int, bytes, int],
+                                               bytes]:
+    """Create ParallelHash function based on cSHAKE."""
+    blocksize = blocksize // 8
+    chaining_bytes = 2 * security_bits // 8
+
+    def f(msg: bytes,
+          block_size: int,
+          result_bytes: int,
+          customization: bytes = b'',
+          processes: int = 1) -> bytes:
+        if block_size <= 0:
+            raise ValueError('Block size must be positive')
+        h = _create_cshake_sponge(blocksize, b'ParallelHash', customization)
+        h.absorb(left_encode(block_size))
+        blocks = [msg[i:i + block_size]
+                  for i in range(0, len(msg), block_size)]
+        batch = max(1, _PARALLEL_HASH_BATCH_SIZE // block_size)
+        if processes <= 1 or len(blocks) <= batch:
+            h.absorb(_parallel_hash_blocks(blocksize, chaining_bytes, blocks))
+        else:
+            batches = [blocks[i:i + batch]
+                       for i in range(0, len(blocks), batch)]
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=processes) as executor:
+                # map() returns the results in order
+                for chaining_values in executor.map(
+                        _parallel_hash_blocks,
+                        [blocksize] * len(batches),
+                        [chaining_bytes] * len(batches),
+                        batches):
+                    h.absorb(chaining_values)
+        h.absorb(right_encode(len(blocks)))
+        h.absorb(right_encode(result_bytes * 8))
+        return _cshake_squeeze(h, False, result_bytes)
+
+    return f
+
+
+# Number of keyed KMAC sponge states kept
+_KMAC_CACHE_SIZE = 64
+
+# Maps (blocksize, key, customization) to the sponge after absorbing the
+# key; guarded by _kmac_cache_lock
+_kmac_cache = collections.OrderedDict(
+)  # type: typing.MutableMapping[typing.Tuple[int, bytes, bytes], typing.Any]
+_kmac_cache_lock = threading.Lock()
+
+
+def _kmac_keyed_sponge(blocksize: int,
+                       key: bytes,
+                       customization: bytes) -> sponge_crypto.SpongeHash:
+    """Return a fresh copy of the KMAC sponge with ``key`` absorbed."""
+    cache_key = (blocksize, bytes(key), bytes(customization))
+    with _kmac_cache_lock:
+        h = _kmac_cache.get(cache_key)
+        if h is not None:
+            _kmac_cache.move_to_end(cache_key)
+    if h is None:
+        h = _create_cshake_sponge(blocksize, b'KMAC', customization)
+        h.absorb(bytepad(encode_string(key), blocksize))
+        with _kmac_cache_lock:
+            _kmac_cache[cache_key] = h
+            while len(_kmac_cache) > _KMAC_CACHE_SIZE:
+                _kmac_cache.popitem(last=False)
+    # Cached sponges are never changed, only cloned
+    return h.clone()
+
+
+def _create_kmac(blocksize: int
+                 ) -> typing.Callable[[bytes, bytes, int, bytes], bytes]:
+    """Create KMAC function based on cSHAKE."""
+    blocksize = blocksize // 8
+
+    def f(key: bytes,
+          msg: bytes,
+          result_bytes: int,
+          customization: bytes = b'') -> bytes:
+        h = _kmac_keyed_sponge(blocksize, key, customization)
+        h.absorb(msg)
+        h.absorb(right_encode(result_bytes * 8))
+        return _cshake_squeeze(h, False, result_bytes)
+
+    return f
+
+
+cshake128 = _create_cshake(1344)
+cshake256 = _create_cshake(1088)
+
+tuple_hash128 = _create_tuple_hash(1344)
+tuple_hash256 = _create_tuple_hash(1088)
+
+parallel_hash128 = _create_parallel_hash(1344, 128)
+parallel_hash256 = _create_parallel_hash(1088, 256)
+
+kmac128 = _create_kmac(1344)
+kmac256 = _create_kmac(1088)
@@ -18,6 +18,8 @@ import typing
 
 import six
 
+from . import padding as _padding
+
 
 @six.add_metaclass(abc.ABCMeta)
 class State:
@@ -29,6 +31,7 @@ class State:
     def from_bytes(self, value: bytes):
         """Incorporate bytes into state via XOR.
 
+        ``value`` can be any bytes-like object, for example a memoryview.
         Must not exceed size of state."""
 
     @abc.abstractmethod
@@ -39,6 +42,12 @@ class State:
     def clone(self) -> 'State':
         """Create copy of this state."""
 
+    def extract(self, number_of_bytes: int) -> bytes:
+        """Return the first ``number_of_bytes`` bytes of ``to_bytes()``.
+
+        States can override this to avoid converting the whole state."""
+        return self.to_bytes()[:number_of_bytes]
+
 
 @six.add_metaclass(abc.ABCMeta)
 class F:
@@ -77,10 +86,19 @@ class Sponge:
 
     def squeeze(self) -> bytes:
         """Squeeze a block out of the sponge."""
-        result = self._state.to_bytes()[:self._blocksize]
+        result = self._state.extract(self._blocksize)
         self._f(self._state)
         return result
 
+    def export_state(self) -> bytes:
+        """Return the state of f as a byte string."""
+        return self._state.to_bytes()
+
+    def import_state(self, state: bytes):
+        """Replace the state of f by one returned by ``export_state()``."""
+        self._state = self._f.new_state()
+        self._state.from_bytes(state)
+
     def clone(self) -> 'Sponge':
         """Create copy of this sponge."""
         result = Sponge(self._f, self._blocksize)
@@ -88,10 +106,83 @@ class Sponge:
         return result
 
 
+# Padding functions of this package which only depend on the bit length of
+# the data; their templates are shared by all users
+_LENGTH_ONLY_PADDINGS = frozenset([
+    _padding.add_10star_padding,
+    _padding.add_10star1_padding,
+    _padding.add_0110star1_padding,
+])
+
+# Maps (padding, blocksize) for the paddings in _LENGTH_ONLY_PADDINGS to a
+# mapping from (bitlength, last_byte) to the result of padding_template()
+_PADDING_TEMPLATES = {
+}  # type: typing.Dict[typing.Tuple[typing.Callable, int], typing.Dict]
+
+# Maximal number of padding templates cached per padding and blocksize
+_MAX_PADDING_TEMPLATES = 4096
+
+
+def _padding_template(padding: typing.Callable[[bytes, int], bytes],
+                      blocksize: int,
+                      bitlength: int,
+                      last_byte: int) -> bytes:
+    """Pad data whose complete bytes are zero."""
+    data = bytes(bitlength // 8)
+    if bitlength % 8:
+        data += bytes([last_byte])
+    return padding(data, blocksize, bitlength)
+
+
+def padding_templates(padding: typing.Callable[[bytes, int], bytes],
+                      blocksize: int) -> typing.Dict:
+    """Return a cache for results of ``padding_template()``.
+
+    For the padding functions from the ``padding`` module, which only depend
+    on the bit length, the cache is shared; for other functions, a new cache
+    is returned.
+    """
+    if padding not in _LENGTH_ONLY_PADDINGS:
+        return {}
+    return _PADDING_TEMPLATES.setdefault((padding, blocksize), {})
+
+
+def padding_template(padding: typing.Callable[[bytes, int], bytes],
+                     blocksize: int,
+                     bitlength: int,
+                     last_byte: int = 0,
+                     templates: typing.Optional[typing.Dict] = None
+                     ) -> bytes:
+    """Return the padding of data of ``bitlength`` bits whose complete
+    bytes are zero.
+
+    ``last_byte`` is the incomplete last byte of the data if ``bitlength``
+    is not a multiple of 8. If the padding only depends on the bit length,
+    padding data is equivalent to XORing its complete bytes into this
+    result. Results are cached in ``templates``, which defaults to
+    ``padding_templates(padding, blocksize)``.
+    """
+    if templates is None:
+        templates = padding_templates(padding, blocksize)
+    template = templates.get((bitlength, last_byte))
+    if template is None:
+        template = _padding_template(padding, blocksize, bitlength, last_byte)
+        if len(templates) >= _MAX_PADDING_TEMPLATES:
+            templates.clear()
+        templates[bitlength, last_byte] = template
+    return template
+
+
 class DuplexSponge:
     """
     Provides a duplex sponge function given a sponge f function, blocksize and
     a padding function.
+
+    The padding function must only append bits which depend on the bit
+    length of the data. Padded blocks are cached per bit length, so padding
+    does not need to be computed for every ``duplex()`` call. The cache is
+    shared by all duplex sponges for the paddings from the ``padding``
+    module, and by a duplex sponge and its clones otherwise.
     """
 
     def __init__(self,
@@ -102,6 +193,16 @@ class DuplexSponge:
         self._state = f.new_state()
         self._blocksize = blocksize
         self._padding = padding
+        self._templates = padding_templates(padding, blocksize)
+
+    def _get_template(self, bitlength: int, last_byte: int) -> bytes:
+        """Compute and cache the padding template for data of given
+        length."""
+        template = padding_template(
+            self._padding, self._blocksize, bitlength, last_byte,
+            self._templates)
+        assert len(template) <= self._blocksize
+        return template
 
     def duplex(self,
                data: bytes,
@@ -112,23 +213,53 @@ class DuplexSponge:
         The data block must be small enough that padding(data) fits into
         blocksize. Also result_bytes must not exceed blocksize.
         """
+        if input_bitlength is None:
+            input_bitlength = len(data) * 8
+        complete_bytes, remaining_bits = divmod(input_bitlength, 8)
+        last_byte = data[complete_bytes] if remaining_bits else 0
+        template = self._templates.get((input_bitlength, last_byte))
+        if template is None:
+            template = self._get_template(input_bitlength, last_byte)
+        if len(data) > complete_bytes:
+            data = data[:complete_bytes]
+        return self._duplex(data, template, result_bytes)
+
+    def duplex_with_bit(self,
+                        data: bytes,
+                        bit: int,
+                        result_bytes: int = None):
+        """Adds a block of data followed by one bit, and retrieves a number
+        of bytes.
+
+        Equivalent to ``duplex(data + bytes([bit]), result_bytes,
+        len(data) * 8 + 1)``, but without copying the data.
+        """
+        bitlength = len(data) * 8 + 1
+        template = self._templates.get((bitlength, bit))
+        if template is None:
+            template = self._get_template(bitlength, bit)
+        return self._duplex(data, template, result_bytes)
+
+    def _duplex(self, data: bytes, template: bytes, result_bytes: int):
+        """Incorporate data and padding template, apply f and retrieve."""
         if result_bytes is None:
             result_bytes = self._blocksize
         else:
             assert result_bytes <= self._blocksize
         # Incorporate data
-        data = self._padding(data, self._blocksize, input_bitlength)
-        assert len(data) <= self._blocksize
-        self._state.from_bytes(data)
+        if data:
+            self._state.from_bytes(data)
+        self._state.from_bytes(template)
         # Apply f
         self._f(self._state)
         # Retrieve data
         if result_bytes > 0:
-            return self._state.to_bytes()[:result_bytes]
+            return self._state.extract(result_bytes)
         return b''
 
     def clone(self) -> 'DuplexSponge':
         """Create copy of this duplex sponge."""
         result = DuplexSponge(self._f, self._blocksize, self._padding)
+        result._templates = self._templates
         result._state = self._state.clone()
         return result
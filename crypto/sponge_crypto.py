@@ -13,11 +13,17 @@ This file is BSD licensed under the Simplified BSD License
 (see https://opensource.org/licenses/BSD-2-Clause).
 """
 
+import collections
 import typing
 
+from .padding import get_tail_padding
 from .sponge import F, Sponge, DuplexSponge
 
 
+_SPONGE_HASH_STATE_MAGIC = b'SP'
+_SPONGE_HASH_STATE_VERSION = 1
+
+
 class SpongeHash:
     """
     Provides a hash function given a sponge f function, parameters and a
@@ -32,34 +38,58 @@ class SpongeHash:
         self._sponge = Sponge(f, blocksize)
         self._blocksize = blocksize
         self._padding = padding
-        self._buffer = b''
+        self._tail_padding = get_tail_padding(padding)
+        # Preallocated buffer for the incomplete block
+        self._buffer = bytearray(blocksize)
+        self._buffer_len = 0
         self._absorbing = True
 
-    def _process_buffer(self):
-        last_index = 0
-        for i in range(self._blocksize,
-                       len(self._buffer) + 1,
-                       self._blocksize):
-            self._sponge.absorb(self._buffer[i - self._blocksize:i])
-            last_index = i
-        self._buffer = self._buffer[last_index:]
-
     def absorb(self, data: bytes):
-        """Adds block of data. More data must be coming."""
+        """Adds block of data. More data must be coming.
+
+        Complete blocks are absorbed directly from ``data``; only an
+        incomplete block at the end is buffered."""
         assert self._absorbing
-        self._buffer += data
-        if len(self._buffer) >= self._blocksize:
-            self._process_buffer()
+        view = memoryview(data).cast('B')
+        blocksize = self._blocksize
+        start = 0
+        if self._buffer_len:
+            buffer_len = self._buffer_len
+            start = min(len(view), blocksize - buffer_len)
+            self._buffer[buffer_len:buffer_len + start] = view[:start]
+            self._buffer_len += start
+            if self._buffer_len < blocksize:
+                return
+            self._sponge.absorb(self._buffer)
+            self._buffer_len = 0
+        end = len(view) - (len(view) - start) % blocksize
+        for i in range(start, end, blocksize):
+            self._sponge.absorb(view[i:i + blocksize])
+        self._buffer_len = len(view) - end
+        self._buffer[:self._buffer_len] = view[end:]
 
     def final_absorb(self, data: bytes, bitlength: int = None):
-        """Adds a final block of data. No more data must be coming."""
+        """Adds a final block of data. No more data must be coming.
+
+        Only the last incomplete block is padded. The padding must only
+        depend on the length of the data modulo the blocksize."""
+        assert self._absorbing
+        view = memoryview(data).cast('B')
         if bitlength is None:
-            bitlength = len(data) * 8
-        bitlength += len(self._buffer) * 8
-        self._buffer += data
-        self._buffer = self._padding(self._buffer, self._blocksize, bitlength)
-        self._process_buffer()
-        assert len(self._buffer) == 0
+            bitlength = len(view) * 8
+        complete_bytes = bitlength // 8
+        self.absorb(view[:complete_bytes])
+        tail = b''.join([
+            self._buffer[:self._buffer_len],
+            view[complete_bytes:(bitlength + 7) // 8],
+        ])
+        data = self._tail_padding(tail,
+                                  self._blocksize,
+                                  self._buffer_len * 8 + bitlength % 8)
+        assert len(data) % self._blocksize == 0
+        for i in range(0, len(data), self._blocksize):
+            self._sponge.absorb(data[i:i + self._blocksize])
+        self._buffer_len = 0
         self._absorbing = False
 
     def squeeze(self, number_of_bytes=None) -> bytes:
@@ -78,10 +108,275 @@ class SpongeHash:
             result[-1] = result[-1][:-(result_len - number_of_bytes)]
         return b''.join(result)
 
+    def export_state(self) -> bytes:
+        """Serialize the state of the sponge-based hash.
+
+        The format consists of a magic value, a version byte, a phase byte
+        (1 while absorbing, 0 while squeezing), the blocksize and the buffer
+        length (16-bit big endian each), the state of f and the buffer.
+        """
+        return b''.join([
+            _SPONGE_HASH_STATE_MAGIC,
+            bytes([_SPONGE_HASH_STATE_VERSION, int(self._absorbing)]),
+            self._blocksize.to_bytes(2, byteorder='big'),
+            self._buffer_len.to_bytes(2, byteorder='big'),
+            self._sponge.export_state(),
+            self._buffer[:self._buffer_len],
+        ])
+
+    def import_state(self, state: bytes):
+        """Restore a state serialized by ``export_state()``.
+
+        The state must have been exported by a sponge-based hash with the
+        same f function, blocksize and padding.
+        """
+        if (len(state) < 8 or
+                state[:2] != _SPONGE_HASH_STATE_MAGIC or
+                state[2] != _SPONGE_HASH_STATE_VERSION or
+                state[3] not in (0, 1)):
+            raise ValueError('Invalid sponge hash state')
+        if int.from_bytes(state[4:6], byteorder='big') != self._blocksize:
+            raise ValueError('Sponge hash state has different blocksize')
+        buffer_len = int.from_bytes(state[6:8], byteorder='big')
+        if buffer_len >= self._blocksize or len(state) < 8 + buffer_len:
+            raise ValueError('Invalid sponge hash state')
+        f_state = state[8:len(state) - buffer_len]
+        if len(f_state) != len(self._f.new_state().to_bytes()):
+            raise ValueError('Sponge hash state has different state size')
+        self._absorbing = state[3] == 1
+        self._sponge.import_state(f_state)
+        self._buffer[:buffer_len] = state[len(state) - buffer_len:]
+        self._buffer_len = buffer_len
+
     def clone(self) -> 'SpongeHash':
         """Create copy of this sponge-based hash."""
         result = SpongeHash(self._f, self._blocksize, self._padding)
         result._sponge = self._sponge.clone()
+        result._buffer = bytearray(self._buffer)
+        result._buffer_len = self._buffer_len
+        result._absorbing = self._absorbing
+        return result
+
+
+class SpongeHashPrefixCache:
+    """
+    Caches sponge-based hashes after absorbing common prefixes.
+
+    ``new(prefix)`` returns a ``SpongeHash`` which has absorbed ``prefix``;
+    only the remaining data has to be absorbed. Prefixes added with
+    ``register()`` are cached immediately, other prefixes once they have
+    been requested ``min_uses`` times. The least recently used entries are
+    evicted once the cached prefixes and states take more than
+    ``max_bytes`` bytes.
+    """
+
+    # Number of uncached prefixes whose use is counted
+    _MAX_TRACKED = 1024
+
+    def __init__(self,
+                 f: F,
+                 blocksize: int,
+                 padding: typing.Callable[[bytes, int], bytes],
+                 max_bytes: int = 1 << 20,
+                 min_uses: int = 2):
+        self._f = f
+        self._blocksize = blocksize
+        self._padding = padding
+        self._max_bytes = max_bytes
+        self._min_uses = min_uses
+        self._entry_overhead = len(f.new_state().to_bytes()) + blocksize
+        self._entries = collections.OrderedDict(
+        )  # type: typing.MutableMapping[bytes, SpongeHash]
+        self._uses = collections.OrderedDict(
+        )  # type: typing.MutableMapping[bytes, int]
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.saved_permutations = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """The fraction of ``new()`` calls served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _absorb_prefix(self, prefix: bytes) -> SpongeHash:
+        h = SpongeHash(self._f, self._blocksize, self._padding)
+        h.absorb(prefix)
+        return h
+
+    def _store(self, prefix: bytes, h: SpongeHash):
+        cost = len(prefix) + self._entry_overhead
+        if cost > self._max_bytes:
+            return
+        self._uses.pop(prefix, None)
+        self._entries[prefix] = h
+        self.size += cost
+        while self.size > self._max_bytes:
+            evicted, dummy = self._entries.popitem(last=False)
+            self.size -= len(evicted) + self._entry_overhead
+
+    def register(self, prefix: bytes):
+        """Absorb ``prefix`` and cache the result."""
+        prefix = bytes(prefix)
+        if prefix not in self._entries:
+            self._store(prefix, self._absorb_prefix(prefix))
+
+    def new(self, prefix: bytes = b'') -> SpongeHash:
+        """Return a sponge-based hash which has absorbed ``prefix``."""
+        prefix = bytes(prefix)
+        h = self._entries.get(prefix)
+        if h is not None:
+            self._entries.move_to_end(prefix)
+            self.hits += 1
+            self.saved_permutations += len(prefix) // self._blocksize
+            return h.clone()
+        self.misses += 1
+        h = self._absorb_prefix(prefix)
+        uses = self._uses.pop(prefix, 0) + 1
+        if uses >= self._min_uses:
+            self._store(prefix, h.clone())
+        else:
+            self._uses[prefix] = uses
+            if len(self._uses) > self._MAX_TRACKED:
+                self._uses.popitem(last=False)
+        return h
+
+    def clear(self):
+        """Remove all cached states and reset the counters."""
+        self._entries.clear()
+        self._uses.clear()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.saved_permutations = 0
+
+
+class SpongeReader:
+    """
+    Reads the output of a sponge-based hash lazily.
+
+    The sponge must have been finalized with ``final_absorb()``. Output is
+    squeezed one block at a time when it is needed, so reading does not
+    need memory proportional to the total output length, and reading more
+    output later continues where the previous read stopped.
+
+    Iterating over the reader yields the output in pieces of at most one
+    block; the iteration never ends.
+    """
+
+    def __init__(self, sponge: SpongeHash):
+        self._sponge = sponge
+        self._block = b''
+        self._offset = 0
+
+    def readinto(self, buffer) -> int:
+        """Fill the writable bytes-like object ``buffer`` with output.
+
+        Returns the number of bytes written, which is ``len(buffer)``."""
+        view = memoryview(buffer).cast('B')
+        position = 0
+        while position < len(view):
+            if self._offset == len(self._block):
+                self._block = self._sponge.squeeze()
+                self._offset = 0
+            count = min(len(view) - position, len(self._block) - self._offset)
+            view[position:position + count] = (
+                self._block[self._offset:self._offset + count])
+            self._offset += count
+            position += count
+        return position
+
+    def read(self, number_of_bytes: int) -> bytes:
+        """Return the next ``number_of_bytes`` bytes of output."""
+        result = bytearray(number_of_bytes)
+        self.readinto(result)
+        return bytes(result)
+
+    def __iter__(self) -> 'SpongeReader':
+        return self
+
+    def __next__(self) -> bytes:
+        if self._offset == len(self._block):
+            self._block = self._sponge.squeeze()
+            self._offset = 0
+        result = self._block[self._offset:]
+        self._offset = len(self._block)
+        return result
+
+
+# A duplex call of the AEAD cipher: data, frame bit (or None if the data is
+# not followed by a frame bit) and number of bytes to retrieve
+DuplexRequest = typing.Tuple[bytes, typing.Optional[int], int]
+
+
+def split_blocks(data: bytes, blocksize: int) -> typing.List[bytes]:
+    """Split data into blocks; empty data gives one empty block."""
+    result = [data[i:i + blocksize] for i in range(0, len(data), blocksize)]
+    if not result:
+        result.append(b'')
+    return result
+
+
+def duplex_request(sponge: DuplexSponge, request: DuplexRequest) -> bytes:
+    """Carry out a duplex call requested by ``sponge_aead_program()``."""
+    block, bit, result_bytes = request
+    if bit is None:
+        return sponge.duplex(block, result_bytes)
+    return sponge.duplex_with_bit(block, bit, result_bytes)
+
+
+def sponge_aead_program(cipher_blocksize: int,
+                        tag_length: int,
+                        header: bytes,
+                        decrypt: bool,
+                        output: typing.List[bytes],
+                        key: typing.Optional[bytes] = None
+                        ) -> typing.Generator[
+                            typing.Optional[DuplexRequest],
+                            typing.Optional[bytes],
+                            bytes]:
+    """Frame one message of the sponge-based AEAD cipher.
+
+    Yields the duplex calls as ``DuplexRequest`` and receives their results.
+    Yields ``None`` to receive the next data block, or ``None`` after the
+    last one; empty data must be sent as one empty block. The encryption
+    resp. decryption of every data block is appended to ``output``. Returns
+    the tag.
+
+    If ``key`` is given, it is absorbed first; otherwise the duplex sponge
+    must already be keyed.
+    """
+    if key is not None:
+        # Feed in key
+        for block in split_blocks(key, cipher_blocksize):
+            yield block, None, 0
+    # Feed in header (except last block)
+    header_blocks = split_blocks(header, cipher_blocksize)
+    for block in header_blocks[:-1]:
+        yield block, 0, 0
+    last = header_blocks[-1]
+    # Encrypt or decrypt data
+    while True:
+        block = yield None
+        if block is None:
+            break
+        res = yield last, 1, len(block)
+        result = (int.from_bytes(block, byteorder='little') ^
+                  int.from_bytes(res, byteorder='little')
+                  ).to_bytes(len(block), byteorder='little')
+        output.append(result)
+        last = result if decrypt else block
+    # Compute tag
+    tag = []
+    computed_length = 0
+    while computed_length < tag_length:
+        b = min(cipher_blocksize, tag_length - computed_length)
+        res = yield last, 0, b
+        tag.append(res)
+        computed_length += len(res)
+        last = b''
+    return b''.join(tag)
 
 
 class SpongeAEAD:
@@ -103,16 +398,42 @@ class SpongeAEAD:
         self._tag_length = tag_length
         self._padding = padding
 
-    def _split(self, data: bytes):
-        result = []
-        for i in range(0, len(data), self._cipher_blocksize):
-            result.append(data[i:i + self._cipher_blocksize])
-        if not result:
-            result.append(b'')
-        return result
+    def _new_sponge(self, key: 'typing.Union[bytes, SpongeAEADKey]'
+                    ) -> DuplexSponge:
+        """Create a duplex sponge which has absorbed ``key``."""
+        if isinstance(key, SpongeAEADKey):
+            if key._aead is not self:
+                raise ValueError('Key was prepared for a different cipher')
+            return key._sponge.clone()
+        sponge = DuplexSponge(self._f, self._sponge_blocksize, self._padding)
+        # Feed in key
+        for block in split_blocks(key, self._cipher_blocksize):
+            sponge.duplex(block, 0)
+        return sponge
+
+    def prepare_key(self, key: bytes) -> 'SpongeAEADKey':
+        """Absorb a private ``key`` once for use with many messages.
+
+        The result can be used as ``key`` for all methods of this cipher
+        and gives the same results as ``key`` itself, without absorbing
+        the key again for every message."""
+        return SpongeAEADKey(self, key)
+
+    def wrap_session(self, key: 'typing.Union[bytes, SpongeAEADKey]'
+                     ) -> 'SpongeWrap':
+        """Create a session encrypting several messages in a row."""
+        return SpongeWrap(self, key)
+
+    def encryptor(self) -> 'SpongeAEADEncryptor':
+        """Create an incremental encryption session."""
+        return SpongeAEADEncryptor(self)
+
+    def decryptor(self) -> 'SpongeAEADDecryptor':
+        """Create an incremental decryption session."""
+        return SpongeAEADDecryptor(self)
 
     def encrypt_and_tag(self,
-                        key: bytes,
+                        key: 'typing.Union[bytes, SpongeAEADKey]',
                         header: bytes,
                         data: bytes) -> typing.Tuple[bytes, bytes]:
         """
@@ -120,40 +441,17 @@ class SpongeAEAD:
 
         Returns a tuple ``(ciphertext, tag)``, where ``ciphertext`` is the
         encryption of ``data`` and where ``tag`` authenticates both ``header``
-        and ``data``.
+        and ``data``. ``key`` can also be a key prepared with
+        ``prepare_key()``.
         """
-        sponge = DuplexSponge(self._f, self._sponge_blocksize, self._padding)
-        # Feed in key
-        for block in self._split(key):
-            sponge.duplex(block, 0)
-        # Feed in header (except last block)
-        header_blocks = self._split(header)
-        for block in header_blocks[:-1]:
-            sponge.duplex(block + b'\x00', 0, len(block) * 8 + 1)
-        last = header_blocks[-1]
-        # Encrypt data
-        encryption = []
-        for block in self._split(data):
-            res = sponge.duplex(last + b'\x01', len(block), len(last) * 8 + 1)
-            encryption.append(bytes(a ^ b for a, b in zip(block, res)))
-            last = block
-        # Compute tag
-        tag = []
-        tag_length = 0
-        last_bitlength = len(last) * 8 + 1
-        last += b'\x00'
-        while tag_length < self._tag_length:
-            b = min(self._cipher_blocksize, self._tag_length - tag_length)
-            res = sponge.duplex(last, b, last_bitlength)
-            tag.append(res)
-            tag_length += len(res)
-            last = b'\x00'
-            last_bitlength = 1
-        # Return result
-        return b''.join(encryption), b''.join(tag)
+        session = self.encryptor()
+        session.start(key, header)
+        encryption = session.update(data)
+        rest, tag = session.finalize()
+        return encryption + rest, tag
 
     def decrypt_and_authenticate(self,
-                                 key: bytes,
+                                 key: 'typing.Union[bytes, SpongeAEADKey]',
                                  header: bytes,
                                  encrypted_data: bytes,
                                  tag: bytes) -> typing.Tuple[bytes, bytes]:
@@ -164,36 +462,200 @@ class SpongeAEAD:
         Returns the cleartext data on success, and raises an exception in case
         the tag does not match.
         """
-        sponge = DuplexSponge(self._f, self._sponge_blocksize, self._padding)
-        # Feed in key
-        for block in self._split(key):
-            sponge.duplex(block, 0)
-        # Feed in header (except last block)
-        header_blocks = self._split(header)
-        for block in header_blocks[:-1]:
-            sponge.duplex(block + b'\x00', 0, len(block) * 8 + 1)
-        last = header_blocks[-1]
-        # Decrypt data
-        decryption = []
-        for block in self._split(encrypted_data):
-            res = sponge.duplex(last + b'\x01', len(block), len(last) * 8 + 1)
-            decrypted_block = bytes(a ^ b for a, b in zip(block, res))
-            decryption.append(decrypted_block)
-            last = decrypted_block
-        # Compute tag
-        computed_tag = []
-        computed_tag_length = 0
-        last_bitlength = len(last) * 8 + 1
-        last += b'\x00'
-        while computed_tag_length < self._tag_length:
-            b = min(self._cipher_blocksize,
-                    self._tag_length - computed_tag_length)
-            res = sponge.duplex(last, b, last_bitlength)
-            computed_tag.append(res)
-            computed_tag_length += len(res)
-            last = b'\x00'
-            last_bitlength = 1
-        # Validate tag and return result in case of success
-        if tag != b''.join(computed_tag):
+        session = self.decryptor()
+        session.start(key, header)
+        decryption = session.update(encrypted_data)
+        return decryption + session.verify(tag)
+
+
+class _SpongeAEADSession:
+    """
+    Incremental encryption or decryption with a sponge-based AEAD cipher.
+
+    Data is processed block by block as soon as a complete block is
+    available; only an incomplete block is buffered. The framing is done
+    by ``sponge_aead_program()``, whose requests are carried out on the
+    duplex sponge.
+    """
+
+    _decrypt = False
+
+    def __init__(self, aead: SpongeAEAD):
+        self._aead = aead
+        self._sponge = None  # type: typing.Optional[DuplexSponge]
+        self._program = None  # type: typing.Optional[typing.Generator]
+        self._output = []  # type: typing.List[bytes]
+        self._buffer = bytearray()
+        self._blocks = 0
+
+    def start(self,
+              key: 'typing.Union[bytes, SpongeAEADKey]',
+              header: bytes):
+        """Start a message with private ``key`` and ``header``.
+
+        ``key`` can also be a key prepared with ``prepare_key()``."""
+        self._start(self._aead._new_sponge(key), header)
+
+    def _start(self, sponge: DuplexSponge, header: bytes):
+        """Start a message on a keyed duplex sponge."""
+        aead = self._aead
+        self._sponge = sponge
+        self._output = []
+        self._program = sponge_aead_program(
+            aead._cipher_blocksize, aead._tag_length, header, self._decrypt,
+            self._output)
+        self._run(next(self._program))
+        self._buffer = bytearray()
+        self._blocks = 0
+
+    def _run(self, request: typing.Optional[DuplexRequest]
+             ) -> typing.Optional[bytes]:
+        """Carry out duplex calls until the program asks for the next block.
+
+        Returns the tag once the program is done."""
+        try:
+            while request is not None:
+                request = self._program.send(
+                    duplex_request(self._sponge, request))
+        except StopIteration as stop:
+            return stop.value
+        return None
+
+    def _process(self, block: bytes) -> bytes:
+        """Encrypt or decrypt one block."""
+        self._run(self._program.send(bytes(block)))
+        self._blocks += 1
+        return self._output.pop()
+
+    def update(self, data: bytes) -> bytes:
+        """Encrypt or decrypt more data.
+
+        Returns the output for all complete blocks processed so far."""
+        assert self._sponge is not None
+        view = memoryview(data).cast('B')
+        blocksize = self._aead._cipher_blocksize
+        result = []
+        start = 0
+        if self._buffer:
+            start = min(len(view), blocksize - len(self._buffer))
+            self._buffer += view[:start]
+            if len(self._buffer) < blocksize:
+                return b''
+            result.append(self._process(bytes(self._buffer)))
+            self._buffer = bytearray()
+        end = len(view) - (len(view) - start) % blocksize
+        for i in range(start, end, blocksize):
+            result.append(self._process(view[i:i + blocksize]))
+        self._buffer += view[end:]
+        return b''.join(result)
+
+    def _finish(self) -> typing.Tuple[bytes, bytes]:
+        """Process the last block and compute the tag.
+
+        Returns the output for the last block and the tag."""
+        assert self._sponge is not None
+        rest = b''
+        if self._buffer or self._blocks == 0:
+            rest = self._process(bytes(self._buffer))
+            self._buffer = bytearray()
+        tag = self._run(self._program.send(None))
+        self._sponge = None
+        self._program = None
+        return rest, tag
+
+
+class SpongeAEADEncryptor(_SpongeAEADSession):
+    """
+    Incremental encryption with a sponge-based AEAD cipher.
+
+    Call ``start()`` once per message, then ``update()`` with the data in
+    arbitrary chunks, and finally ``finalize()``. The concatenated output
+    and the tag are identical to ``SpongeAEAD.encrypt_and_tag()``.
+    """
+
+    def finalize(self) -> typing.Tuple[bytes, bytes]:
+        """Finish the message.
+
+        Returns a tuple ``(ciphertext, tag)``, where ``ciphertext`` is the
+        encryption of the data still buffered."""
+        return self._finish()
+
+
+class SpongeAEADDecryptor(_SpongeAEADSession):
+    """
+    Incremental decryption with a sponge-based AEAD cipher.
+
+    Call ``start()`` once per message, then ``update()`` with the encrypted
+    data in arbitrary chunks, and finally ``verify()``. Note that
+    ``update()`` returns cleartext before it has been authenticated.
+    """
+
+    _decrypt = True
+
+    def verify(self, tag: bytes) -> bytes:
+        """Finish the message and check the tag.
+
+        Returns the decryption of the data still buffered, and raises an
+        exception in case the tag does not match."""
+        rest, computed_tag = self._finish()
+        if tag != computed_tag:
             raise ValueError('Tag does not match!')
-        return b''.join(decryption)
+        return rest
+
+
+class SpongeAEADKey:
+    """
+    A private key absorbed into the duplex sponge of a sponge-based AEAD
+    cipher.
+
+    Every message starts from a copy of the keyed duplex sponge, which
+    saves absorbing the key for every message.
+    """
+
+    def __init__(self, aead: SpongeAEAD, key: bytes):
+        self._aead = aead
+        self._sponge = aead._new_sponge(key)
+
+
+class SpongeWrap:
+    """
+    Encrypts or decrypts several messages with the same duplex sponge.
+
+    Similar to SpongeWrap, the duplex sponge is keyed once and continues
+    over all messages, so the tag of every message authenticates all
+    previous messages as well. Both sides must process the messages in the
+    same order. After a failed ``unwrap()`` the session is unusable.
+    """
+
+    def __init__(self,
+                 aead: SpongeAEAD,
+                 key: 'typing.Union[bytes, SpongeAEADKey]'):
+        self._aead = aead
+        self._sponge = aead._new_sponge(key)
+
+    def wrap(self, header: bytes, data: bytes) -> typing.Tuple[bytes, bytes]:
+        """Encrypt and tag the next message.
+
+        Returns a tuple ``(ciphertext, tag)``."""
+        assert self._sponge is not None
+        session = SpongeAEADEncryptor(self._aead)
+        session._start(self._sponge, header)
+        encryption = session.update(data)
+        rest, tag = session.finalize()
+        return encryption + rest, tag
+
+    def unwrap(self, header: bytes, encrypted_data: bytes, tag: bytes
+               ) -> bytes:
+        """Decrypt and authenticate the next message.
+
+        Returns the cleartext data on success, and raises an exception in
+        case the tag does not match."""
+        assert self._sponge is not None
+        session = SpongeAEADDecryptor(self._aead)
+        session._start(self._sponge, header)
+        decryption = session.update(encrypted_data)
+        try:
+            return decryption + session.verify(tag)
+        except ValueError:
+            self._sponge = None
+            raise
@@ -0,0 +1,259 @@
+"""
+Implements a parallel sponge-based AEAD cipher in the spirit of the Motorist
+mode of Keyak, as described in G. Bertoni, J. Daemen, M. Peeters,
+G. v. Assche, R. v. Keer: "CAESAR submission: Keyak v2", 2016. Available at
+https://keccak.team/files/Keyakv2-doc2.2.pdf
+
+The data is split into blocks of the cipher blocksize, which are distributed
+round-robin over P lanes. Every lane is the sponge-based AEAD cipher from
+``sponge_crypto``, keyed with the key and the header prefixed by the number
+of lanes and the lane index. The lane tags are combined by a final call of
+the cipher (the knot), whose header consists of all lane tags.
+
+Large payloads are processed on a process pool with one task per lane. For
+small payloads with Keccak-f, all lanes run in lockstep on packed states
+(see ``keccak_packed``), so that one permutation call advances all lanes.
+
+WARNING: These implementations are for educational purposes.
+         DO NOT use them for real-world applications!
+
+Copyright (c), Felix Fontein, 2020
+
+This file is BSD licensed under the Simplified BSD License
+(see https://opensource.org/licenses/BSD-2-Clause).
+"""
+
+import concurrent.futures
+import typing
+
+from . import keccak
+from . import keccak_packed
+from .sponge import F, DuplexSponge, padding_template, padding_templates
+from .sponge_crypto import (
+    DuplexRequest,
+    SpongeAEAD,
+    duplex_request,
+    split_blocks,
+    sponge_aead_program,
+)
+
+
+# Minimal payload size for which the lanes are run on a process pool
+_POOL_THRESHOLD = 1 << 16
+
+_LaneParameters = typing.Tuple[F, int, int, int, typing.Callable]
+
+
+def _lane_program(cipher_blocksize: int,
+                  tag_length: int,
+                  key: bytes,
+                  header: bytes,
+                  data: bytes,
+                  decrypt: bool
+                  ) -> typing.Generator[DuplexRequest, bytes,
+                                        typing.Tuple[bytes, bytes]]:
+    """Run one lane of the cipher.
+
+    Yields the duplex calls the lane needs and receives their results.
+    Returns a tuple ``(output, tag)``; the results are identical to
+    ``SpongeAEAD.encrypt_and_tag()`` resp. the decryption and the tag
+    computed by ``SpongeAEAD.decrypt_and_authenticate()``.
+    """
+    output = []  # type: typing.List[bytes]
+    program = sponge_aead_program(
+        cipher_blocksize, tag_length, header, decrypt, output, key)
+    blocks = iter(split_blocks(data, cipher_blocksize))
+    try:
+        request = next(program)
+        while True:
+            if request is None:
+                request = program.send(next(blocks, None))
+            else:
+                request = program.send((yield request))
+    except StopIteration as stop:
+        return b''.join(output), stop.value
+
+
+def _run_lane(parameters: _LaneParameters,
+              key: bytes,
+              header: bytes,
+              data: bytes,
+              decrypt: bool) -> typing.Tuple[bytes, bytes]:
+    """Run one lane on a duplex sponge."""
+    f, sponge_blocksize, cipher_blocksize, tag_length, padding = parameters
+    sponge = DuplexSponge(f, sponge_blocksize, padding)
+    program = _lane_program(
+        cipher_blocksize, tag_length, key, header, data, decrypt)
+    try:
+        request = next(program)
+        while True:
+            request = program.send(duplex_request(sponge, request))
+    except StopIteration as stop:
+        return stop.value
+
+
+def _run_lanes_packed(f_packed: keccak_packed.KeccakFPacked,
+                      parameters: _LaneParameters,
+                      programs: typing.List[typing.Generator]
+                      ) -> typing.List[typing.Tuple[bytes, bytes]]:
+    """Run several lanes in lockstep on a packed Keccak-f state.
+
+    Lanes which finish early are ignored in the remaining steps."""
+    dummy, sponge_blocksize, dummy, dummy, padding = parameters
+    state = f_packed.new_state()
+    cache = padding_templates(padding, sponge_blocksize)
+    results = [None] * len(programs)  # type: typing.List[typing.Any]
+    requests = [next(program) for program in programs
+                ]  # type: typing.List[typing.Optional[DuplexRequest]]
+    active = len(programs)
+    while active:
+        blocks = []
+        templates = []
+        result_bytes = 0
+        for request in requests:
+            if request is None:
+                blocks.append(b'')
+                templates.append(b'')
+                continue
+            block, bit, b = request
+            if bit is None:
+                template = padding_template(
+                    padding, sponge_blocksize, len(block) * 8, 0, cache)
+            else:
+                template = padding_template(
+                    padding, sponge_blocksize, len(block) * 8 + 1, bit,
+                    cache)
+            blocks.append(block)
+            templates.append(template)
+            result_bytes = max(result_bytes, b)
+        state.from_bytes_many(blocks)
+        state.from_bytes_many(templates)
+        f_packed(state)
+        outputs = state.extract_many(result_bytes)
+        for index, request in enumerate(requests):
+            if request is None:
+                continue
+            try:
+                requests[index] = programs[index].send(
+                    outputs[index][:request[2]])
+            except StopIteration as stop:
+                results[index] = stop.value
+                requests[index] = None
+                active -= 1
+    return results
+
+
+class ParallelSpongeAEAD:
+    """
+    Provides a parallel Authenticated Encryption with Additional Data (AEAD)
+    algorithm with ``lanes`` lanes, given a sponge f function, parameters and
+    a padding function.
+
+    The number of lanes is part of the algorithm; the ciphertext does not
+    depend on ``processes``. If ``processes`` is larger than 1, large
+    payloads are processed on a process pool with that many workers.
+    """
+
+    def __init__(self,
+                 f: F,
+                 sponge_blocksize: int,
+                 cipher_blocksize: int,
+                 tag_length: int,
+                 padding: typing.Callable[[bytes, int], bytes],
+                 lanes: int = 4,
+                 processes: int = 1):
+        assert 1 <= lanes <= 255
+        self._aead = SpongeAEAD(f, sponge_blocksize, cipher_blocksize,
+                                tag_length, padding)
+        self._parameters = (f, sponge_blocksize, cipher_blocksize,
+                            tag_length, padding)
+        self._cipher_blocksize = cipher_blocksize
+        self._lanes = lanes
+        self._processes = processes
+        self._f_packed = None  # type: typing.Optional[typing.Any]
+        if isinstance(f, keccak.KeccakF) and f.rounds == f.n and lanes > 1:
+            self._f_packed = keccak_packed.KeccakFPacked(f.ell, lanes)
+
+    def _stripe(self, data: bytes) -> typing.List[bytes]:
+        """Distribute the blocks of ``data`` round-robin over the lanes."""
+        blocks = split_blocks(data, self._cipher_blocksize)
+        return [b''.join(blocks[index::self._lanes])
+                for index in range(self._lanes)]
+
+    def _unstripe(self, parts: typing.List[bytes]) -> bytes:
+        """Inverse of ``_stripe()``."""
+        lane_blocks = [split_blocks(part, self._cipher_blocksize)
+                       for part in parts]
+        result = []
+        for i in range(len(lane_blocks[0])):
+            for blocks in lane_blocks:
+                if i < len(blocks):
+                    result.append(blocks[i])
+        return b''.join(result)
+
+    def _run(self,
+             key: bytes,
+             header: bytes,
+             data: bytes,
+             decrypt: bool) -> typing.Tuple[bytes, bytes]:
+        """Run all lanes and the knot; return the output and the tag."""
+        parts = self._stripe(data)
+        headers = [bytes([self._lanes, index + 1]) + header
+                   for index in range(self._lanes)]
+        if self._processes > 1 and len(data) >= _POOL_THRESHOLD:
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self._processes) as executor:
+                results = list(executor.map(
+                    _run_lane,
+                    [self._parameters] * self._lanes,
+                    [key] * self._lanes,
+                    headers,
+                    parts,
+                    [decrypt] * self._lanes))
+        elif self._f_packed is not None:
+            dummy, dummy, cipher_blocksize, tag_length, dummy = (
+                self._parameters)
+            programs = [
+                _lane_program(cipher_blocksize, tag_length, key, header,
+                              part, decrypt)
+                for header, part in zip(headers, parts)]
+            results = _run_lanes_packed(
+                self._f_packed, self._parameters, programs)
+        else:
+            results = [_run_lane(self._parameters, key, header, part, decrypt)
+                       for header, part in zip(headers, parts)]
+        # Knot: combine lane tags
+        knot_header = b''.join([bytes([self._lanes, 0])] +
+                               [tag for dummy, tag in results])
+        dummy, tag = self._aead.encrypt_and_tag(key, knot_header, b'')
+        return self._unstripe([output for output, dummy in results]), tag
+
+    def encrypt_and_tag(self,
+                        key: bytes,
+                        header: bytes,
+                        data: bytes) -> typing.Tuple[bytes, bytes]:
+        """
+        Encrypt and tag a ``header`` and ``data`` with a private ``key``.
+
+        Returns a tuple ``(ciphertext, tag)``, where ``ciphertext`` is the
+        encryption of ``data`` and where ``tag`` authenticates both ``header``
+        and ``data``.
+        """
+        return self._run(key, header, data, False)
+
+    def decrypt_and_authenticate(self,
+                                 key: bytes,
+                                 header: bytes,
+                                 encrypted_data: bytes,
+                                 tag: bytes) -> bytes:
+        """
+        Decrypted encrypted data ``encrypted_data`` and authenticate both
+        data and ``header`` with private key ``key`` and tag ``tag``.
+
+        Returns the cleartext data on success, and raises an exception in case
+        the tag does not match.
+        """
+        decryption, computed_tag = self._run(key, header, encrypted_data, True)
+        if tag != computed_tag:
+            raise ValueError('Tag does not match!')
+        return decryption
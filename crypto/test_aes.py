@@ -112,3 +112,22 @@ if HAS_CRYPTOGRAPHY:
         assert enc_cryptography == enc
         dec = aes.aes_decrypt(enc, key)
         assert dec_cryptography == dec
+
+
+def test_encrypt_words():
+    """Test table-driven AES encryption with precomputed key schedule."""
+    # Example from C.3 in NIST FIPS-197
+    key_schedule = aes.aes_key_schedule(
+        b'\x00\x01\x02\x03\x04\x05\x06\x07\x08\x09\x0a\x0b\x0c\x0d\x0e\x0f' +
+        b'\x10\x11\x12\x13\x14\x15\x16\x17\x18\x19\x1a\x1b\x1c\x1d\x1e\x1f'
+    )
+    assert aes.aes_encrypt_words(
+        (0x00112233, 0x44556677, 0x8899aabb, 0xccddeeff), key_schedule
+    ) == (0x8ea2b7ca, 0x516745bf, 0xeafc4990, 0x4b496089)
+    for key, plaintext in DATA:
+        words = aes.aes_encrypt_words(
+            [int.from_bytes(plaintext[i:i + 4], byteorder='big')
+             for i in range(0, 16, 4)],
+            aes.aes_key_schedule(key))
+        assert b''.join([w.to_bytes(4, byteorder='big') for w in words]) == (
+            aes.aes_encrypt(plaintext, key))
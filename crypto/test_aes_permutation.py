@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test AES-based sponge permutation.
+
+Copyright (c), Felix Fontein, 2020
+
+This file is BSD licensed under the Simplified BSD License
+(see https://opensource.org/licenses/BSD-2-Clause).
+"""
+
+import os
+
+import pytest
+
+from . import aes
+from . import aes_permutation
+from . import padding
+from . import sponge_crypto
+
+
+KEY = b'Dies ist ein nicht geheimer Key!'
+
+
+def test_aes_permutation():
+    """Compare permutation with AES encryption."""
+    f = aes_permutation.AESPermutation(KEY)
+    state = f.new_state()
+    expected = b'\x00' * 16
+    for length in [16, 0, 3, 10, 16]:
+        data = os.urandom(length)
+        state.from_bytes(data)
+        expected = bytes(a ^ b for a, b in zip(
+            expected, data + b'\x00' * (16 - length)))
+        assert state.to_bytes() == expected
+        assert state.extract(length) == expected[:length]
+        f(state)
+        expected = aes.aes_encrypt(expected, KEY)
+        assert state.to_bytes() == expected
+    clone = state.clone()
+    f(state)
+    assert clone.to_bytes() == expected
+    with pytest.raises(ValueError):
+        state.from_bytes(b'\x00' * 17)
+    with pytest.raises(ValueError):
+        aes_permutation.AESPermutation(b'short key')
+
+
+def test_aes_permutation_sponge():
+    """Use permutation in sponge-based hash and AEAD.
+
+    The expected hash is the output of aes_sponge.py."""
+    f = aes_permutation.AESPermutation(KEY)
+    h = sponge_crypto.SpongeHash(f, 10, padding.add_10star1_padding)
+    h.final_absorb(b'Test 1234')
+    assert h.squeeze(16).hex() == '8d3d39a81aa223e21c49db6eb3c0b29c'
+    c = sponge_crypto.SpongeAEAD(f, 10, 8, 16, padding.add_10star1_padding)
+    data = os.urandom(50)
+    ciphertext, tag = c.encrypt_and_tag(b'key', b'header', data)
+    assert c.decrypt_and_authenticate(
+        b'key', b'header', ciphertext, tag) == data
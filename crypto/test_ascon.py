@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test Ascon implementation.
+
+Known answers are taken from the known answer tests for NIST SP 800-232.
+Some further Ascon-AEAD128 values were generated by this implementation and
+only serve as regression tests.
+
+Copyright (c), Felix Fontein, 2020
+
+This file is BSD licensed under the Simplified BSD License
+(see https://opensource.org/licenses/BSD-2-Clause).
+"""
+
+import os
+
+import pytest
+
+from . import ascon
+
+
+@pytest.mark.parametrize("msg, expected", [
+    (b'', '0b3be5850f2f6b98caf29f8fdea89b64'
+          'a1fa70aa249b8f839bd53baa304d92b2'),
+    (b'\x00', '0728621035af3ed2bca03bf6fde900f9'
+              '456f5330e4b5ee23e7f6a1e70291bc80'),
+])
+def test_ascon_hash256(msg, expected):
+    """Test Ascon-Hash256 against known answers."""
+    assert ascon.ascon_hash256(msg).hex() == expected
+
+
+def test_ascon_hash256_chunks():
+    """Test absorbing data in chunks of different sizes."""
+    data = os.urandom(100)
+    expected = ascon.ascon_hash256(data)
+    for chunk_size in [1, 7, 8, 9, 64]:
+        h = ascon.ascon_hash256_sponge()
+        for i in range(0, len(data), chunk_size):
+            h.absorb(data[i:i + chunk_size])
+        h.final_absorb(b'')
+        assert h.squeeze(32) == expected
+
+
+# Key and nonce are 000102...0F, the header and the data consist of the
+# bytes 00, 01, ...; ``count`` is the number of the corresponding entry of
+# the known answer tests
+AEAD128_KNOWN_ANSWERS = [
+    (1, 0, 0, '4427d64b8e1e1451fc445960f0839bb0'),
+    (2, 1, 0, '103ab79d913a0321287715a979bb8585'),
+    (3, 2, 0, 'a50e88e30f923b90a9c810181230df10'),
+]
+
+# Values generated by this implementation, not taken from the known answer
+# tests
+AEAD128_REGRESSION_VALUES = [
+    (34, 0, 1, 'e79f58f1f541fc51b5d438f8e1dd03f147'),
+    (35, 1, 1, '25eb4b700ed4ac8517dcba20f673292230'),
+    (529, 0, 16, 'e770d289d2a44aee7cd0a48ece5274e3'
+                 'ea721f9a8fc4e556f2745972f5a78411'),
+    (545, 16, 16, '6a28215e4a6023fae42095318b187f99'
+                  'e0c479771a09b5d29afd05825b013d0d'),
+    (1089, 32, 32, '4c086d27a3b51a2333cfc7f22172a9bc'
+                   'ad88b8d4d77e50622d788345fa7bee44'
+                   '68915d3f9422289f2349d6a3b4160397'),
+]
+
+
+@pytest.mark.parametrize("count, header_length, data_length, expected",
+                         AEAD128_KNOWN_ANSWERS + AEAD128_REGRESSION_VALUES)
+def test_ascon_aead128(count, header_length, data_length, expected):
+    """Test Ascon-AEAD128 against known answers and regression values."""
+    c = ascon.AsconAEAD128()
+    key = bytes(range(16))
+    nonce = bytes(range(16))
+    header = bytes(range(header_length))
+    data = bytes(range(data_length))
+    ciphertext, tag = c.encrypt_and_tag(key, nonce, header, data)
+    assert (ciphertext + tag).hex() == expected
+    assert c.decrypt_and_authenticate(
+        key, nonce, header, ciphertext, tag) == data
+
+
+@pytest.mark.parametrize("header_length, data_length", [
+    (header_length, data_length)
+    for header_length in [0, 1, 15, 16, 17, 40]
+    for data_length in [0, 1, 15, 16, 17, 40]
+])
+def test_ascon_aead128_roundtrip(header_length, data_length):
+    """Test encryption, decryption and rejection of modified inputs."""
+    c = ascon.AsconAEAD128()
+    key = os.urandom(16)
+    nonce = os.urandom(16)
+    header = os.urandom(header_length)
+    data = os.urandom(data_length)
+    ciphertext, tag = c.encrypt_and_tag(key, nonce, header, data)
+    assert len(ciphertext) == len(data)
+    assert len(tag) == 16
+    assert c.decrypt_and_authenticate(
+        key, nonce, header, ciphertext, tag) == data
+    with pytest.raises(ValueError):
+        c.decrypt_and_authenticate(key, nonce, header + b'x', ciphertext, tag)
+    with pytest.raises(ValueError):
+        c.decrypt_and_authenticate(key, os.urandom(16), header, ciphertext,
+                                   tag)
+    if data:
+        tampered = bytes([ciphertext[0] ^ 1]) + ciphertext[1:]
+        with pytest.raises(ValueError):
+            c.decrypt_and_authenticate(key, nonce, header, tampered, tag)
+
+
+def test_ascon_aead128_parameters():
+    """Test that invalid key and nonce lengths are rejected."""
+    c = ascon.AsconAEAD128()
+    with pytest.raises(ValueError):
+        c.encrypt_and_tag(b'\x00' * 15, b'\x00' * 16, b'', b'')
+    with pytest.raises(ValueError):
+        c.encrypt_and_tag(b'\x00' * 16, b'\x00' * 12, b'', b'')
+
+
+def test_ascon_state():
+    """Test the Ascon state and the permutation parameters."""
+    f = ascon.AsconP(6)
+    state = f.new_state()
+    data = os.urandom(13)
+    state.from_bytes(data)
+    assert state.to_bytes() == data + b'\x00' * 27
+    assert state.extract(9) == data[:9]
+    clone = state.clone()
+    f(state)
+    assert clone.to_bytes() == data + b'\x00' * 27
+    f(clone)
+    assert clone.to_bytes() == state.to_bytes()
+    with pytest.raises(ValueError):
+        state.from_bytes(b'\x00' * 41)
+    with pytest.raises(ValueError):
+        ascon.AsconP(17)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test the buffered random sources and the sponge-based DRBG.
+
+Copyright (c), Felix Fontein, 2020
+
+This file is BSD licensed under the Simplified BSD License
+(see https://opensource.org/licenses/BSD-2-Clause).
+"""
+
+import os
+
+import pytest
+
+from . import drbg
+from . import utils
+
+
+@pytest.mark.parametrize("piece_size", [1, 7, 136, 1000, 5000])
+def test_drbg_deterministic(piece_size):
+    """Test that the output only depends on the seed."""
+    a = drbg.SpongeDRBG(seed=b'seed', reseed_interval=None)
+    b = drbg.SpongeDRBG(seed=b'seed', reseed_interval=None)
+    expected = a.random_bytes(10000)
+    assert len(expected) == 10000
+    result = b''
+    while len(result) < len(expected):
+        result += b.random_bytes(piece_size)
+    assert result[:len(expected)] == expected
+    assert drbg.SpongeDRBG(seed=b'other', reseed_interval=None
+                           ).random_bytes(100) != expected[:100]
+
+
+def test_drbg_reseed():
+    """Test manual and automatic reseeding."""
+    a = drbg.SpongeDRBG(seed=b'seed', reseed_interval=None)
+    b = drbg.SpongeDRBG(seed=b'seed', reseed_interval=None)
+    a.random_bytes(10)
+    b.random_bytes(10)
+    b.reseed(b'more entropy')
+    assert a.random_bytes(100) != b.random_bytes(100)
+    # Automatic reseeding mixes in fresh entropy
+    c = drbg.SpongeDRBG(seed=b'seed', reseed_interval=100, buffer_size=16)
+    d = drbg.SpongeDRBG(seed=b'seed', reseed_interval=None, buffer_size=16)
+    assert c.random_bytes(100) == d.random_bytes(100)
+    c.random_bytes(100)
+    d.random_bytes(100)
+    assert c.random_bytes(100) != d.random_bytes(100)
+
+
+@pytest.mark.parametrize("max_value", [1, 2, 3, 255, 256, 1000, 2 ** 64 + 1])
+def test_random_numbers(max_value):
+    """Test random numbers below ``max_value`` from several sources."""
+    for source in [utils.BufferedRandomSource(),
+                   drbg.SpongeDRBG(),
+                   utils.BufferedRandomSource(buffer_size=1)]:
+        numbers = source.random_numbers(500, max_value)
+        assert len(numbers) == 500
+        assert all(0 <= x < max_value for x in numbers)
+        if max_value <= 3:
+            assert set(numbers) == set(range(max_value))
+
+
+@pytest.mark.skipif(not hasattr(os, 'register_at_fork'),
+                    reason='needs os.register_at_fork')
+@pytest.mark.parametrize("reseed_interval", [None, 1 << 20])
+def test_drbg_fork(reseed_interval):
+    """Test that a child process does not repeat the parent's output."""
+    source = drbg.SpongeDRBG(seed=b'seed', reseed_interval=reseed_interval,
+                             buffer_size=32)
+    # Empty the buffer, so that parent and child continue with the sponge
+    source.random_bytes(32)
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.write(write_fd, source.random_bytes(32))
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    child_output = os.read(read_fd, 32)
+    os.close(read_fd)
+    os.waitpid(pid, 0)
+    assert len(child_output) == 32
+    assert child_output != source.random_bytes(32)
+
+
+def test_set_random_source():
+    """Test using the DRBG as random source of ``utils``."""
+    source = drbg.SpongeDRBG(seed=b'seed', reseed_interval=None)
+    expected = drbg.SpongeDRBG(seed=b'seed', reseed_interval=None
+                               ).random_bytes(20)
+    previous = utils.set_random_source(source)
+    try:
+        assert utils.get_random_bytes(20) == expected
+        assert len(utils.get_random_numbers(10, 17)) == 10
+        p = utils.find_prime(128)
+        assert p.bit_length() == 128
+        assert utils.is_probable_prime(p)
+    finally:
+        assert utils.set_random_source(previous) is source
+    assert len(utils.get_random_bytes(5000)) == 5000
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test TurboSHAKE and KangarooTwelve implementations.
+
+Test vectors are taken from RFC 9861.
+
+Copyright (c), Felix Fontein, 2020
+
+This file is BSD licensed under the Simplified BSD License
+(see https://opensource.org/licenses/BSD-2-Clause).
+"""
+
+import pytest
+
+from . import kangaroo_twelve
+
+
+def ptn(length):
+    """Create pattern message of RFC 9861."""
+    return bytes(i % 0xFB for i in range(length))
+
+
+@pytest.mark.parametrize("msg, domain, result", [
+    (b'', 0x1F,
+     '1e415f1c5983aff2169217277d17bb538cd945a397ddec541f1ce41af2c1b74c'),
+    (ptn(17), 0x1F,
+     '9c97d036a3bac819db70ede0ca554ec6e4c2a1a4ffbfd9ec269ca6a111161233'),
+    (ptn(289), 0x1F,
+     '96c77c279e0126f7fc07c9b07f5cdae1e0be60bdbe10620040e75d7223a624d2'),
+    (b'\xff\xff\xff', 0x07,
+     'b658576001cad9b1e5f399a9f77723bba05458042d68206f7252682dba3663ed'),
+])
+def test_turboshake128(msg, domain, result):
+    """Test TurboSHAKE128."""
+    assert kangaroo_twelve.turboshake128(msg, domain, 32).hex() == result
+
+
+@pytest.mark.parametrize("msg, result", [
+    (b'',
+     '367a329dafea871c7802ec67f905ae13c57695dc2c6663c61035f59a18f8e7db'
+     '11edc0e12e91ea60eb6b32df06dd7f002fbafabb6e13ec1cc20d995547600db0'),
+    (ptn(17),
+     'b3bab0300e6a191fbe6137939835923578794ea54843f5011090fa2f3780a9e5'
+     'cb22c59d78b40a0fbff9e672c0fbe0970bd2c845091c6044d687054da5d8e9c7'),
+])
+def test_turboshake256(msg, result):
+    """Test TurboSHAKE256."""
+    assert kangaroo_twelve.turboshake256(msg, 0x1F, 64).hex() == result
+
+
+KT128_VECTORS = [
+    (b'', b'',
+     '1ac2d450fc3b4205d19da7bfca1b37513c0803577ac7167f06fe2ce1f0ef39e5'),
+    (ptn(17), b'',
+     '6bf75fa2239198db4772e36478f8e19b0f371205f6a9a93a273f51df37122888'),
+    (ptn(17 ** 2), b'',
+     '0c315ebcdedbf61426de7dcf8fb725d1e74675d7f5327a5067f367b108ecb67c'),
+    (ptn(17 ** 3), b'',
+     'cb552e2ec77d9910701d578b457ddf772c12e322e4ee7fe417f92c758f0d59d0'),
+    (ptn(17 ** 4), b'',
+     '8701045e22205345ff4dda05555cbb5c3af1a771c2b89baef37db43d9998b9fe'),
+    (ptn(1), ptn(41),
+     '8234d8630d549449dca134f63793c219c6d60a3ea53f7881c8042c226ea17e1e'),
+    (ptn(8193), ptn(41),
+     '77fc80243e89537b759ddba484d56b166fad74447ceeeccf9d7645c451b6e6f7'),
+]
+
+
+@pytest.mark.parametrize("msg, customization, result", KT128_VECTORS)
+def test_kangaroo_twelve(msg, customization, result):
+    """Test KangarooTwelve, both one-shot and incremental."""
+    assert kangaroo_twelve.kangaroo_twelve(
+        msg, customization).hex() == result
+    h = kangaroo_twelve.KangarooTwelve(customization)
+    for i in range(0, len(msg), 5000):
+        h.update(msg[i:i + 5000])
+    assert h.digest().hex() == result
+
+
+def test_kangaroo_twelve_digest():
+    """Test that digest() does not finalize the hash."""
+    msg, customization, result = KT128_VECTORS[-1]
+    h = kangaroo_twelve.KangarooTwelve(customization)
+    h.update(msg[:100])
+    assert h.digest() == kangaroo_twelve.kangaroo_twelve(
+        msg[:100], customization)
+    h.update(msg[100:])
+    assert h.digest().hex() == result
+    assert h.digest().hex() == result
+
+
+def test_kangaroo_twelve_parallel():
+    """Test KangarooTwelve with leaf chunks hashed on a process pool."""
+    msg, customization, result = KT128_VECTORS[4]
+    assert kangaroo_twelve.kangaroo_twelve(
+        msg, customization, processes=2).hex() == result
+    # More batches than can be in flight at once
+    msg = ptn(5 * kangaroo_twelve._BATCH_CHUNKS * kangaroo_twelve.CHUNK_SIZE +
+              1000)
+    expected = kangaroo_twelve.kangaroo_twelve(msg, b'abc')
+    with kangaroo_twelve.KangarooTwelve(b'abc', processes=2) as h:
+        for i in range(0, len(msg), 100000):
+            h.update(msg[i:i + 100000])
+            assert len(h._futures) <= 4
+        assert h.digest() == expected
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test batched Keccak-f and SHA-3 implementations.
+
+Copyright (c), Felix Fontein, 2020
+
+This file is BSD licensed under the Simplified BSD License
+(see https://opensource.org/licenses/BSD-2-Clause).
+"""
+
+import hashlib
+import os
+
+import pytest
+
+from . import keccak
+from . import keccak_batch
+
+
+np = pytest.importorskip('numpy')
+
+
+MESSAGES = [
+    b'',
+    b'1234',
+    b'1234567890ABCDEF0123456789abcdef',
+    b'Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do ' +
+    b'eiusmod tempor incididunt ut labore et dolore magna aliqua. Ut enim ' +
+    b'ad minim veniam, quis nostrud exercitation ullamco laboris nisi ut ' +
+    b'aliquip ex ea commodo consequat.',
+] + [os.urandom(length) for length in [135, 136, 137, 300, 500]]
+
+
+def test_keccak_f_1600_many():
+    """Compare batched Keccak-f[1600] with KeccakF."""
+    f = keccak.KeccakF(6)
+    data = [os.urandom(200) for _ in range(5)]
+    lanes = np.frombuffer(b''.join(data), dtype='<u8').astype(
+        np.uint64).reshape(5, 25).T.copy()
+    keccak_batch.keccak_f_1600_many(lanes)
+    result = lanes.T.astype('<u8').tobytes()
+    for i, block in enumerate(data):
+        S = f.new_state()
+        S.from_bytes(block)
+        f(S)
+        assert result[200 * i:200 * (i + 1)] == S.to_bytes()
+
+
+def test_keccak_f_1600_many_invalid():
+    """Test that lane arrays which cannot be permuted in place are
+    rejected."""
+    with pytest.raises(ValueError):
+        keccak_batch.keccak_f_1600_many(np.zeros((5, 25), dtype=np.uint64))
+    with pytest.raises(ValueError):
+        keccak_batch.keccak_f_1600_many(np.zeros((25, 5), dtype=np.uint32))
+    with pytest.raises(ValueError):
+        # Transposed view, not C-contiguous
+        keccak_batch.keccak_f_1600_many(
+            np.zeros((5, 25), dtype=np.uint64).T)
+
+
+@pytest.mark.parametrize("many, h", [
+    (keccak_batch.sha_3_224_many, hashlib.sha3_224),
+    (keccak_batch.sha_3_256_many, hashlib.sha3_256),
+    (keccak_batch.sha_3_384_many, hashlib.sha3_384),
+    (keccak_batch.sha_3_512_many, hashlib.sha3_512),
+])
+def test_sha_3_many(many, h):
+    """Test batched SHA-3 hashes."""
+    assert many(MESSAGES) == [h(msg).digest() for msg in MESSAGES]
+
+
+@pytest.mark.parametrize("output_size", [0, 1, 32, 168, 169, 1000])
+def test_shake_many(output_size):
+    """Test batched SHAKE XOFs."""
+    assert keccak_batch.shake128_many(MESSAGES, output_size) == [
+        hashlib.shake_128(msg).digest(output_size) for msg in MESSAGES]
+    assert keccak_batch.shake256_many(MESSAGES, output_size) == [
+        hashlib.shake_256(msg).digest(output_size) for msg in MESSAGES]
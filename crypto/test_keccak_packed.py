@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Test packed Keccak-f implementation.
+
+Copyright (c), Felix Fontein, 2020
+
+This file is BSD licensed under the Simplified BSD License
+(see https://opensource.org/licenses/BSD-2-Clause).
+"""
+
+import itertools
+import os
+
+import pytest
+
+from . import keccak
+from . import keccak_packed
+
+
+@pytest.mark.parametrize("ell, instances", list(itertools.product(
+    [3, 4, 5, 6], [None, 1, 3, 9])))
+def test_keccak_f_packed(ell, instances):
+    """Compare packed Keccak-f with separate KeccakF evaluations."""
+    f = keccak_packed.KeccakFPacked(ell, instances)
+    f_single = keccak.KeccakF(ell)
+    S = f.new_state()
+    blocks = [os.urandom(f.b_bytes - j % 3) for j in range(f.instances)]
+    S.from_bytes_many(blocks)
+    f(S)
+    S.from_bytes_many(blocks[:1])
+    f(S)
+    result = S.to_bytes_many()
+    assert S.extract_many(5) == [v[:5] for v in result]
+    for j, block in enumerate(blocks):
+        S_single = f_single.new_state()
+        S_single.from_bytes(block)
+        f_single(S_single)
+        if j == 0:
+            S_single.from_bytes(block)
+        f_single(S_single)
+        assert S_single.to_bytes() == result[j]
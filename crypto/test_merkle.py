@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test Merkle tree implementation.
+
+Copyright (c), Felix Fontein, 2020
+
+This file is BSD licensed under the Simplified BSD License
+(see https://opensource.org/licenses/BSD-2-Clause).
+"""
+
+import hashlib
+
+import pytest
+
+from . import merkle
+
+
+HASHES = [
+    ('sha_2_256', hashlib.sha256),
+    ('sha_3_256', hashlib.sha3_256),
+]
+
+
+def reference_root(leaves, h):
+    """Compute Merkle tree root with hashlib."""
+    level = [h(b'\x00' + leaf).digest() for leaf in leaves]
+    while len(level) > 1:
+        next_level = [h(b'\x01' + level[i] + level[i + 1]).digest()
+                      for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            next_level.append(level[-1])
+        level = next_level
+    return level[0]
+
+
+@pytest.mark.parametrize("hash_name, h, leaf_count", [
+    (hash_name, h, leaf_count)
+    for hash_name, h in HASHES
+    for leaf_count in [1, 2, 3, 5, 8, 13]
+])
+def test_merkle_tree(hash_name, h, leaf_count):
+    """Test building, updating and proofs."""
+    leaves = [str(i).encode('utf-8') for i in range(leaf_count)]
+    tree = merkle.MerkleTree(leaves, hash_name)
+    assert tree.root == reference_root(leaves, h)
+
+    proofs = tree.proofs(range(leaf_count))
+    assert merkle.verify_proofs(
+        tree.root, leaf_count,
+        [(i, leaves[i], proof) for i, proof in enumerate(proofs)],
+        hash_name) == [True] * leaf_count
+    assert not merkle.verify_proof(
+        tree.root, 0, leaf_count, b'wrong', proofs[0], hash_name)
+
+    leaves[leaf_count // 2] = b'changed'
+    leaves[-1] = b'changed too'
+    tree.update(leaf_count // 2, leaves[leaf_count // 2])
+    tree.update_many({leaf_count - 1: leaves[-1]})
+    assert tree.root == reference_root(leaves, h)
+    for i in range(leaf_count):
+        assert merkle.verify_proof(
+            tree.root, i, leaf_count, leaves[i], tree.proof(i), hash_name)
+
+
+def test_merkle_tree_parallel():
+    """Test building tree on a process pool."""
+    leaves = [str(i).encode('utf-8') for i in range(1500)]
+    tree = merkle.MerkleTree(leaves, processes=2)
+    assert tree.root == merkle.MerkleTree(leaves).root
+    assert tree.root == reference_root(leaves, hashlib.sha256)
+
+
+def test_verify_proofs_parallel():
+    """Test verifying many proofs on a process pool."""
+    leaves = [str(i).encode('utf-8') for i in range(1500)]
+    tree = merkle.MerkleTree(leaves)
+    items = [(i, leaves[i], tree.proof(i)) for i in range(len(leaves))]
+    items[7] = (7, b'wrong', items[7][2])
+    expected = [True] * len(leaves)
+    expected[7] = False
+    assert merkle.verify_proofs(
+        tree.root, len(leaves), items, processes=2) == expected
+
+
+def test_update_many_invalid():
+    """Test that a failed update does not change the tree."""
+    leaves = [b'a', b'b', b'c']
+    tree = merkle.MerkleTree(leaves)
+    root = tree.root
+    proofs = tree.proofs(range(3))
+    for index in [5, -1]:
+        with pytest.raises(IndexError):
+            tree.update_many({0: b'x', index: b'y'})
+        assert tree.root == root
+        assert tree.proofs(range(3)) == proofs
+        assert tree.root == reference_root(leaves, hashlib.sha256)
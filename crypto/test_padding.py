@@ -8,6 +8,7 @@ This file is BSD licensed under the Simplified BSD License
 (see https://opensource.org/licenses/BSD-2-Clause).
 """
 
+import functools
 import os
 
 import pytest
@@ -132,3 +133,42 @@ def test_sha2_padding(blocksize, msgsize, bitsize, add):
                       bitsize,
                       add,
                       mode)
+
+
+@pytest.mark.parametrize("blocksize, msgsize, bitsize, add",
+                         create_adding_test_params())
+def test_sha2_padding_16_byte_length(blocksize, msgsize, bitsize, add):
+    """Test SHA-2 padding with 128-bit length field."""
+    for mode in range(10):
+        check_padding(functools.partial(padding.add_sha2_padding,
+                                        length_bytes=16),
+                      functools.partial(padding.remove_sha2_padding,
+                                        length_bytes=16),
+                      False,
+                      blocksize,
+                      msgsize,
+                      bitsize,
+                      add,
+                      mode)
+
+
+@pytest.mark.parametrize("pad, blocksize", [
+    (pad, blocksize)
+    for pad in [padding.add_10star_padding,
+                padding.add_10star1_padding,
+                padding.add_0110star1_padding,
+                padding.add_sha2_padding,
+                functools.partial(padding.add_sha2_padding, length_bytes=16)]
+    for blocksize in [1, 3, 16, 17, 64]
+])
+def test_tail_padding(pad, blocksize):
+    """Test that tail paddings agree with the corresponding paddings."""
+    tail_pad = padding.get_tail_padding(pad)
+    for msgsize in range(0, 3 * blocksize + 3):
+        msg = os.urandom(msgsize)
+        for bitsize in [msgsize * 8, max(0, msgsize * 8 - 3)]:
+            padded_msg = pad(msg, blocksize, bitsize)
+            for offset in {0, msgsize // 2, bitsize // 8}:
+                tail = tail_pad(msg[offset:], blocksize, bitsize - offset * 8,
+                                offset=offset)
+                assert padded_msg == msg[:offset] + tail
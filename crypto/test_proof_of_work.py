@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test proof of work implementation.
+
+Copyright (c), Felix Fontein, 2020
+
+This file is BSD licensed under the Simplified BSD License
+(see https://opensource.org/licenses/BSD-2-Clause).
+"""
+
+import hashlib
+
+import pytest
+
+from . import proof_of_work
+
+
+HASHES = [
+    ('sha_2_256', hashlib.sha256, 10),
+    ('sha_2_512', hashlib.sha512, 8),
+    ('sha_3_256', hashlib.sha3_256, 4),
+]
+
+
+@pytest.mark.parametrize("hash_name, h, difficulty", HASHES)
+def test_mint_and_verify(hash_name, h, difficulty):
+    """Test minting and verifying proofs of work."""
+    prefix = b'1:' + str(difficulty).encode('utf-8') + b':resource:'
+    result = proof_of_work.mint(prefix, difficulty, hash_name)
+    assert result.nonce is not None
+    assert result.hashes == result.nonce + 1
+    digest = h(prefix + result.nonce.to_bytes(8, byteorder='big')).digest()
+    assert result.digest == digest
+    assert int.from_bytes(digest, byteorder='big') >> (
+        8 * len(digest) - difficulty) == 0
+    assert proof_of_work.verify(prefix, result.nonce, difficulty, hash_name)
+    # All nonces tried before the solution must be invalid
+    for nonce in range(result.nonce):
+        assert not proof_of_work.verify(prefix, nonce, difficulty, hash_name)
+
+
+def test_mint_range():
+    """Test searching a range without solution."""
+    result = proof_of_work.mint(b'prefix', 64, start=10, stop=20)
+    assert result.nonce is None
+    assert result.hashes == 10
+
+
+def test_mint_parallel():
+    """Test searching on a process pool."""
+    result = proof_of_work.mint(b'parallel', 12, processes=2)
+    assert result.nonce is not None
+    assert proof_of_work.verify(b'parallel', result.nonce, 12)
+    assert result.hashes_per_second > 0
+
+
+def test_invalid_parameters():
+    """Test that invalid hash names and difficulties are rejected."""
+    with pytest.raises(ValueError):
+        proof_of_work.mint(b'prefix', 4, 'unknown')
+    with pytest.raises(ValueError):
+        proof_of_work.mint(b'prefix', -1)
+    with pytest.raises(ValueError):
+        proof_of_work.mint(b'prefix', 257)
+    with pytest.raises(ValueError):
+        proof_of_work.verify(b'prefix', 0, 257)
+    with pytest.raises(ValueError):
+        proof_of_work.verify(b'prefix', 0, 385, 'sha_2_384')
+    result = proof_of_work.mint(b'prefix', 512, 'sha_2_512', stop=2)
+    assert result.nonce is None
@@ -9,6 +9,7 @@ This file is BSD licensed under the Simplified BSD License
 """
 
 import hashlib
+import os
 
 import pytest
 
@@ -30,3 +31,62 @@ MESSAGES = [
 def test_sha_2_256(msg):
     """Test SHA-2-256 hash."""
     assert sha2.sha_2_256(msg) == hashlib.sha256(msg).digest()
+
+
+@pytest.mark.parametrize("msg", MESSAGES)
+def test_sha_2_512(msg):
+    """Test SHA-2-512 hash."""
+    assert sha2.sha_2_512(msg) == hashlib.sha512(msg).digest()
+
+
+@pytest.mark.parametrize("msg", MESSAGES)
+def test_sha_2_384(msg):
+    """Test SHA-2-384 hash."""
+    assert sha2.sha_2_384(msg) == hashlib.sha384(msg).digest()
+
+
+@pytest.mark.parametrize("msg", MESSAGES)
+def test_sha_2_512_256(msg):
+    """Test SHA-2-512/256 hash."""
+    assert sha2.sha_2_512_256(msg) == hashlib.new('sha512_256', msg).digest()
+
+
+FIXED_LENGTH_MESSAGES = [os.urandom(64) for _ in range(4)] + [
+    b'\x00' * 64,
+    b'\xff' * 64,
+]
+
+
+@pytest.mark.parametrize("msg", FIXED_LENGTH_MESSAGES)
+def test_sha_2_256_fixed_length(msg):
+    """Test SHA-2-256 fast paths for 32 and 64 byte messages."""
+    assert sha2.sha_2_256_32(msg[:32]) == hashlib.sha256(msg[:32]).digest()
+    assert sha2.sha_2_256_64(msg) == hashlib.sha256(msg).digest()
+    assert sha2.sha_2_256_node(msg[:32], msg[32:]) == sha2.sha_2_256(msg)
+    assert sha2.sha_2_256_tree_node(msg[:32], msg[32:]) == (
+        hashlib.sha256(b'\x01' + msg).digest())
+
+
+@pytest.mark.parametrize("name, hashlib_name, msg", [
+    (name, hashlib_name, msg)
+    for name, hashlib_name in [
+        ('sha_2_256', 'sha256'),
+        ('sha_2_384', 'sha384'),
+        ('sha_2_512', 'sha512'),
+        ('sha_2_512_256', 'sha512_256'),
+    ]
+    for msg in MESSAGES
+])
+def test_sha2_hash_export_import(name, hashlib_name, msg):
+    """Test incremental SHA-2 hash with exporting and importing state."""
+    h = sha2.SHA2Hash(name)
+    h.update(msg[:len(msg) // 3])
+    h2 = sha2.SHA2Hash(name)
+    h2.import_state(h.export_state())
+    h2.update(msg[len(msg) // 3:])
+    assert h2.digest() == hashlib.new(hashlib_name, msg).digest()
+    h2.update(msg)
+    assert h2.hexdigest() == hashlib.new(hashlib_name, msg + msg).hexdigest()
+    other = 'sha_2_512' if name == 'sha_2_256' else 'sha_2_256'
+    with pytest.raises(ValueError):
+        sha2.SHA2Hash(other).import_state(h.export_state())
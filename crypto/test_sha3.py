@@ -8,11 +8,14 @@ This file is BSD licensed under the Simplified BSD License
 (see https://opensource.org/licenses/BSD-2-Clause).
 """
 
+import concurrent.futures
 import hashlib
 import itertools
+import os
 
 import pytest
 
+from . import keccak
 from . import sha3
 
 
@@ -83,3 +86,223 @@ def test_shake256(msg, output_size):
     """Test SHAKE-256 XOF."""
     v = sha3.shake256(msg, output_size)
     assert v == hashlib.shake_256(msg).digest(output_size)
+
+
+# Example values published by NIST for SP 800-185
+SP800_185_DATA = bytes(list(range(0x00, 0x08)) +
+                       list(range(0x10, 0x18)) +
+                       list(range(0x20, 0x28)))
+
+
+@pytest.mark.parametrize("msg, output_size", [
+    (b'', 0),
+    (b'1234', 32),
+    (MESSAGES[-1], 200),
+])
+def test_cshake_empty(msg, output_size):
+    """Test that cSHAKE without function name and customization is SHAKE."""
+    assert sha3.cshake128(msg, output_size) == sha3.shake128(msg, output_size)
+    assert sha3.cshake256(msg, output_size) == sha3.shake256(msg, output_size)
+
+
+@pytest.mark.parametrize("function, msg, customization, result", [
+    (sha3.cshake128, bytes(range(4)), b'Email Signature',
+     'c1c36925b6409a04f1b504fcbca9d82b4017277cb5ed2b2065fc1d3814d5aaf5'),
+    (sha3.cshake256, bytes(range(4)), b'Email Signature',
+     'd008828e2b80ac9d2218ffee1d070c48b8e4c87bff32c9699d5b6896eee0edd1'
+     '64020e2be0560858d9c00c037e34a96937c561a74c412bb4c746469527281c8c'),
+])
+def test_cshake(function, msg, customization, result):
+    """Test cSHAKE128 and cSHAKE256."""
+    v = function(msg, len(result) // 2, b'', customization)
+    assert v.hex() == result
+
+
+@pytest.mark.parametrize("function, items, customization, result", [
+    (sha3.tuple_hash128, [bytes(range(3)), bytes(range(0x10, 0x16))], b'',
+     'c5d8786c1afb9b82111ab34b65b2c0048fa64e6d48e263264ce1707d3ffc8ed1'),
+    (sha3.tuple_hash128, [bytes(range(3)), bytes(range(0x10, 0x16))],
+     b'My Tuple App',
+     '75cdb20ff4db1154e841d758e24160c54bae86eb8c13e7f5f40eb35588e96dfb'),
+])
+def test_tuple_hash(function, items, customization, result):
+    """Test TupleHash."""
+    assert function(items, len(result) // 2, customization).hex() == result
+
+
+def test_tuple_hash_separation():
+    """Test that TupleHash distinguishes between differently split items."""
+    assert (sha3.tuple_hash256([b'ab', b'c'], 64) !=
+            sha3.tuple_hash256([b'a', b'bc'], 64))
+
+
+@pytest.mark.parametrize("function, customization, result", [
+    (sha3.parallel_hash128, b'',
+     'ba8dc1d1d979331d3f813603c67f72609ab5e44b94a0b8f9af46514454a2b4f5'),
+    (sha3.parallel_hash128, b'Parallel Data',
+     'fc484dcb3f84dceedc353438151bee58157d6efed0445a81f165e495795b7206'),
+    (sha3.parallel_hash256, b'',
+     'bc1ef124da34495e948ead207dd9842235da432d2bbc54b4c110e64c45110553'
+     '1b7f2a3e0ce055c02805e7c2de1fb746af97a1dd01f43b824e31b87612410429'),
+])
+def test_parallel_hash(function, customization, result):
+    """Test ParallelHash."""
+    v = function(SP800_185_DATA, 8, len(result) // 2, customization)
+    assert v.hex() == result
+
+
+def test_parallel_hash_processes(monkeypatch):
+    """Test that ParallelHash computes the same result on a process pool."""
+    monkeypatch.setattr(sha3, '_PARALLEL_HASH_BATCH_SIZE', 256)
+    msg = bytes(i % 251 for i in range(5000))
+    for function in (sha3.parallel_hash128, sha3.parallel_hash256):
+        expected = function(msg, 64, 32, b'custom')
+        assert function(msg, 64, 32, b'custom', processes=2) == expected
+
+
+@pytest.mark.parametrize("function, msg, customization, result", [
+    (sha3.kmac128, bytes(range(4)), b'',
+     'e5780b0d3ea6f7d3a429c5706aa43a00fadbd7d49628839e3187243f456ee14e'),
+    (sha3.kmac128, bytes(range(4)), b'My Tagged Application',
+     '3b1fba963cd8b0b59e8c1a6d71888b7143651af8ba0a7070c0979e2811324aa5'),
+    (sha3.kmac256, bytes(range(200)), b'My Tagged Application',
+     'b58618f71f92e1d56c1b8c55ddd7cd188b97b4ca4d99831eb2699a837da2e4d9'
+     '70fbacfde50033aea585f1a2708510c32d07880801bd182898fe476876fc8965'),
+])
+def test_kmac(function, msg, customization, result):
+    """Test KMAC128 and KMAC256 with cold and with cached keyed state."""
+    key = bytes(range(0x40, 0x60))
+    sha3._kmac_cache.clear()
+    for dummy in range(2):
+        v = function(key, msg, len(result) // 2, customization)
+        assert v.hex() == result
+
+
+def test_kmac_cache(monkeypatch):
+    """Test that the keyed state cache is bounded and keyed correctly."""
+    monkeypatch.setattr(sha3, '_KMAC_CACHE_SIZE', 4)
+    sha3._kmac_cache.clear()
+    keys = [bytes([i]) * 32 for i in range(10)]
+    expected = [sha3.kmac128(key, b'message', 32) for key in keys]
+    assert len(sha3._kmac_cache) == 4
+    assert len(set(expected)) == len(keys)
+    for dummy in range(2):
+        for key, result in zip(keys, expected):
+            assert sha3.kmac128(key, b'message', 32) == result
+    assert sha3.kmac128(keys[0], b'message', 32, b'other') != expected[0]
+    assert sha3.kmac256(keys[0], b'message', 32) != expected[0]
+
+
+def test_kmac_cache_permutations(monkeypatch):
+    """Test that a cache hit does not apply the permutation for the
+    key."""
+    calls = []
+    permute = keccak.KeccakF.__call__
+
+    def counting_permute(self, state):
+        calls.append(None)
+        permute(self, state)
+
+    monkeypatch.setattr(keccak.KeccakF, '__call__', counting_permute)
+    sha3._kmac_cache.clear()
+    key = bytes(range(32))
+    expected = sha3.kmac128(key, b'message', 32)
+    cold_calls = len(calls)
+    del calls[:]
+    assert sha3.kmac128(key, b'message', 32) == expected
+    # The blocks with the function name and with the key are not absorbed
+    assert len(calls) == cold_calls - 2
+
+
+def test_kmac_threads():
+    """Test KMAC with the keyed state cache shared by several threads."""
+    sha3._kmac_cache.clear()
+    keys = [bytes([i]) * 32 for i in range(100)]
+    expected = [sha3.kmac128(key, b'message', 32) for key in keys]
+    sha3._kmac_cache.clear()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        result = list(executor.map(
+            lambda key: sha3.kmac128(key, b'message', 32), keys * 2))
+    assert result == expected * 2
+
+
+@pytest.mark.parametrize("name, hashlib_name", [
+    ('sha_3_224', 'sha3_224'),
+    ('sha_3_256', 'sha3_256'),
+    ('sha_3_384', 'sha3_384'),
+    ('sha_3_512', 'sha3_512'),
+])
+def test_sha3_hash(name, hashlib_name):
+    """Test incremental SHA-3 hash objects against hashlib."""
+    data = os.urandom(1000)
+    h = sha3.SHA3Hash(name, data[:3])
+    r = getattr(hashlib, hashlib_name)(data[:3])
+    assert h.digest_size == r.digest_size
+    assert h.block_size == r.block_size
+    for start, end in [(3, 10), (10, 200), (200, 201), (201, 1000)]:
+        c = h.copy()
+        h.update(memoryview(data)[start:end])
+        r.update(data[start:end])
+        assert h.digest() == r.digest()
+        assert h.hexdigest() == r.hexdigest()
+        # The copy is independent of the original
+        assert c.digest() != h.digest()
+        c.update(data[start:end])
+        assert c.digest() == h.digest()
+
+
+@pytest.mark.parametrize("name, hashlib_name", [
+    ('shake128', 'shake_128'),
+    ('shake256', 'shake_256'),
+])
+def test_shake_hash(name, hashlib_name):
+    """Test incremental SHAKE objects against hashlib."""
+    h = sha3.SHAKEHash(name)
+    r = getattr(hashlib, hashlib_name)()
+    for msg in MESSAGES:
+        h.update(msg)
+        r.update(msg)
+        c = h.copy()
+        for output_size in OUTPUT_SIZES:
+            assert c.digest(output_size) == r.digest(output_size)
+        assert c.hexdigest(17) == r.hexdigest(17)
+
+
+def test_sha3_hash_names():
+    """Test that unknown variants are rejected."""
+    with pytest.raises(ValueError):
+        sha3.SHA3Hash('shake128')
+    with pytest.raises(ValueError):
+        sha3.SHAKEHash('sha_3_256')
+
+
+@pytest.mark.parametrize("name, hashlib_name", [
+    ('shake128', 'shake_128'),
+    ('shake256', 'shake_256'),
+])
+def test_shake_reader(name, hashlib_name):
+    """Test reading SHAKE output incrementally."""
+    msg = MESSAGES[-1]
+    h = sha3.SHAKEHash(name, msg)
+    expected = getattr(hashlib, hashlib_name)(msg).digest(3000)
+    reader = h.reader()
+    result = []
+    for size in OUTPUT_SIZES:
+        result.append(reader.read(size))
+    buffer = bytearray(500)
+    assert reader.readinto(buffer) == 500
+    result.append(bytes(buffer))
+    assert b''.join(result) == expected[:len(b''.join(result))]
+    # Iteration returns the output in pieces of at most one block
+    pieces = []
+    for piece in h.reader():
+        assert 0 < len(piece) <= h.block_size
+        pieces.append(piece)
+        if sum(len(p) for p in pieces) >= 2000:
+            break
+    output = b''.join(pieces)
+    assert output == expected[:len(output)]
+    # The hash can still be updated after creating a reader
+    h.update(b'more')
+    expected = getattr(hashlib, hashlib_name)(msg + b'more').digest(32)
+    assert h.reader().read(32) == expected
@@ -10,12 +10,13 @@ This file is BSD licensed under the Simplified BSD License
 
 import hashlib
 import itertools
+import os
 
 import pytest
 
 from . import keccak
 from . import padding
-# from . import sponge
+from . import sponge
 from . import sponge_crypto
 
 
@@ -72,3 +73,265 @@ def test_sponge_aead(key, header, data):
     enc_data, tag = c.encrypt_and_tag(key, header, data)
     dec_data = c.decrypt_and_authenticate(key, header, enc_data, tag)
     assert dec_data == data
+
+
+@pytest.mark.parametrize("msg", MESSAGES)
+def test_sponge_hash_export_import(msg):
+    """Test exporting and importing the state of a sponge hash."""
+    f = keccak.KeccakF(6)
+    h = sponge_crypto.SpongeHash(f, 1088 // 8, padding.add_0110star1_padding)
+    h.absorb(msg[:len(msg) // 2])
+    h2 = sponge_crypto.SpongeHash(f, 1088 // 8, padding.add_0110star1_padding)
+    h2.import_state(h.export_state())
+    h2.final_absorb(msg[len(msg) // 2:])
+    h3 = sponge_crypto.SpongeHash(f, 1088 // 8, padding.add_0110star1_padding)
+    h3.import_state(h2.export_state())
+    assert h3.squeeze(32) == hashlib.sha3_256(msg).digest()
+    with pytest.raises(ValueError):
+        sponge_crypto.SpongeHash(f, 576 // 8, padding.add_0110star1_padding
+                                 ).import_state(h.export_state())
+
+
+@pytest.mark.parametrize("msg", MESSAGES)
+def test_sponge_hash_clone(msg):
+    """Test cloning a sponge hash."""
+    f = keccak.KeccakF(6)
+    h = sponge_crypto.SpongeHash(f, 1088 // 8, padding.add_0110star1_padding)
+    h.absorb(msg)
+    h2 = h.clone()
+    h.final_absorb(b'other')
+    h2.final_absorb(b'')
+    assert h2.squeeze(32) == hashlib.sha3_256(msg).digest()
+    assert h.squeeze(32) == hashlib.sha3_256(msg + b'other').digest()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 135, 136, 137, 300])
+def test_sponge_hash_chunks(chunk_size):
+    """Test absorbing data in chunks of various sizes."""
+    f = keccak.KeccakF(6)
+    msg = os.urandom(1000)
+    h = sponge_crypto.SpongeHash(f, 1088 // 8, padding.add_0110star1_padding)
+    for i in range(0, len(msg), chunk_size):
+        h.absorb(memoryview(msg)[i:i + chunk_size])
+    h.final_absorb(b'')
+    assert h.squeeze(32) == hashlib.sha3_256(msg).digest()
+
+
+@pytest.mark.parametrize("ell, engine", list(itertools.product(
+    [3, 4, 5, 6], keccak.KeccakF.ENGINES)))
+def test_keccak_f_engines(ell, engine):
+    """Compare Keccak-f engines with the reference implementation."""
+    f = keccak.KeccakF(ell, engine)
+    f_reference = keccak.KeccakF(ell, 'reference')
+    for _ in range(3):
+        data = os.urandom(f.b_bytes)
+        S = f.new_state()
+        S.from_bytes(data)
+        f(S)
+        f(S)
+        S_reference = f_reference.new_state()
+        S_reference.from_bytes(data)
+        f_reference(S_reference)
+        f_reference(S_reference)
+        assert S.to_bytes() == S_reference.to_bytes()
+
+
+@pytest.mark.parametrize("ell, engine", list(itertools.product(
+    [3, 4, 5, 6], keccak.KeccakF.ENGINES)))
+def test_keccak_f_state_absorb_extract(ell, engine):
+    """Test absorbing and extracting parts of the Keccak-f state."""
+    f = keccak.KeccakF(ell, engine)
+    S = f.new_state()
+    full = os.urandom(f.b_bytes)
+    S.from_bytes(full)
+    for length in range(f.b_bytes + 1):
+        data = os.urandom(length)
+        expected = bytes(a ^ b for a, b in zip(S.to_bytes(),
+                                               data + bytes(f.b_bytes)))
+        S.from_bytes(data)
+        assert S.to_bytes() == expected
+        assert S.extract(length) == expected[:length]
+
+
+@pytest.mark.parametrize("engine", keccak.KeccakF.ENGINES)
+def test_keccak_p(engine):
+    """Compare reduced-round Keccak-p engines."""
+    f = keccak.KeccakF(6, engine, rounds=12)
+    f_reference = keccak.KeccakF(6, 'reference', rounds=12)
+    data = os.urandom(f.b_bytes)
+    S = f.new_state()
+    S.from_bytes(data)
+    f(S)
+    S_reference = f_reference.new_state()
+    S_reference.from_bytes(data)
+    f_reference(S_reference)
+    assert S.to_bytes() == S_reference.to_bytes()
+
+
+def test_sponge_hash_prefix_cache():
+    """Test the prefix cache of sponge-based hashes."""
+    f = keccak.KeccakF(6)
+    cache = sponge_crypto.SpongeHashPrefixCache(
+        f, 1088 // 8, padding.add_0110star1_padding, min_uses=2)
+    prefixes = [b'domain tag', b'x' * 300, b'']
+    cache.register(prefixes[0])
+    for dummy in range(3):
+        for prefix in prefixes:
+            for suffix in MESSAGES:
+                h = cache.new(prefix)
+                h.final_absorb(suffix)
+                assert h.squeeze(32) == hashlib.sha3_256(
+                    prefix + suffix).digest()
+    # Unregistered prefixes are cached from their second use on
+    assert cache.misses == 2 + 2
+    assert cache.hits == 3 * 3 * len(MESSAGES) - cache.misses
+    assert cache.saved_permutations == (3 * len(MESSAGES) - 2) * 2
+    assert 0 < cache.hit_rate < 1
+
+
+def test_sponge_hash_prefix_cache_eviction():
+    """Test that the prefix cache is bounded by memory."""
+    f = keccak.KeccakF(6)
+    entry_size = 1600 // 8 + 1088 // 8 + 100
+    cache = sponge_crypto.SpongeHashPrefixCache(
+        f, 1088 // 8, padding.add_0110star1_padding,
+        max_bytes=3 * entry_size)
+    prefixes = [bytes([i]) * 100 for i in range(5)]
+    for prefix in prefixes:
+        cache.register(prefix)
+        assert cache.size <= 3 * entry_size
+    cache.new(prefixes[0])
+    assert cache.misses == 1
+    cache.new(prefixes[4])
+    assert cache.hits == 1
+
+
+def test_sponge_aead_known_answer():
+    """Test sponge AEAD cipher against a fixed result."""
+    f = keccak.KeccakF(6)
+    c = sponge_crypto.SpongeAEAD(f, 1088 // 8, 256 // 8, 256 // 8,
+                                 padding.add_10star1_padding)
+    enc_data, tag = c.encrypt_and_tag(b'hunter2', b'public header',
+                                      MESSAGES[2])
+    assert enc_data.hex() == (
+        '4997626ec72c5fc2a72134e03ddd5a73304eee7a3b185317b3e6c369d2796db5')
+    assert tag.hex() == (
+        '0f361c3f4035e84789441f43b9ad35324dcc73a6db3e601ba961d5077f651e1c')
+
+
+@pytest.mark.parametrize("data, chunk_size", list(itertools.product(
+    MESSAGES + [bytes(range(256)) * 3], [1, 5, 32, 33, 100])))
+def test_sponge_aead_sessions(data, chunk_size):
+    """Test incremental sponge AEAD sessions against the one-shot API."""
+    f = keccak.KeccakF(6)
+    c = sponge_crypto.SpongeAEAD(f, 1088 // 8, 256 // 8, 256 // 8,
+                                 padding.add_10star1_padding)
+    enc_data, tag = c.encrypt_and_tag(b'hunter2', b'public header', data)
+    encryptor = c.encryptor()
+    decryptor = c.decryptor()
+    for dummy in range(2):
+        encryptor.start(b'hunter2', b'public header')
+        decryptor.start(b'hunter2', b'public header')
+        encrypted = []
+        decrypted = []
+        for i in range(0, len(data), chunk_size):
+            encrypted.append(encryptor.update(data[i:i + chunk_size]))
+            decrypted.append(decryptor.update(enc_data[i:i + chunk_size]))
+        rest, session_tag = encryptor.finalize()
+        encrypted.append(rest)
+        decrypted.append(decryptor.verify(tag))
+        assert b''.join(encrypted) == enc_data
+        assert session_tag == tag
+        assert b''.join(decrypted) == data
+    decryptor.start(b'hunter2', b'public header')
+    decryptor.update(enc_data)
+    with pytest.raises(ValueError):
+        decryptor.verify(bytes(len(tag)))
+
+
+@pytest.mark.parametrize("key, header, data",
+                         list(itertools.product(KEYS + [b'k' * 100],
+                                                HEADERS,
+                                                MESSAGES)))
+def test_sponge_aead_prepared_key(key, header, data):
+    """Test sponge AEAD cipher with a prepared key."""
+    f = keccak.KeccakF(6)
+    c = sponge_crypto.SpongeAEAD(f, 1088 // 8, 256 // 8, 256 // 8,
+                                 padding.add_10star1_padding)
+    prepared_key = c.prepare_key(key)
+    expected = c.encrypt_and_tag(key, header, data)
+    for dummy in range(2):
+        assert c.encrypt_and_tag(prepared_key, header, data) == expected
+        assert c.decrypt_and_authenticate(
+            prepared_key, header, expected[0], expected[1]) == data
+    other = sponge_crypto.SpongeAEAD(f, 1088 // 8, 256 // 8, 256 // 8,
+                                     padding.add_10star1_padding)
+    with pytest.raises(ValueError):
+        other.encrypt_and_tag(prepared_key, header, data)
+
+
+def test_sponge_wrap():
+    """Test encrypting several messages in one sponge AEAD session."""
+    f = keccak.KeccakF(6)
+    c = sponge_crypto.SpongeAEAD(f, 1088 // 8, 256 // 8, 256 // 8,
+                                 padding.add_10star1_padding)
+    sender = c.wrap_session(b'hunter2')
+    receiver = c.wrap_session(c.prepare_key(b'hunter2'))
+    results = []
+    for header, data in itertools.product(HEADERS, MESSAGES):
+        enc_data, tag = sender.wrap(header, data)
+        assert receiver.unwrap(header, enc_data, tag) == data
+        results.append((enc_data, tag))
+    # The first message equals a single message; later ones depend on
+    # the previous messages
+    assert results[0] == c.encrypt_and_tag(b'hunter2', HEADERS[0],
+                                           MESSAGES[0])
+    assert results[4] != c.encrypt_and_tag(b'hunter2', HEADERS[1],
+                                           MESSAGES[0])
+    enc_data, tag = sender.wrap(b'', b'message')
+    with pytest.raises(ValueError):
+        receiver.unwrap(b'', enc_data, bytes(len(tag)))
+
+
+@pytest.mark.parametrize("pad", [
+    padding.add_10star1_padding,
+    padding.add_0110star1_padding,
+])
+def test_duplex_sponge_padding(pad):
+    """Test cached padding of the duplex sponge against padding the data."""
+    f = keccak.KeccakF(4)
+    blocksize = 40
+    d = sponge.DuplexSponge(f, blocksize, pad)
+    S = f.new_state()
+    data = os.urandom(blocksize)
+    for bitlength in list(range(0, 8 * (blocksize - 1) - 2, 3)) + [None]:
+        length = len(data) - 2 if bitlength is None else bitlength // 8 + 1
+        S.from_bytes(pad(data[:length], blocksize, bitlength))
+        f(S)
+        assert d.duplex(data[:length], 7, bitlength) == S.to_bytes()[:7]
+    for length in range(blocksize - 2):
+        for bit in (0, 1):
+            S.from_bytes(pad(data[:length] + bytes([bit]), blocksize,
+                             length * 8 + 1))
+            f(S)
+            assert d.duplex_with_bit(data[:length], bit) == (
+                S.to_bytes()[:blocksize])
+
+
+def test_duplex_sponge_padding_cache():
+    """Test that only padding templates of the package's paddings are
+    shared between duplex sponges."""
+    f = keccak.KeccakF(4)
+
+    def pad(data, blocksize, bitlength=None):
+        return padding.add_10star1_padding(data, blocksize, bitlength)
+
+    d = sponge.DuplexSponge(f, 40, pad)
+    d.duplex(b'abc', 8)
+    assert (pad, 40) not in sponge._PADDING_TEMPLATES
+    assert d.clone()._templates is d._templates
+    assert sponge.DuplexSponge(f, 40, pad)._templates == {}
+    d = sponge.DuplexSponge(f, 40, padding.add_10star1_padding)
+    d.duplex(b'abc', 8)
+    assert sponge._PADDING_TEMPLATES[
+        padding.add_10star1_padding, 40] is d._templates
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test parallel sponge-based AEAD cipher.
+
+Copyright (c), Felix Fontein, 2020
+
+This file is BSD licensed under the Simplified BSD License
+(see https://opensource.org/licenses/BSD-2-Clause).
+"""
+
+import itertools
+
+import pytest
+
+from . import keccak
+from . import padding
+from . import sponge_crypto
+from . import sponge_parallel
+
+
+MESSAGES = [
+    b'',
+    b'1234',
+    b'1234567890ABCDEF0123456789abcdef',
+    b'Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do ' +
+    b'eiusmod tempor incididunt ut labore et dolore magna aliqua. Ut enim ' +
+    b'ad minim veniam, quis nostrud exercitation ullamco laboris nisi ut ' +
+    b'aliquip ex ea commodo consequat.',
+]
+
+
+def create_cipher(**kwargs):
+    """Create parallel cipher over Keccak-f[1600] with SHA-3-256 like
+    parameters."""
+    f = keccak.KeccakF(6)
+    return sponge_parallel.ParallelSpongeAEAD(
+        f, 1088 // 8, 256 // 8, 256 // 8, padding.add_10star1_padding,
+        **kwargs)
+
+
+@pytest.mark.parametrize("lanes, data",
+                         list(itertools.product([1, 2, 3, 4], MESSAGES)))
+def test_parallel_sponge_aead(lanes, data):
+    """Test encryption and decryption with packed and unpacked lanes."""
+    c = create_cipher(lanes=lanes)
+    enc_data, tag = c.encrypt_and_tag(b'hunter2', b'public header', data)
+    assert len(enc_data) == len(data)
+    assert c.decrypt_and_authenticate(
+        b'hunter2', b'public header', enc_data, tag) == data
+    with pytest.raises(ValueError):
+        c.decrypt_and_authenticate(
+            b'hunter2', b'other header', enc_data, tag)
+    # Running the lanes one after another gives the same result
+    c._f_packed = None
+    assert c.encrypt_and_tag(b'hunter2', b'public header', data) == (
+        enc_data, tag)
+
+
+@pytest.mark.parametrize("data", MESSAGES)
+def test_parallel_sponge_aead_lane(data):
+    """Test that a single lane is the sponge AEAD cipher."""
+    f = keccak.KeccakF(6)
+    c = sponge_crypto.SpongeAEAD(f, 1088 // 8, 256 // 8, 256 // 8,
+                                 padding.add_10star1_padding)
+    enc_data, dummy = create_cipher(lanes=1).encrypt_and_tag(
+        b'hunter2', b'public header', data)
+    assert enc_data == c.encrypt_and_tag(
+        b'hunter2', b'\x01\x01public header', data)[0]
+
+
+def test_parallel_sponge_aead_lanes_differ():
+    """Test that the number of lanes changes the result."""
+    data = MESSAGES[-1]
+    results = {create_cipher(lanes=lanes).encrypt_and_tag(b'k', b'', data)
+               for lanes in (1, 2, 3, 4)}
+    assert len(results) == 4
+
+
+def test_parallel_sponge_aead_processes(monkeypatch):
+    """Test that running the lanes on a process pool gives the same
+    result."""
+    monkeypatch.setattr(sponge_parallel, '_POOL_THRESHOLD', 100)
+    data = MESSAGES[-1] * 2
+    expected = create_cipher(lanes=3).encrypt_and_tag(b'k', b'h', data)
+    c = create_cipher(lanes=3, processes=2)
+    assert c.encrypt_and_tag(b'k', b'h', data) == expected
+    assert c.decrypt_and_authenticate(b'k', b'h', *expected) == data
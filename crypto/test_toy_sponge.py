@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test the toy sponge permutation.
+
+The expected hashes are the outputs of simple_sponge2.py.
+
+Copyright (c), Felix Fontein, 2020
+
+This file is BSD licensed under the Simplified BSD License
+(see https://opensource.org/licenses/BSD-2-Clause).
+"""
+
+import os
+
+import pytest
+
+from . import padding
+from . import sponge_crypto
+from . import toy_sponge
+
+
+STATES = [
+    b'\x00' * 16,
+    b'\xff' * 16,
+    b'\x80' * 16,
+    bytes(range(16)),
+] + [os.urandom(16) for _ in range(20)]
+
+
+@pytest.mark.parametrize("data", STATES)
+def test_toy_sponge_engines(data):
+    """Compare the table-driven engine with the reference engine."""
+    f_tables = toy_sponge.ToySpongeF('tables')
+    f_reference = toy_sponge.ToySpongeF('reference')
+    s_tables = f_tables.new_state()
+    s_reference = f_reference.new_state()
+    for dummy in range(3):
+        s_tables.from_bytes(data)
+        s_reference.from_bytes(data)
+        f_tables(s_tables)
+        f_reference(s_reference)
+        assert s_tables.to_bytes() == s_reference.to_bytes()
+
+
+@pytest.mark.parametrize("engine, text, expected", [
+    (engine, text, expected)
+    for engine in toy_sponge.ToySpongeF.ENGINES
+    for text, expected in [
+        (b'Test 1234', '1a6e4dcf74c921af977afe34955019ef'),
+        (b'Test 1235', '3d8e42df0e79151753ad4b513dc0e201'),
+        (b'Test 12345', '5fdad56ab2d27e4c32aa66c272f631d8'),
+    ]
+])
+def test_toy_sponge_hash(engine, text, expected):
+    """Test a sponge hash over the toy permutation with both engines."""
+    h = sponge_crypto.SpongeHash(toy_sponge.ToySpongeF(engine),
+                                 10,
+                                 padding.add_10star1_padding)
+    h.final_absorb(text)
+    assert h.squeeze(16).hex() == expected
+
+
+def test_toy_sponge_state():
+    """Test the toy sponge state and invalid parameters."""
+    f = toy_sponge.ToySpongeF()
+    with pytest.raises(ValueError):
+        f.new_state().from_bytes(b'\x00' * 17)
+    with pytest.raises(ValueError):
+        toy_sponge.ToySpongeF('unknown')
+    s = f.new_state()
+    s.from_bytes(b'abc')
+    c = s.clone()
+    f(s)
+    assert c.to_bytes() == b'abc' + b'\x00' * 13
+    f(c)
+    assert c.to_bytes() == s.to_bytes()
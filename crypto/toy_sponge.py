@@ -0,0 +1,165 @@
+"""
+Implements the 128-bit toy permutation of the teaching sponges in
+simple_sponge.py and simple_sponge2.py.
+
+Each of the 11 rounds applies the AES S-box to every byte, XORs four
+rotations of the state (seen as a 128-bit little endian integer), and adds
+a round key (digits of π) bytewise modulo 256.
+
+The S-box and the linear layer are combined into one table per byte
+position (like the T-tables of AES): entry ``v`` of table ``j`` is the
+result of the linear layer applied to the state with ``S(v)`` at byte
+``j`` and zeros elsewhere. A round thus consists of 16 table lookups,
+which are XORed, and a bytewise addition of the round key done on the
+whole integer at once.
+
+WARNING: These implementations are for educational purposes.
+         DO NOT use them for real-world applications!
+
+Copyright (c), Felix Fontein, 2020
+
+This file is BSD licensed under the Simplified BSD License
+(see https://opensource.org/licenses/BSD-2-Clause).
+"""
+
+import typing
+
+from . import aes
+from . import utils
+from .sponge import F, State
+
+
+# Hexadecimal fractional digits of π
+# https://www.pi2e.ch/blog/wp-content/uploads/2017/03/pi_hex_1k.txt
+ROUND_KEYS = [
+    (0x24, 0x3f, 0x6a, 0x88, 0x85, 0xa3, 0x08, 0xd3,
+     0x13, 0x19, 0x8a, 0x2e, 0x03, 0x70, 0x73, 0x44,),
+    (0xa4, 0x09, 0x38, 0x22, 0x29, 0x9f, 0x31, 0xd0,
+     0x08, 0x2e, 0xfa, 0x98, 0xec, 0x4e, 0x6c, 0x89,),
+    (0x45, 0x28, 0x21, 0xe6, 0x38, 0xd0, 0x13, 0x77,
+     0xbe, 0x54, 0x66, 0xcf, 0x34, 0xe9, 0x0c, 0x6c,),
+    (0xc0, 0xac, 0x29, 0xb7, 0xc9, 0x7c, 0x50, 0xdd,
+     0x3f, 0x84, 0xd5, 0xb5, 0xb5, 0x47, 0x09, 0x17,),
+    (0x92, 0x16, 0xd5, 0xd9, 0x89, 0x79, 0xfb, 0x1b,
+     0xd1, 0x31, 0x0b, 0xa6, 0x98, 0xdf, 0xb5, 0xac,),
+    (0x2f, 0xfd, 0x72, 0xdb, 0xd0, 0x1a, 0xdf, 0xb7,
+     0xb8, 0xe1, 0xaf, 0xed, 0x6a, 0x26, 0x7e, 0x96,),
+    (0xba, 0x7c, 0x90, 0x45, 0xf1, 0x2c, 0x7f, 0x99,
+     0x24, 0xa1, 0x99, 0x47, 0xb3, 0x91, 0x6c, 0xf7,),
+    (0x08, 0x01, 0xf2, 0xe2, 0x85, 0x8e, 0xfc, 0x16,
+     0x63, 0x69, 0x20, 0xd8, 0x71, 0x57, 0x4e, 0x69,),
+    (0xa4, 0x58, 0xfe, 0xa3, 0xf4, 0x93, 0x3d, 0x7e,
+     0x0d, 0x95, 0x74, 0x8f, 0x72, 0x8e, 0xb6, 0x58,),
+    (0x71, 0x8b, 0xcd, 0x58, 0x82, 0x15, 0x4a, 0xee,
+     0x7b, 0x54, 0xa4, 0x1d, 0xc2, 0x5a, 0x59, 0xb5,),
+    (0x9c, 0x30, 0xd5, 0x39, 0x2a, 0xf2, 0x60, 0x13,
+     0xc5, 0xd1, 0xb0, 0x23, 0x28, 0x60, 0x85, 0xf0,),
+]
+
+# Rotations (to the right) XORed by the linear layer
+ROTATIONS = (31, 56, 111, 1)
+
+_MASK = (1 << 128) - 1
+_LOW_7_BITS = int.from_bytes(b'\x7f' * 16, byteorder='little')
+_HIGH_BIT = int.from_bytes(b'\x80' * 16, byteorder='little')
+
+
+def _linear_layer(value: int) -> int:
+    """XOR the rotations of a 128-bit integer."""
+    result = 0
+    for r in ROTATIONS:
+        result ^= ((value >> r) | (value << (128 - r))) & _MASK
+    return result
+
+
+def _compute_tables() -> typing.List[typing.List[int]]:
+    """Compute the combined S-box and linear layer tables."""
+    return [
+        [_linear_layer(aes.AES_S_BOX[v] << (8 * j)) for v in range(256)]
+        for j in range(16)
+    ]
+
+
+_TABLES = _compute_tables()
+
+_ROUND_KEYS = [int.from_bytes(bytes(rk), byteorder='little')
+               for rk in ROUND_KEYS]
+
+
+class ToySpongeState(State):
+    """Represents the 16 byte state as a little endian integer."""
+
+    _value: int
+
+    def __init__(self):
+        self.b_bytes = 16
+        self._value = 0
+
+    def from_bytes(self, value: bytes):
+        """Incorporate bytes into state.
+
+        Can be between 0 and 16 bytes long."""
+        if len(value) > 16:
+            raise ValueError(
+                'Cannot initialize toy sponge state with more than 16 bytes')
+        self._value ^= int.from_bytes(value, byteorder='little')
+
+    def to_bytes(self) -> bytes:
+        """Converts state into byte string of length 16."""
+        return self._value.to_bytes(16, byteorder='little')
+
+    def clone(self) -> 'ToySpongeState':
+        result = ToySpongeState()
+        result._value = self._value
+        return result
+
+
+class ToySpongeF(F):
+    """Allow to evaluate the toy permutation.
+
+    The ``'tables'`` engine uses the combined lookup tables described
+    above. The ``'reference'`` engine evaluates the round function byte by
+    byte, as in simple_sponge2.py.
+    """
+    ENGINES = ('tables', 'reference')
+
+    def __init__(self, engine: str = 'tables'):
+        if engine not in self.ENGINES:
+            raise ValueError('Unknown toy sponge engine {0}'.format(engine))
+        self.engine = engine
+        self.b_bytes = 16
+
+    def new_state(self) -> ToySpongeState:
+        """Create a new zeroed state object."""
+        return ToySpongeState()
+
+    def _permute_reference(self, value: int) -> int:
+        state = list(value.to_bytes(16, byteorder='little'))
+        for rk in ROUND_KEYS:
+            state = [aes.AES_S_BOX[v] for v in state]
+            rotated = [utils.rotate_value_list(state, r) for r in ROTATIONS]
+            state = [a ^ b ^ c ^ d for a, b, c, d in zip(*rotated)]
+            state = [(v + k) % 256 for v, k in zip(state, rk)]
+        return int.from_bytes(bytes(state), byteorder='little')
+
+    def _permute_tables(self, value: int) -> int:
+        (t0, t1, t2, t3, t4, t5, t6, t7,
+         t8, t9, t10, t11, t12, t13, t14, t15) = _TABLES
+        for rk in _ROUND_KEYS:
+            b = value.to_bytes(16, byteorder='little')
+            value = (t0[b[0]] ^ t1[b[1]] ^ t2[b[2]] ^ t3[b[3]] ^
+                     t4[b[4]] ^ t5[b[5]] ^ t6[b[6]] ^ t7[b[7]] ^
+                     t8[b[8]] ^ t9[b[9]] ^ t10[b[10]] ^ t11[b[11]] ^
+                     t12[b[12]] ^ t13[b[13]] ^ t14[b[14]] ^ t15[b[15]])
+            # Bytewise addition: add the low 7 bits of every byte, and
+            # XOR in the top bits so that no carry leaves a byte
+            value = (((value & _LOW_7_BITS) + (rk & _LOW_7_BITS)) ^
+                     ((value ^ rk) & _HIGH_BIT))
+        return value
+
+    def __call__(self, state: ToySpongeState):
+        """Apply function to the given state."""
+        if self.engine == 'tables':
+            state._value = self._permute_tables(state._value)
+        else:
+            state._value = self._permute_reference(state._value)
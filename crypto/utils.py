@@ -1,5 +1,6 @@
 """
 Provides various helping functions used in cryptography:
+ * buffered random bytes from a pluggable source
  * bitwise rotation
  * computing GCD and extended GCD
  * fast modular exponentiation
@@ -16,6 +17,117 @@ This file is BSD licensed under the Simplified BSD License
 """
 
 import os
+import threading
+import weakref
+
+
+# ###################################################################
+# ## Random sources
+
+# Buffered sources which have to forget their buffers after a fork
+_BUFFERED_SOURCES = weakref.WeakSet()
+
+
+def _after_fork():
+    for source in list(_BUFFERED_SOURCES):
+        source._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+class BufferedRandomSource:
+    """
+    Serves random bytes from a buffer, which is refilled with
+    ``buffer_size`` bytes at once by calling ``generate``.
+
+    Small requests thus do not need a call of ``generate`` (by default
+    ``os.urandom``, i.e. a system call) each. After a fork, the child
+    process discards the buffer, so that parent and child do not return
+    the same bytes.
+    """
+
+    def __init__(self, generate=os.urandom, buffer_size=4096):
+        self._generate = generate
+        self._buffer_size = buffer_size
+        self._buffer = b''
+        self._offset = 0
+        self._lock = threading.Lock()
+        _BUFFERED_SOURCES.add(self)
+
+    def _after_fork(self):
+        """Called in the child process after a fork."""
+        self._lock = threading.Lock()
+        self._discard()
+
+    def _discard(self):
+        """Discard the buffered bytes."""
+        self._buffer = b''
+        self._offset = 0
+
+    def random_bytes(self, number_of_bytes):
+        """Return number_of_bytes random bytes."""
+        with self._lock:
+            offset = self._offset
+            end = offset + number_of_bytes
+            if end <= len(self._buffer):
+                self._offset = end
+                return self._buffer[offset:end]
+            result = self._buffer[offset:]
+            missing = number_of_bytes - len(result)
+            if missing >= self._buffer_size:
+                self._discard()
+                return result + self._generate(missing)
+            self._buffer = self._generate(self._buffer_size)
+            self._offset = missing
+            return result + self._buffer[:missing]
+
+    def random_numbers(self, count, max_value):
+        """Return list of count random numbers x with 0 <= x < max_value.
+
+        The random bytes for many candidates are requested at once."""
+        assert max_value > 0
+        number_of_bits = max_value.bit_length()
+        number_of_bytes = (number_of_bits + 7) // 8
+        shift = number_of_bytes * 8 - number_of_bits
+        result = []
+        while len(result) < count:
+            # Every candidate is accepted with probability > 1/2
+            missing = count - len(result)
+            data = self.random_bytes((2 * missing + 1) * number_of_bytes)
+            for i in range(0, len(data), number_of_bytes):
+                num = int.from_bytes(data[i:i + number_of_bytes],
+                                     byteorder='big') >> shift
+                # As in get_random_number(), reject numbers which are
+                # too large to avoid a bias
+                if num < max_value:
+                    result.append(num)
+                    if len(result) == count:
+                        break
+        return result
+
+
+_random_source = BufferedRandomSource()
+
+
+def set_random_source(source=None):
+    """Set the source of random bytes used by the functions of this module.
+
+    ``source`` must provide ``random_bytes(number_of_bytes)`` and
+    ``random_numbers(count, max_value)``, like ``BufferedRandomSource`` or
+    ``drbg.SpongeDRBG``. If ``None``, buffered output of ``os.urandom`` is
+    used. Returns the previous source.
+    """
+    global _random_source
+    previous = _random_source
+    _random_source = source if source is not None else BufferedRandomSource()
+    return previous
+
+
+def get_random_bytes(number_of_bytes):
+    """Return number_of_bytes random bytes."""
+    return _random_source.random_bytes(number_of_bytes)
 
 
 # ###################################################################
@@ -26,7 +138,7 @@ def get_random_n_bit_number(number_of_bits):
     if number_of_bits <= 0:
         return 0
     number_of_bytes = (number_of_bits + 7) // 8
-    random_bytes = os.urandom(number_of_bytes)
+    random_bytes = _random_source.random_bytes(number_of_bytes)
     num = int.from_bytes(random_bytes, byteorder='big')
     if number_of_bytes * 8 > number_of_bits:
         num >>= number_of_bytes * 8 - number_of_bits
@@ -51,6 +163,11 @@ def get_random_number(max_value):
             return num
 
 
+def get_random_numbers(count, max_value):
+    """Return list of count random numbers x with 0 <= x < max_value."""
+    return _random_source.random_numbers(count, max_value)
+
+
 # ###################################################################
 # ## Bitwise rotations
 
@@ -159,8 +276,9 @@ def is_probable_prime(p, mr_tries=100):
     if gcd(p, 6469693230) > 1:
         return False
     # Do Miller-Rabin with some random bases
-    for _ in range(mr_tries):
-        a = int.from_bytes(os.urandom(3), byteorder='big')
+    random_bytes = _random_source.random_bytes(3 * mr_tries)
+    for i in range(mr_tries):
+        a = int.from_bytes(random_bytes[3 * i:3 * i + 3], byteorder='big')
         if not miller_rabin(p, a):
             return False
     return True